@@ -0,0 +1,442 @@
+"""
+Audit Log - Append-only binary record of every prediction
+Columnar in-memory blocks, a background group-commit writer and rotating
+segment files that can be scanned by time range without decoding
+
+Segment layout:
+    b"FDAUDIT1" | uint32 header length | JSON header (model version,
+    feature names, column dtypes)
+    then blocks of: b"BLK1" | uint32 rows | float64 t_min | float64 t_max |
+    uint64 payload bytes | uint32 crc32 | payload (columns back to back)
+
+A torn last block (crash mid-write) fails its length or CRC check and is
+ignored by the reader.
+
+Usage:
+    python audit_log.py --log-dir audit --start "2026-01-28 00:00" --end "2026-01-29 00:00"
+"""
+
+import argparse
+import atexit
+import glob
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+SEGMENT_MAGIC = b"FDAUDIT1"
+BLOCK_MAGIC = b"BLK1"
+BLOCK_HEADER = struct.Struct("<4sIddQI")
+SEGMENT_PREFIX = "audit-"
+SEGMENT_SUFFIX = ".seg"
+ID_BYTES = 32
+FSYNC_POLICIES = ("always", "interval", "never")
+
+DEFAULT_BLOCK_ROWS = 4096
+DEFAULT_SEGMENT_BYTES = 64 << 20
+DEFAULT_MAX_PENDING_BLOCKS = 64
+DEFAULT_MAX_WAIT_SECONDS = 0.05
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+
+def _columns(n_features: int) -> Dict[str, tuple]:
+    """Column name -> (dtype, per-row shape), in on-disk order"""
+    return {
+        "timestamp": ("<f8", ()),
+        "transaction_id": (f"S{ID_BYTES}", ()),
+        "features": ("<f4", (n_features,)),
+        "lr_probability": ("<f8", ()),
+        "rf_probability": ("<f8", ()),
+        "consensus_score": ("<f8", ()),
+        "consensus_prediction": ("<i1", ()),
+    }
+
+
+class _Block:
+    """Preallocated column arrays for up to `capacity` rows"""
+
+    def __init__(self, columns: Dict[str, tuple], capacity: int):
+        self.arrays = {name: np.empty((capacity,) + shape, dtype=dtype)
+                       for name, (dtype, shape) in columns.items()}
+        self.capacity = capacity
+        self.rows = 0
+        self.created = time.monotonic()
+
+    def encode(self) -> bytes:
+        n = self.rows
+        payload = b"".join(self.arrays[name][:n].tobytes() for name in self.arrays)
+        times = self.arrays["timestamp"][:n]
+        header = BLOCK_HEADER.pack(BLOCK_MAGIC, n, float(times.min()), float(times.max()),
+                                   len(payload), zlib.crc32(payload))
+        return header + payload
+
+
+class AuditLog:
+    """
+    Buffered, append-only prediction audit sink
+
+    append() copies a scored batch into the current column block; full
+    blocks go to a bounded queue drained by one writer thread, which writes
+    every queued block in a single write() and fsyncs according to the
+    policy (group commit). Partial blocks are sealed after flush_interval.
+
+    Backpressure: when the queue is full, append() waits at most
+    max_wait_seconds (flush() at most its timeout), then drops the block and
+    counts the rows in dropped_rows, so scoring latency stays bounded.
+    """
+
+    def __init__(self, log_dir: str, feature_names: Sequence[str],
+                 model_version: Optional[str] = None,
+                 block_rows: int = DEFAULT_BLOCK_ROWS,
+                 segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+                 fsync: str = "interval", fsync_interval: float = 1.0,
+                 max_pending_blocks: int = DEFAULT_MAX_PENDING_BLOCKS,
+                 max_wait_seconds: float = DEFAULT_MAX_WAIT_SECONDS,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        """
+        Args:
+            log_dir: Directory for segment files
+            feature_names: Ordered model features
+            model_version: Stored in every segment header
+            block_rows: Rows per in-memory column block
+            segment_bytes: Rotate to a new segment file past this size
+            fsync: "always" (every group commit), "interval" (at most every
+                fsync_interval seconds) or "never" (leave it to the OS)
+            fsync_interval: Seconds between fsyncs for fsync="interval"
+            max_pending_blocks: Sealed blocks that may wait for the writer
+            max_wait_seconds: Longest append() waits on a full queue
+            flush_interval: Seal a partial block after this many seconds
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        os.makedirs(log_dir, exist_ok=True)
+        self.log_dir = log_dir
+        self.feature_names = list(feature_names)
+        self.model_version = model_version
+        self.columns = _columns(len(self.feature_names))
+        self.block_rows = block_rows
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.max_wait_seconds = max_wait_seconds
+        self.flush_interval = flush_interval
+
+        self.written_rows = 0
+        self.dropped_rows = 0
+        self.error: Optional[BaseException] = None
+
+        self._block = _Block(self.columns, block_rows)
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[_Block]]" = queue.Queue(max_pending_blocks)
+        self._file = None
+        self._last_fsync = time.monotonic()
+        self._closed = False
+        self._writer = threading.Thread(target=self._run_writer, name="audit-writer",
+                                        daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    # ---------- producer side ----------
+
+    def append(self, features: np.ndarray, lr_proba, rf_proba, consensus_score,
+               consensus_pred, transaction_ids: Sequence[str],
+               timestamp: Optional[float] = None):
+        """
+        Record a scored batch
+
+        Args:
+            features: Raw (unscaled) features, shape (rows, features)
+            lr_proba: LR fraud probabilities
+            rf_proba: RF fraud probabilities
+            consensus_score: Blended scores
+            consensus_pred: 0/1 consensus decisions
+            transaction_ids: One id per row (truncated to 32 bytes)
+            timestamp: Epoch seconds for the batch (default: now)
+        """
+        features = np.atleast_2d(features)
+        n = len(features)
+        values = {
+            "timestamp": np.full(n, time.time() if timestamp is None else timestamp),
+            "transaction_id": np.asarray([str(t).encode()[:ID_BYTES] for t in transaction_ids],
+                                         dtype=f"S{ID_BYTES}"),
+            "features": features,
+            "lr_probability": np.atleast_1d(lr_proba),
+            "rf_probability": np.atleast_1d(rf_proba),
+            "consensus_score": np.atleast_1d(consensus_score),
+            "consensus_prediction": np.atleast_1d(consensus_pred),
+        }
+
+        start = 0
+        while start < n:
+            with self._lock:
+                block = self._block
+                take = min(n - start, block.capacity - block.rows)
+                for name, array in block.arrays.items():
+                    array[block.rows:block.rows + take] = values[name][start:start + take]
+                block.rows += take
+                sealed = self._seal() if block.rows == block.capacity else None
+            start += take
+            if sealed is not None:
+                self._enqueue(sealed, self.max_wait_seconds)
+
+    def _seal(self) -> Optional[_Block]:
+        """Swap in a fresh block and return the old one (call with _lock held)"""
+        if not self._block.rows:
+            return None
+        sealed, self._block = self._block, _Block(self.columns, self.block_rows)
+        return sealed
+
+    def _enqueue(self, block: _Block, timeout: float) -> bool:
+        """Queue a sealed block, or drop it and count its rows after timeout"""
+        try:
+            self._queue.put(block, timeout=timeout)
+            return True
+        except queue.Full:
+            self._count_dropped(block.rows)
+            return False
+
+    def _count_dropped(self, rows: int):
+        """Add to dropped_rows; appending threads and the writer both call this"""
+        with self._lock:
+            self.dropped_rows += rows
+
+    def flush(self, timeout: float = 10.0):
+        """Seal the current block and wait until everything queued is written"""
+        with self._lock:
+            sealed = self._seal()
+        if sealed is not None:
+            self._enqueue(sealed, timeout)
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def close(self):
+        """Flush, stop the writer and close the current segment"""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        try:
+            self._queue.put(None, timeout=10.0)
+        except queue.Full:
+            pass  # writer is stuck; it is a daemon thread
+        self._writer.join(timeout=10.0)
+
+    # ---------- writer side ----------
+
+    def _run_writer(self):
+        while True:
+            try:
+                block = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                # The writer is the queue's only consumer, so it writes an
+                # aged partial block itself rather than queueing it (a put
+                # on a queue that filled meanwhile would never return)
+                with self._lock:
+                    aged = (self._block.rows and
+                            time.monotonic() - self._block.created >= self.flush_interval)
+                    sealed = self._seal() if aged else None
+                if sealed is not None:
+                    self._commit([sealed])
+                continue
+
+            # Group commit: everything already queued goes out in one write
+            group = [block]
+            while True:
+                try:
+                    group.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in group
+            try:
+                self._commit([b for b in group if b is not None])
+            finally:
+                for _ in group:
+                    self._queue.task_done()
+
+            if stop:
+                if self._file is not None:
+                    self._sync(force=True)
+                    self._file.close()
+                    self._file = None
+                return
+
+    def _commit(self, blocks: List[_Block]):
+        """Write blocks, recording a failure instead of killing the writer"""
+        try:
+            if blocks:
+                self._write(blocks)
+        except BaseException as e:
+            self.error = e
+            self._count_dropped(sum(b.rows for b in blocks))
+
+    def _open_segment(self, first_timestamp: float):
+        if self._file is not None:
+            self._sync(force=True)
+            self._file.close()
+        # Segment names carry their first timestamp; nudge it on collision
+        while True:
+            path = os.path.join(self.log_dir,
+                                f"{SEGMENT_PREFIX}{first_timestamp:017.6f}{SEGMENT_SUFFIX}")
+            if not os.path.exists(path):
+                break
+            first_timestamp += 1e-6
+        self._file = open(path, "ab")
+        header = json.dumps({
+            "model_version": self.model_version,
+            "feature_names": self.feature_names,
+            "columns": {k: [dtype, list(shape)] for k, (dtype, shape) in self.columns.items()},
+        }).encode()
+        self._file.write(SEGMENT_MAGIC + struct.pack("<I", len(header)) + header)
+
+    def _write(self, blocks: List[_Block]):
+        data = b"".join(b.encode() for b in blocks)
+        if self._file is None or self._file.tell() + len(data) > self.segment_bytes:
+            self._open_segment(float(blocks[0].arrays["timestamp"][0]))
+        self._file.write(data)
+        self._file.flush()
+        self._sync()
+        self.written_rows += sum(b.rows for b in blocks)
+
+    def _sync(self, force: bool = False):
+        """fsync per policy; with fsync="never" not even on segment close"""
+        if self.fsync == "never":
+            return
+        now = time.monotonic()
+        if force or self.fsync == "always" or now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+
+# ==================== READER ====================
+
+def _segment_paths(log_dir: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(log_dir, f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}")))
+
+
+def _segment_start(path: str) -> float:
+    return float(os.path.basename(path)[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+
+
+def iter_blocks(log_dir: str, start: float = float("-inf"), end: float = float("inf"),
+                columns: Optional[Sequence[str]] = None) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Yield decoded blocks whose rows fall in [start, end]
+
+    Segments that start after `end` or whose successor starts before
+    `start` are never opened; inside a segment, blocks outside the range
+    are skipped by seeking past their payload.
+
+    Args:
+        log_dir: Audit log directory
+        start: Epoch seconds, inclusive
+        end: Epoch seconds, inclusive
+        columns: Columns to decode (default: all)
+
+    Yields:
+        {column: array} per block, rows filtered to the range, plus
+        "model_version" as a scalar
+    """
+    paths = _segment_paths(log_dir)
+    for i, path in enumerate(paths):
+        if _segment_start(path) > end:
+            break
+        if i + 1 < len(paths) and _segment_start(paths[i + 1]) < start:
+            continue
+
+        with open(path, "rb") as f:
+            if f.read(len(SEGMENT_MAGIC)) != SEGMENT_MAGIC:
+                continue
+            (header_len,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_len))
+            layout = {k: (np.dtype(dtype), tuple(shape))
+                      for k, (dtype, shape) in header["columns"].items()}
+            wanted = list(columns or layout)
+            if "timestamp" not in wanted:
+                wanted.insert(0, "timestamp")
+
+            while True:
+                raw = f.read(BLOCK_HEADER.size)
+                if len(raw) < BLOCK_HEADER.size:
+                    break
+                magic, n, t_min, t_max, payload_len, crc = BLOCK_HEADER.unpack(raw)
+                if magic != BLOCK_MAGIC:
+                    break
+                if t_max < start or t_min > end:
+                    f.seek(payload_len, os.SEEK_CUR)
+                    continue
+                payload = f.read(payload_len)
+                if len(payload) < payload_len or zlib.crc32(payload) != crc:
+                    break  # torn tail
+
+                block, offset = {}, 0
+                for name, (dtype, shape) in layout.items():
+                    size = n * dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+                    if name in wanted:
+                        block[name] = np.frombuffer(payload, dtype, n * int(np.prod(shape)),
+                                                    offset).reshape((n,) + shape)
+                    offset += size
+                mask = (block["timestamp"] >= start) & (block["timestamp"] <= end)
+                out = {name: block[name][mask] for name in wanted}
+                out["model_version"] = header["model_version"]
+                yield out
+
+
+def read_range(log_dir: str, start: float = float("-inf"), end: float = float("inf"),
+               columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Read all audit rows in [start, end] into concatenated column arrays
+
+    Returns:
+        {column: array}; empty arrays if nothing matches
+    """
+    parts: Dict[str, list] = {}
+    for block in iter_blocks(log_dir, start, end, columns):
+        for name, values in block.items():
+            if name != "model_version":
+                parts.setdefault(name, []).append(values)
+    return {name: np.concatenate(values) for name, values in parts.items()}
+
+
+def _parse_time(value: Optional[str], default: float) -> float:
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan the prediction audit log")
+    parser.add_argument("--log-dir", default="audit")
+    parser.add_argument("--start", default=None, help="Epoch seconds or ISO datetime")
+    parser.add_argument("--end", default=None, help="Epoch seconds or ISO datetime")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = read_range(args.log_dir, _parse_time(args.start, float("-inf")),
+                      _parse_time(args.end, float("inf")),
+                      ["transaction_id", "consensus_score", "consensus_prediction"])
+    elapsed = time.perf_counter() - start
+
+    n = len(rows.get("timestamp", []))
+    print(f"✅ Read {n:,} records in {elapsed * 1e3:.0f} ms "
+          f"from {len(_segment_paths(args.log_dir))} segments")
+    if n:
+        flagged = int(rows["consensus_prediction"].sum())
+        print(f"  Flagged: {flagged:,} ({flagged / n:.2%})")
+        print(f"  From {datetime.fromtimestamp(rows['timestamp'].min())} "
+              f"to {datetime.fromtimestamp(rows['timestamp'].max())}")
+
+
+if __name__ == "__main__":
+    main()
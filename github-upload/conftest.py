@@ -0,0 +1,56 @@
+"""
+Shared pytest fixtures - synthetic transactions and a small trained model set
+The real creditcard.csv is not needed; data follows its column layout
+
+test_app.py is a launcher script (it starts Streamlit), not a test module.
+"""
+
+import numpy as np
+import pytest
+
+collect_ignore = ["test_app.py"]
+
+N_ROWS = 6000
+FRAUD_RATE = 0.03
+
+
+def make_transactions(n_rows: int = N_ROWS, seed: int = 0, fraud_rate: float = FRAUD_RATE):
+    """DataFrame shaped like creditcard.csv: Time, V1..V28, Amount, Class"""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    y = (rng.random(n_rows) < fraud_rate).astype(int)
+    V = rng.standard_normal((n_rows, 28))
+    V[y == 1, :5] += 1.5
+    V[y == 1, 13] -= 2.0
+    df = pd.DataFrame(V, columns=[f"V{i}" for i in range(1, 29)])
+    df.insert(0, "Time", np.sort(rng.uniform(0, 172_800, n_rows)))
+    df["Amount"] = np.round(rng.exponential(80, n_rows), 2)
+    df["Class"] = y
+    return df
+
+
+@pytest.fixture(scope="session")
+def transactions_csv(tmp_path_factory):
+    path = tmp_path_factory.mktemp("data") / "transactions.csv"
+    make_transactions().to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def models_dir(tmp_path_factory, transactions_csv):
+    """Model directory written by train_pipeline (10 trees)"""
+    from train_pipeline import run_pipeline
+
+    root = tmp_path_factory.mktemp("models")
+    run_pipeline(transactions_csv, str(root / "models"), str(root / "cache"), n_estimators=10)
+    return str(root / "models")
+
+
+@pytest.fixture(scope="session")
+def api(models_dir):
+    from fraud_detection_api import FraudDetectionAPI
+
+    api = FraudDetectionAPI(models_dir)
+    yield api
+    api.close()
@@ -51,33 +51,20 @@ try:
 except ImportError as e:
     print(f"    ✗ numpy: {e}")
 
-# Step 4: Load pickle files
-print("\n[4] Testing model loading...")
+# Step 4: Verify pickle files against the manifest (the models are not unpickled)
+print("\n[4] Verifying model files...")
 import pickle
+from model_store import MANIFEST_FILE, check_artifacts
 
-try:
-    with open(f"{models_dir}/logistic_regression_model.pkl", "rb") as f:
-        lr_model = pickle.load(f)
-    print(f"    ✓ Loaded: logistic_regression_model")
-except Exception as e:
-    print(f"    ✗ Error loading LR model: {e}")
-    sys.exit(1)
-
-try:
-    with open(f"{models_dir}/random_forest_model.pkl", "rb") as f:
-        rf_model = pickle.load(f)
-    print(f"    ✓ Loaded: random_forest_model")
-except Exception as e:
-    print(f"    ✗ Error loading RF model: {e}")
-    sys.exit(1)
+if not os.path.exists(os.path.join(models_dir, MANIFEST_FILE)):
+    print(f"    ⚠ {MANIFEST_FILE} not found - checking pickle structure only")
 
-try:
-    with open(f"{models_dir}/scaler.pkl", "rb") as f:
-        scaler = pickle.load(f)
-    print(f"    ✓ Loaded: scaler")
-except Exception as e:
-    print(f"    ✗ Error loading scaler: {e}")
-    sys.exit(1)
+for check in check_artifacts(models_dir):
+    if check.ok:
+        print(f"    ✓ {check.name}: {check.size_bytes / 1024:.1f} KB ({check.message})")
+    else:
+        print(f"    ✗ {check.name}: {check.message}")
+        sys.exit(1)
 
 try:
     with open(f"{models_dir}/model_metadata.pkl", "rb") as f:
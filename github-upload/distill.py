@@ -0,0 +1,328 @@
+"""
+Distillation - Compress the Random Forest into a small student forest
+Fits a few shallow trees to the deployed forest's probabilities and exports
+them as a drop-in random_forest_model.pkl
+
+The student learns the teacher's fraud probability p(x) instead of the 0/1
+labels: each row is presented as fraud with weight p(x) and as legitimate
+with weight 1 - p(x), so every student leaf stores the mean teacher
+probability of the rows that reach it. Training rows are topped up with
+synthetic rows jittered around real transactions, fraud oversampled, so
+the student also sees the regions where the teacher's output changes.
+
+The student is an ordinary RandomForestClassifier, so FraudDetectionAPI,
+the explainer, the drift monitor and the app load it unchanged.
+
+Usage:
+    python distill.py --csv creditcard.csv --out-dir fraud_detection_models_distilled
+    python distill.py --trees 3 5 10 --max-depth 6 8 10 --min-agreement 0.9995
+"""
+
+import argparse
+import itertools
+import os
+import pickle
+import shutil
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from fraud_detection_api import apply_consensus, consensus_policy
+from model_search import measure_latency
+from model_store import ARTIFACT_FILES, ModelStore, write_manifest
+from train_pipeline import DEFAULT_CACHE_DIR, DEFAULT_CSV, DEFAULT_MODELS_DIR, load_dataset
+
+DEFAULT_TREES = (3, 5, 10)
+DEFAULT_DEPTHS = (6, 8, 10)
+DEFAULT_SYNTHETIC_ROWS = 200_000
+DEFAULT_MIN_AGREEMENT = 0.999   # consensus decisions matching the teacher on held-out rows
+DEFAULT_MAX_AUC_DROP = 0.005
+JITTER = 0.15                   # synthetic noise, in standard deviations of scaled features
+FRAUD_SHARE = 0.5               # share of synthetic rows jittered around fraud rows
+MAX_FEATURES = 0.5
+
+
+@dataclass
+class StudentReport:
+    """Fidelity, quality and cost of one student configuration"""
+    n_trees: int
+    max_depth: int
+    mean_gap: float             # mean |student - teacher| fraud probability
+    p99_gap: float
+    decision_agreement: float   # consensus decisions identical to the teacher's
+    auc: float
+    teacher_auc: float
+    single_latency_ms: float
+    batch_latency_us: float
+    memory_bytes: int           # tree arrays held in memory
+    pickle_bytes: int
+    fit_seconds: float
+
+
+def forest_memory_bytes(model) -> int:
+    """Bytes of node and value arrays held by a fitted forest's trees"""
+    forest = model.estimator if getattr(model, "negative_rate", None) is not None else model
+    total = 0
+    for estimator in forest.estimators_:
+        state = estimator.tree_.__getstate__()
+        total += state["nodes"].nbytes + state["values"].nbytes
+    return total
+
+
+def synthetic_rows(X: np.ndarray, y: np.ndarray, n: int, jitter: float = JITTER,
+                   fraud_share: float = FRAUD_SHARE, random_state: int = 42) -> np.ndarray:
+    """
+    Sample rows around real (scaled) transactions
+
+    Args:
+        X: Scaled training features
+        y: Training labels, used to oversample fraud neighborhoods
+        n: Rows to generate
+        jitter: Gaussian noise scale in scaled units
+        fraud_share: Share of rows centered on fraud transactions
+
+    Returns:
+        (n, features) float32 array
+    """
+    rng = np.random.default_rng(random_state)
+    fraud = np.flatnonzero(y == 1)
+    n_fraud = int(n * fraud_share) if len(fraud) else 0
+    centers = np.concatenate([rng.choice(fraud, n_fraud),
+                              rng.integers(0, len(X), n - n_fraud)])
+    noise = rng.standard_normal((n, X.shape[1]), dtype=np.float32) * jitter
+    return (np.asarray(X[centers], dtype=np.float32) + noise).astype(np.float32)
+
+
+def fit_student(X: np.ndarray, teacher_proba: np.ndarray, n_trees: int, max_depth: int,
+                random_state: int = 42):
+    """
+    Fit a RandomForestClassifier to soft labels
+
+    Rows whose soft-label weight is zero are dropped, so a mostly
+    legitimate training set costs little more than a hard-label fit.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    p = np.asarray(teacher_proba, dtype=np.float64)
+    fraud, legit = p > 0, p < 1
+    X_soft = np.concatenate([X[fraud], X[legit]])
+    y_soft = np.concatenate([np.ones(fraud.sum(), dtype=np.int8),
+                             np.zeros(legit.sum(), dtype=np.int8)])
+    weights = np.concatenate([p[fraud], 1.0 - p[legit]])
+
+    student = RandomForestClassifier(n_estimators=n_trees, max_depth=max_depth,
+                                     max_features=MAX_FEATURES, bootstrap=False,
+                                     random_state=random_state, n_jobs=-1)
+    student.fit(X_soft, y_soft, sample_weight=weights)
+    student.n_jobs = 1  # single-row latency suffers from joblib dispatch
+    return student
+
+
+def evaluate_student(student, teacher_test: np.ndarray, lr_test: np.ndarray,
+                     X_test: np.ndarray, y_test: np.ndarray, policy: Dict,
+                     fit_seconds: float, teacher_auc: float) -> StudentReport:
+    """Compare a student with the teacher on held-out rows"""
+    from sklearn.metrics import roc_auc_score
+
+    proba = student.predict_proba(X_test)[:, 1]
+    gap = np.abs(proba - teacher_test)
+    _, teacher_decision = apply_consensus(lr_test, teacher_test, policy)
+    _, student_decision = apply_consensus(lr_test, proba, policy)
+    latency = measure_latency(student, X_test)
+    return StudentReport(
+        n_trees=len(student.estimators_),
+        max_depth=student.max_depth,
+        mean_gap=float(gap.mean()),
+        p99_gap=float(np.percentile(gap, 99)),
+        decision_agreement=float(np.mean(teacher_decision == student_decision)),
+        auc=float(roc_auc_score(y_test, proba)),
+        teacher_auc=teacher_auc,
+        single_latency_ms=latency["single_latency_ms"],
+        batch_latency_us=latency["batch_latency_us"],
+        memory_bytes=forest_memory_bytes(student),
+        pickle_bytes=len(pickle.dumps(student)),
+        fit_seconds=fit_seconds,
+    )
+
+
+def distill(csv_path: str = DEFAULT_CSV, models_dir: str = DEFAULT_MODELS_DIR,
+            cache_dir: str = DEFAULT_CACHE_DIR, tree_counts: Sequence[int] = DEFAULT_TREES,
+            max_depths: Sequence[int] = DEFAULT_DEPTHS,
+            synthetic: int = DEFAULT_SYNTHETIC_ROWS,
+            min_agreement: float = DEFAULT_MIN_AGREEMENT,
+            max_auc_drop: float = DEFAULT_MAX_AUC_DROP, max_gap: Optional[float] = None,
+            test_size: float = 0.2, random_state: int = 42
+            ) -> Tuple[Optional[object], List[StudentReport], Dict]:
+    """
+    Fit and compare student forests, choosing the smallest faithful one
+
+    A student qualifies when its consensus decisions agree with the
+    teacher's on at least min_agreement of held-out rows, its AUC is at most
+    max_auc_drop below the teacher's and, if given, its mean probability gap
+    is at most max_gap. The train/test split repeats train_pipeline.preprocess,
+    so students are judged on rows neither they nor the teacher were fit on.
+
+    Returns:
+        (chosen student or None, reports for every configuration, context
+        dict with the split arrays and teacher report for export)
+    """
+    from sklearn.metrics import roc_auc_score
+    from sklearn.model_selection import train_test_split
+
+    store = ModelStore(models_dir)
+    teacher, policy = store.rf_model, consensus_policy(store.metadata)
+    ds = load_dataset(csv_path, cache_dir)
+    X_scaled = store.scaler.transform(ds.X).astype(np.float32)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_scaled, np.asarray(ds.y), test_size=test_size, random_state=random_state,
+        stratify=ds.y
+    )
+
+    start = time.perf_counter()
+    X_fit = np.concatenate([X_train, synthetic_rows(X_train, y_train, synthetic,
+                                                    random_state=random_state)])
+    teacher_fit = teacher.predict_proba(X_fit)[:, 1]
+    teacher_test = teacher.predict_proba(X_test)[:, 1]
+    lr_test = store.lr_model.predict_proba(X_test)[:, 1]
+    teacher_auc = float(roc_auc_score(y_test, teacher_test))
+    print(f"✅ Teacher labeled {len(X_fit):,} rows ({synthetic:,} synthetic) "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    latency = measure_latency(teacher, X_test)
+    teacher_report = {
+        "n_trees": len(teacher.estimators_),
+        "auc": teacher_auc,
+        "single_latency_ms": latency["single_latency_ms"],
+        "batch_latency_us": latency["batch_latency_us"],
+        "memory_bytes": forest_memory_bytes(teacher),
+        "pickle_bytes": os.path.getsize(os.path.join(models_dir, ARTIFACT_FILES["rf_model"])),
+    }
+
+    reports, students = [], []
+    for n_trees, max_depth in itertools.product(tree_counts, max_depths):
+        start = time.perf_counter()
+        student = fit_student(X_fit, teacher_fit, n_trees, max_depth, random_state)
+        report = evaluate_student(student, teacher_test, lr_test, X_test, y_test, policy,
+                                  time.perf_counter() - start, teacher_auc)
+        reports.append(report)
+        students.append(student)
+
+    faithful = [i for i, r in enumerate(reports)
+                if r.decision_agreement >= min_agreement
+                and r.auc >= teacher_auc - max_auc_drop
+                and (max_gap is None or r.mean_gap <= max_gap)]
+    chosen = min(faithful, key=lambda i: reports[i].memory_bytes) if faithful else None
+    context = {"teacher": teacher_report, "X_train": X_train, "X_test": X_test,
+               "y_train": y_train, "y_test": y_test, "lr_test": lr_test,
+               "chosen": reports[chosen] if chosen is not None else None}
+    return (students[chosen] if chosen is not None else None), reports, context
+
+
+def export_student(models_dir: str, out_dir: str, student, context: Dict,
+                   csv_path: str = DEFAULT_CSV) -> Dict:
+    """
+    Write a complete model directory with the student in place of the forest
+
+    The scaler, Logistic Regression and feature names are copied unchanged;
+    metadata gets the student's RF metrics and a "distillation" entry, and
+    the manifest and drift reference are rebuilt.
+
+    Returns:
+        The new metadata dictionary
+    """
+    from drift_monitor import build_reference
+    from train_pipeline import evaluate_models
+
+    if os.path.abspath(out_dir) == os.path.abspath(models_dir):
+        raise ValueError("Export to a new directory; the teacher's artifacts are kept")
+    os.makedirs(out_dir, exist_ok=True)
+
+    store = ModelStore(models_dir)
+    for name in ("lr_model", "scaler", "feature_names"):
+        shutil.copy2(os.path.join(models_dir, ARTIFACT_FILES[name]),
+                     os.path.join(out_dir, ARTIFACT_FILES[name]))
+    with open(os.path.join(out_dir, ARTIFACT_FILES["rf_model"]), "wb") as f:
+        pickle.dump(student, f)
+
+    scores = evaluate_models(store.lr_model, student, context["X_train"], context["X_test"],
+                             context["y_train"], context["y_test"])
+    metadata = dict(store.metadata)
+    metadata.update({key: value for key, value in scores.items() if key.startswith("rf_")})
+    metadata.update({
+        "model_date": scores["model_date"],
+        "n_estimators": len(student.estimators_),
+        "distillation": {
+            "source_models_dir": os.path.abspath(models_dir),
+            "source_csv": os.path.basename(csv_path),
+            "teacher": context["teacher"],
+            "student": asdict(context["chosen"]) if context["chosen"] else None,
+        },
+    })
+    with open(os.path.join(out_dir, ARTIFACT_FILES["metadata"]), "wb") as f:
+        pickle.dump(metadata, f)
+
+    write_manifest(out_dir, store.feature_names, metadata["model_date"].replace(" ", "T"))
+    build_reference(out_dir, context["X_train"], context["lr_test"],
+                    student.predict_proba(context["X_test"])[:, 1])
+    return metadata
+
+
+def print_report(reports: List[StudentReport], teacher: Dict,
+                 chosen: Optional[StudentReport] = None):
+    """Print every configuration next to the teacher"""
+    print(f"\n📊 Teacher: {teacher['n_trees']} trees, AUC {teacher['auc']:.4f}, "
+          f"{teacher['single_latency_ms']:.2f} ms/row single, "
+          f"{teacher['batch_latency_us']:.2f} us/row batch, "
+          f"{teacher['memory_bytes'] / 1e6:.1f} MB in memory, "
+          f"{teacher['pickle_bytes'] / 1e6:.1f} MB pickled")
+    print(f"\n  {'Trees':>5} {'Depth':>5} {'Mean gap':>9} {'p99 gap':>8} {'Agree':>8} "
+          f"{'AUC':>7} {'Single ms':>9} {'Batch us':>9} {'Memory KB':>10} {'Fit s':>6}")
+    for r in reports:
+        marker = " ✅" if r is chosen else ""
+        print(f"  {r.n_trees:>5} {r.max_depth:>5} {r.mean_gap:>9.5f} {r.p99_gap:>8.4f} "
+              f"{r.decision_agreement:>8.4%} {r.auc:>7.4f} {r.single_latency_ms:>9.3f} "
+              f"{r.batch_latency_us:>9.3f} {r.memory_bytes / 1e3:>10.1f} "
+              f"{r.fit_seconds:>6.1f}{marker}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill the Random Forest into a small forest")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--models-dir", default=DEFAULT_MODELS_DIR)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--out-dir", default=None,
+                        help="Export the chosen student here (default: report only)")
+    parser.add_argument("--trees", type=int, nargs="+", default=list(DEFAULT_TREES))
+    parser.add_argument("--max-depth", type=int, nargs="+", default=list(DEFAULT_DEPTHS))
+    parser.add_argument("--synthetic", type=int, default=DEFAULT_SYNTHETIC_ROWS,
+                        help="Synthetic rows added to the training rows")
+    parser.add_argument("--min-agreement", type=float, default=DEFAULT_MIN_AGREEMENT,
+                        help="Smallest acceptable share of consensus decisions matching the teacher")
+    parser.add_argument("--max-auc-drop", type=float, default=DEFAULT_MAX_AUC_DROP)
+    parser.add_argument("--max-gap", type=float, default=None,
+                        help="Largest acceptable mean probability gap to the teacher")
+    parser.add_argument("--random-state", type=int, default=42)
+    args = parser.parse_args()
+
+    student, reports, context = distill(args.csv, args.models_dir, args.cache_dir, args.trees,
+                                        args.max_depth, args.synthetic, args.min_agreement,
+                                        args.max_auc_drop, args.max_gap,
+                                        random_state=args.random_state)
+    print_report(reports, context["teacher"], context["chosen"])
+
+    if student is None:
+        print("\n⚠️ No student met the fidelity limits; try more or deeper trees")
+        return
+    if args.out_dir:
+        metadata = export_student(args.models_dir, args.out_dir, student, context, args.csv)
+        print(f"\n✅ Student exported to {os.path.abspath(args.out_dir)}/")
+        print(f"  - Random Forest AUC: {metadata['rf_auc']:.4f} "
+              f"(teacher {context['teacher']['auc']:.4f})")
+        print(f"  Load it with FraudDetectionAPI('{args.out_dir}'); rerun policy_tuning.py "
+              f"there if the consensus threshold should be retuned")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Drift Monitor - Constant-memory feature and score drift detection
+Compares live traffic to the training reference held in scaler.pkl
+
+Features are bucketed in the scaler's standardized space, where the training
+distribution has mean 0 and variance 1 by construction, so the moments need
+no extra reference data. Bucket proportions come from drift_reference.npz
+(written by train_pipeline, or built for existing models with this
+script's CLI). Without it features are compared with a normal
+approximation, which heavy-tailed features such as Amount never match, so
+feature alerts are turned off and reports carry a warning instead.
+
+Overhead budget: update() is a grid lookup + bincount over the already-scaled
+batch, about 35 us per single-row call and 0.35 us/row on 1,000-row batches.
+With the shipped 100-tree forest that is under 0.5% of single-row and 2% of
+batch scoring time; keep it under 5% of scoring time when changing buckets.
+
+Usage:
+    python drift_monitor.py --csv creditcard.csv --models-dir fraud_detection_models
+"""
+
+import argparse
+import math
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+REFERENCE_FILE = "drift_reference.npz"
+
+# Bucket edges in standardized (z) space, shared by all features
+Z_EDGES = np.array([-3.0, -2.0, -1.5, -1.0, -0.5, 0.0, 0.5, 1.0, 1.5, 2.0, 3.0])
+# Bucket edges for fraud probabilities
+SCORE_EDGES = np.linspace(0.0, 1.0, 21)[1:-1]
+SCORE_NAMES = ("lr", "rf")
+
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+# Seconds since the first transaction of the capture: drifts by construction,
+# so it is reported but never alerts
+NO_ALERT_FEATURES = ("Time",)
+PROPORTION_FLOOR = 1e-4
+
+
+@dataclass
+class DriftReport:
+    """Drift scores for one window of scored transactions"""
+    window_rows: int
+    timestamp: str
+    feature_psi: Dict[str, float]
+    feature_ks: Dict[str, float]
+    mean_shift: Dict[str, float]
+    std_ratio: Dict[str, float]
+    score_psi: Dict[str, float]
+    alerts: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+
+def _normal_reference(n_features: int) -> np.ndarray:
+    """Standard-normal bucket proportions for every feature"""
+    cdf = [0.5 * (1 + math.erf(z / math.sqrt(2))) for z in Z_EDGES]
+    probs = np.diff(np.concatenate(([0.0], cdf, [1.0])))
+    return np.tile(probs, (n_features, 1))
+
+
+def _bucket_lookup(edges: np.ndarray, step: float) -> Tuple[float, float, np.ndarray]:
+    """
+    Precompute a grid lookup for edges that all lie on multiples of step
+
+    Bucketing then becomes floor + clip + take, roughly 3x faster than
+    searchsorted on wide batches.
+
+    Returns:
+        (grid origin, step, bucket index for each grid cell incl. both tails)
+    """
+    origin = float(edges[0])
+    cells = int(round((edges[-1] - origin) / step))
+    centers = origin + (np.arange(-1, cells + 1) + 0.5) * step
+    return origin, step, np.searchsorted(edges, centers, side="right")
+
+
+def _bucket_counts(values: np.ndarray, lookup: Tuple[float, float, np.ndarray]) -> np.ndarray:
+    """Count a (rows, columns) array into per-column buckets in one bincount"""
+    origin, step, table = lookup
+    n_buckets = int(table[-1]) + 1
+    cell = (values - origin) * (1.0 / step)
+    np.floor(cell, out=cell)
+    np.clip(cell, -1, len(table) - 2, out=cell)
+    idx = table.take(cell.astype(np.intp) + 1)
+    idx += np.arange(values.shape[1]) * n_buckets
+    return np.bincount(idx.ravel(), minlength=values.shape[1] * n_buckets).reshape(
+        values.shape[1], n_buckets
+    )
+
+
+Z_LOOKUP = _bucket_lookup(Z_EDGES, 0.5)
+SCORE_LOOKUP = _bucket_lookup(SCORE_EDGES, 0.05)
+
+
+def psi(actual: np.ndarray, expected: np.ndarray) -> np.ndarray:
+    """Population stability index per row of bucket proportions"""
+    a = np.maximum(actual, PROPORTION_FLOOR)
+    e = np.maximum(expected, PROPORTION_FLOOR)
+    return np.sum((a - e) * np.log(a / e), axis=-1)
+
+
+def ks_distance(actual: np.ndarray, expected: np.ndarray) -> np.ndarray:
+    """Largest CDF gap at the bucket edges (bucketed Kolmogorov-Smirnov)"""
+    return np.max(np.abs(np.cumsum(actual, axis=-1) - np.cumsum(expected, axis=-1)), axis=-1)
+
+
+def build_reference(models_dir: str, X_scaled: np.ndarray, lr_proba: np.ndarray,
+                    rf_proba: np.ndarray):
+    """
+    Save reference bucket proportions to drift_reference.npz
+
+    Score proportions should come from held-out rows: forest scores on its
+    own training rows are overconfident and would make live traffic look
+    drifted.
+
+    Args:
+        models_dir: Directory containing pickle files
+        X_scaled: Standardized training features
+        lr_proba: LR fraud probabilities on held-out rows
+        rf_proba: RF fraud probabilities on the same held-out rows
+    """
+    X_scaled = np.asarray(X_scaled, dtype=np.float64)
+    scores = np.column_stack([lr_proba, rf_proba])
+    np.savez(
+        os.path.join(models_dir, REFERENCE_FILE),
+        feature_hist=_bucket_counts(X_scaled, Z_LOOKUP) / len(X_scaled),
+        score_hist=_bucket_counts(scores, SCORE_LOOKUP) / len(scores),
+    )
+
+
+class DriftMonitor:
+    """
+    Streaming drift monitor fed by the scoring path
+
+    update() adds a batch to the current window; every check_every rows the
+    window is compared with the training reference, a DriftReport is
+    appended to history and the window counters reset. Memory is fixed:
+    per-feature sums and bucket counts plus a bounded report history.
+    """
+
+    def __init__(self, feature_names: List[str], models_dir: Optional[str] = None,
+                 check_every: int = 10_000, psi_alert: float = PSI_ALERT,
+                 history: int = 100):
+        """
+        Args:
+            feature_names: Ordered model features
+            models_dir: Directory that may hold drift_reference.npz
+            check_every: Transactions per drift window
+            psi_alert: PSI above which a feature or score raises an alert
+            history: Number of past reports kept
+        """
+        self.feature_names = list(feature_names)
+        self.check_every = check_every
+        self.psi_alert = psi_alert
+        self.history = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+        n_features = len(self.feature_names)
+        self.reference_source = "normal approximation"
+        self.ref_features = _normal_reference(n_features)
+        self.ref_scores = None
+        path = os.path.join(models_dir, REFERENCE_FILE) if models_dir else None
+        if path and os.path.exists(path):
+            ref = np.load(path)
+            self.ref_features = ref["feature_hist"]
+            self.ref_scores = ref["score_hist"]
+            self.reference_source = REFERENCE_FILE
+
+        # Feature PSI against the normal approximation is informational only
+        self.feature_alerts = self.reference_source == REFERENCE_FILE
+        self.warnings = []
+        if not self.feature_alerts:
+            self.warnings.append(
+                f"No {REFERENCE_FILE} in {models_dir}: feature PSI is measured against a normal "
+                f"approximation and does not alert; build the reference with "
+                f"'python drift_monitor.py --csv <training csv>'")
+            print(f"⚠️ {self.warnings[-1]}")
+
+        self._reset_window()
+
+    def _reset_window(self):
+        n_features = len(self.feature_names)
+        self.rows = 0
+        self.sum = np.zeros(n_features)
+        self.sumsq = np.zeros(n_features)
+        self.feature_counts = np.zeros((n_features, len(Z_EDGES) + 1), dtype=np.int64)
+        self.score_counts = np.zeros((len(SCORE_NAMES), len(SCORE_EDGES) + 1), dtype=np.int64)
+
+    def update(self, X_scaled: np.ndarray, lr_proba, rf_proba) -> Optional[DriftReport]:
+        """
+        Add one scored batch
+
+        Args:
+            X_scaled: Standardized features, shape (rows, features)
+            lr_proba: LR fraud probabilities for the rows
+            rf_proba: RF fraud probabilities for the rows
+
+        Returns:
+            A DriftReport when this batch completed a window, else None
+        """
+        X_scaled = np.atleast_2d(X_scaled)
+        scores = np.column_stack([np.atleast_1d(lr_proba), np.atleast_1d(rf_proba)])
+        feature_counts = _bucket_counts(X_scaled, Z_LOOKUP)
+        score_counts = _bucket_counts(scores, SCORE_LOOKUP)
+
+        with self._lock:
+            self.rows += len(X_scaled)
+            self.sum += X_scaled.sum(axis=0)
+            self.sumsq += np.square(X_scaled).sum(axis=0)
+            self.feature_counts += feature_counts
+            self.score_counts += score_counts
+            if self.rows < self.check_every:
+                return None
+            report = self._check()
+            self._reset_window()
+            return report
+
+    def _check(self) -> DriftReport:
+        """Compare the current window with the reference"""
+        n = self.rows
+        actual = self.feature_counts / n
+        feature_psi = psi(actual, self.ref_features)
+        feature_ks = ks_distance(actual, self.ref_features)
+        mean = self.sum / n
+        std = np.sqrt(np.maximum(self.sumsq / n - mean ** 2, 0.0))
+
+        score_psi = {}
+        if self.ref_scores is not None:
+            values = psi(self.score_counts / n, self.ref_scores)
+            score_psi = dict(zip(SCORE_NAMES, values.tolist()))
+
+        alerts = [f"{name}: PSI {value:.3f}"
+                  for name, value in zip(self.feature_names, feature_psi)
+                  if self.feature_alerts and value > self.psi_alert
+                  and name not in NO_ALERT_FEATURES]
+        alerts += [f"{name} score: PSI {value:.3f}"
+                   for name, value in score_psi.items() if value > self.psi_alert]
+
+        report = DriftReport(
+            window_rows=n,
+            timestamp=time.strftime("%Y-%m-%d %H:%M:%S"),
+            feature_psi=dict(zip(self.feature_names, feature_psi.tolist())),
+            feature_ks=dict(zip(self.feature_names, feature_ks.tolist())),
+            mean_shift=dict(zip(self.feature_names, mean.tolist())),
+            std_ratio=dict(zip(self.feature_names, std.tolist())),
+            score_psi=score_psi,
+            alerts=alerts,
+            warnings=list(self.warnings),
+        )
+        self.history.append(report)
+        return report
+
+    def latest(self) -> Optional[DriftReport]:
+        """Return the most recent report, if any window has completed"""
+        return self.history[-1] if self.history else None
+
+
+def main():
+    from model_store import ModelStore
+    from policy_tuning import score_file
+    from train_pipeline import DEFAULT_CACHE_DIR, DEFAULT_CSV, DEFAULT_MODELS_DIR, load_dataset
+
+    parser = argparse.ArgumentParser(description="Build drift_reference.npz for existing models")
+    parser.add_argument("--csv", default=DEFAULT_CSV, help="The CSV the models were trained on")
+    parser.add_argument("--models-dir", default=DEFAULT_MODELS_DIR)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--random-state", type=int, default=42)
+    args = parser.parse_args()
+
+    # Features from every row; scores only from the rows held out from training
+    ds = load_dataset(args.csv, args.cache_dir)
+    X_scaled = ModelStore(args.models_dir).scaler.transform(ds.X)
+    lr_proba, rf_proba, _ = score_file(args.csv, args.models_dir, args.cache_dir,
+                                       test_split=True, test_size=args.test_size,
+                                       random_state=args.random_state)
+    build_reference(args.models_dir, X_scaled, lr_proba, rf_proba)
+    print(f"✅ Wrote {os.path.join(args.models_dir, REFERENCE_FILE)} "
+          f"({len(X_scaled):,} feature rows, {len(lr_proba):,} held-out score rows)")
+
+
+if __name__ == "__main__":
+    main()
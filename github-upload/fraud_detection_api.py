@@ -1,14 +1,72 @@
 """
 Fraud Detection API - For programmatic model access
 Can be used standalone or integrated with REST frameworks (Flask, FastAPI)
+
+One instance may be shared by the threads of a threaded server: scoring,
+explanation and similarity methods can run concurrently. Only
+load_models() must not overlap with them.
 """
 
+import copy
 import pickle
+import threading
+import time
 import numpy as np
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple, Union
-from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple, Union
+from dataclasses import asdict, dataclass
+
+from drift_monitor import DriftMonitor
+from input_schema import DEFAULT_CHUNK_ROWS, InputSchema
+from live_metrics import LiveMetrics
+from model_store import LIGHT_ARTIFACTS, ModelStore, check_artifacts, load_manifest
+from velocity_features import AMOUNT_COLUMN, TIME_COLUMN, VelocityTracker
+
+# Consensus = lr_weight * LR probability + (1 - lr_weight) * RF probability,
+# flagged as fraud when it exceeds threshold. Tuned values are stored in
+# metadata["consensus_policy"] by policy_tuning.py
+DEFAULT_CONSENSUS_POLICY = {"lr_weight": 0.5, "threshold": 0.5}
+
+# score_arrays splits batches into at most one block per thread, but never
+# into blocks smaller than this
+MIN_BLOCK_ROWS = 2048
+
+
+def consensus_policy(metadata: Dict = None) -> Dict:
+    """
+    Return the consensus policy from model metadata, or the default
+    
+    Args:
+        metadata: Model metadata dictionary (may be None)
+    
+    Returns:
+        Dict with lr_weight and threshold
+    """
+    policy = dict(DEFAULT_CONSENSUS_POLICY)
+    if metadata:
+        policy.update(metadata.get("consensus_policy") or {})
+    return policy
+
+
+def apply_consensus(lr_proba, rf_proba, policy: Dict = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Blend both models' fraud probabilities and apply the decision threshold
+    
+    Args:
+        lr_proba: Logistic Regression fraud probabilities (scalar or array)
+        rf_proba: Random Forest fraud probabilities (scalar or array)
+        policy: Consensus policy (default: DEFAULT_CONSENSUS_POLICY)
+    
+    Returns:
+        Tuple of (consensus scores, 0/1 consensus predictions)
+    """
+    policy = policy or DEFAULT_CONSENSUS_POLICY
+    w = policy["lr_weight"]
+    scores = w * np.asarray(lr_proba) + (1 - w) * np.asarray(rf_proba)
+    return scores, (scores > policy["threshold"]).astype(int)
+
 
 @dataclass
 class PredictionResult:
@@ -21,6 +79,7 @@ class PredictionResult:
     consensus_prediction: int
     consensus_score: float
     timestamp: str = ""
+    velocity: Dict[str, float] = None
 
 class FraudDetectionAPI:
     """
@@ -28,48 +87,126 @@ class FraudDetectionAPI:
     Handles model loading, prediction, and result formatting
     """
     
-    def __init__(self, models_dir: str = "fraud_detection_models"):
+    def __init__(self, models_dir: str = "fraud_detection_models", lazy: bool = False,
+                 verify: bool = True, drift_check_every: int = 0,
+                 velocity_windows: Sequence[int] = None, audit_dir: str = None,
+                 threads: int = 1, live_metrics: Union[str, LiveMetrics] = None):
         """
         Initialize API with model path
         
         Args:
             models_dir: Directory containing pickle files
+            lazy: Load the Random Forest in a background thread instead of
+                blocking; it is awaited on first use
+            verify: Check artifacts against manifest.json before loading
+            drift_check_every: Compare live features and scores with the
+                training reference every N scored transactions (0 = off)
+            velocity_windows: Sliding windows in seconds for per-entity
+                transaction counts and amount sums (None = off)
+            audit_dir: Record every prediction in an append-only audit log
+                in this directory (None = off)
+            threads: Default worker threads for score_arrays on large batches
+            live_metrics: Keep time-bucketed throughput, flag rate, score,
+                latency and disagreement aggregates, in memory (a LiveMetrics)
+                or in a file the app's Live Operations page reads (a path)
         """
         self.models_dir = Path(models_dir)
-        self.lr_model = None
-        self.rf_model = None
-        self.scaler = None
-        self.metadata = None
-        self.feature_names = None
+        self.lazy = lazy
+        self.verify = verify
+        self.manifest = None
+        self.failed_checks = []
+        self.store = ModelStore(models_dir)
+        self.drift_check_every = drift_check_every
+        self.drift = None
+        self.velocity = VelocityTracker(velocity_windows) if velocity_windows else None
+        self._explainer = None
+        self._fraud_index = None
+        self.audit_dir = audit_dir
+        self.audit = None
+        self.schema = None
+        self.threads = threads
+        if isinstance(live_metrics, (str, Path)):
+            live_metrics = LiveMetrics(str(live_metrics))
+        self.live = live_metrics
+        self._pools = {}
+        self._serial_rf = None
+        self._lock = threading.Lock()  # velocity tracker and lazily built helpers
         
         self.load_models()
     
+    def _artifact(self, name: str):
+        """
+        Return a loaded artifact, or None if the artifact checks failed
+        
+        Unpickling errors (including those of a background load) are raised
+        here rather than surfacing later as attribute errors on None.
+        """
+        if self.failed_checks:
+            return None
+        return self.store.get(name)
+    
+    @property
+    def lr_model(self):
+        return self._artifact("lr_model")
+    
+    @property
+    def rf_model(self):
+        return self._artifact("rf_model")
+    
+    @property
+    def scaler(self):
+        return self._artifact("scaler")
+    
+    @property
+    def metadata(self):
+        return self._artifact("metadata")
+    
+    @property
+    def feature_names(self):
+        return self._artifact("feature_names")
+    
     def load_models(self) -> bool:
         """
         Load all required model files
         
+        With lazy=True only the small artifacts are loaded here and the
+        Random Forest is unpickled in the background.
+        
         Returns:
-            bool: True if all models loaded successfully
+            bool: True if all models loaded (or were scheduled) successfully
         """
+        if self.verify:
+            self.failed_checks = [
+                check for check in check_artifacts(str(self.models_dir)) if not check.ok
+            ]
+            if self.failed_checks:
+                for check in self.failed_checks:
+                    print(f"❌ Artifact check failed: {check.name} ({check.message})")
+                return False
+        
         try:
-            # Load models
-            with open(self.models_dir / "logistic_regression_model.pkl", "rb") as f:
-                self.lr_model = pickle.load(f)
+            self.manifest = load_manifest(str(self.models_dir))
+            self._explainer = None
+            self._fraud_index = None
+            self._serial_rf = None
             
-            with open(self.models_dir / "random_forest_model.pkl", "rb") as f:
-                self.rf_model = pickle.load(f)
+            for name in LIGHT_ARTIFACTS:
+                self.store.get(name)
+            self.schema = InputSchema(self.feature_names)
             
-            # Load scaler
-            with open(self.models_dir / "scaler.pkl", "rb") as f:
-                self.scaler = pickle.load(f)
+            if self.lazy:
+                self.store.preload(["rf_model"], background=True)
+            else:
+                self.store.get("rf_model")
             
-            # Load metadata
-            with open(self.models_dir / "model_metadata.pkl", "rb") as f:
-                self.metadata = pickle.load(f)
+            if self.audit_dir and self.audit is None:
+                from audit_log import AuditLog
+                self.audit = AuditLog(self.audit_dir, self.feature_names,
+                                      self.manifest.get("model_version") if self.manifest else None)
             
-            # Load feature names
-            with open(self.models_dir / "feature_names.pkl", "rb") as f:
-                self.feature_names = pickle.load(f)
+            if self.drift_check_every:
+                self.drift = DriftMonitor(self.feature_names, str(self.models_dir),
+                                          self.drift_check_every)
             
             print("✅ All models loaded successfully")
             return True
@@ -79,22 +216,30 @@ class FraudDetectionAPI:
             return False
     
     def predict_single(self, features: np.ndarray, 
-                      transaction_id: str = "TX001") -> PredictionResult:
+                      transaction_id: str = "TX001", entity_id=None) -> PredictionResult:
         """
         Predict fraud for a single transaction
         
         Args:
             features: 1D array of transaction features (30 features)
             transaction_id: Unique transaction identifier
+            entity_id: Card or account id keying the velocity windows
         
         Returns:
             PredictionResult: Structured prediction result
+        
+        Raises:
+            ValueError: If the features are not one valid transaction
         """
         if self.lr_model is None or self.rf_model is None:
             raise ValueError("Models not loaded. Call load_models() first.")
         
-        # Ensure correct shape
-        features = np.array(features).reshape(1, -1)
+        started = time.perf_counter()
+        
+        # Validate count, dtype and ranges; returns shape (1, 30)
+        features = self.schema.check(features)
+        if len(features) != 1:
+            raise ValueError(f"Expected one transaction, got {len(features)}")
         
         # Scale features
         features_scaled = self.scaler.transform(features)
@@ -107,9 +252,21 @@ class FraudDetectionAPI:
         rf_pred = self.rf_model.predict(features_scaled)[0]
         rf_proba = self.rf_model.predict_proba(features_scaled)[0][1]
         
-        # Consensus prediction (average of probabilities)
-        consensus_score = (lr_proba + rf_proba) / 2
-        consensus_pred = 1 if consensus_score > 0.5 else 0
+        # Consensus prediction (weighted blend of probabilities)
+        consensus_score, consensus_pred = apply_consensus(
+            lr_proba, rf_proba, consensus_policy(self.metadata)
+        )
+        
+        self._record(features, features_scaled, lr_proba, rf_proba, consensus_score,
+                     consensus_pred, [transaction_id], started)
+        
+        velocity = None
+        if self.velocity is not None:
+            names = self.feature_names
+            with self._lock:
+                velocity = self.velocity.update(features[0, names.index(TIME_COLUMN)],
+                                                features[0, names.index(AMOUNT_COLUMN)],
+                                                entity_id)
         
         return PredictionResult(
             transaction_id=transaction_id,
@@ -118,38 +275,188 @@ class FraudDetectionAPI:
             rf_prediction=int(rf_pred),
             rf_probability=float(rf_proba),
             consensus_prediction=int(consensus_pred),
-            consensus_score=float(consensus_score)
+            consensus_score=float(consensus_score),
+            velocity=velocity
         )
     
+    def score_arrays(self, features: np.ndarray, transaction_ids: List[str] = None,
+                     out: np.ndarray = None, threads: int = None) -> np.ndarray:
+        """
+        Vectorized scoring of a feature matrix without per-row result objects
+        
+        With threads > 1 a large batch is cut into contiguous row blocks that
+        worker threads score in parallel; scikit-learn's tree traversal and
+        the BLAS/NumPy kernels release the GIL. Every block writes straight
+        into its rows of out, so nothing is concatenated afterwards.
+        
+        Args:
+            features: Array of shape (rows, 30), float32 or float64
+            transaction_ids: Optional ids for the audit log
+            out: Optional preallocated (rows, 4) float64 array to fill
+            threads: Worker threads (default: the instance's threads setting)
+        
+        Returns:
+            (rows, 4) array: LR probability, RF probability, consensus
+            score, consensus prediction (0/1)
+        """
+        if self.lr_model is None or self.rf_model is None:
+            raise ValueError("Models not loaded. Call load_models() first.")
+        
+        started = time.perf_counter()
+        return self._score_checked(self.schema.check(features), transaction_ids, out, threads,
+                                   started)
+    
+    def _score_checked(self, features: np.ndarray, transaction_ids: List[str] = None,
+                       out: np.ndarray = None, threads: int = None,
+                       started: float = None) -> np.ndarray:
+        """score_arrays for features that already passed schema.check"""
+        if started is None:
+            started = time.perf_counter()
+        n = len(features)
+        if out is None:
+            out = np.empty((n, 4))
+        policy = consensus_policy(self.metadata)
+        # Scaled rows are only kept when the drift monitor needs them
+        features_scaled = np.empty(features.shape) if self.drift is not None else None
+        
+        threads = self.threads if threads is None else threads
+        n_blocks = max(1, min(threads, n // MIN_BLOCK_ROWS))
+        if n_blocks == 1:
+            self._score_block(features, out, policy, self.rf_model, features_scaled)
+        else:
+            rf_model = self._serial_forest()
+            bounds = np.linspace(0, n, n_blocks + 1).astype(int)
+            futures = [
+                self._pool(n_blocks).submit(
+                    self._score_block, features[a:b], out[a:b], policy, rf_model,
+                    None if features_scaled is None else features_scaled[a:b])
+                for a, b in zip(bounds[:-1], bounds[1:])
+            ]
+            for future in futures:
+                future.result()
+        
+        if transaction_ids is None and self.audit is not None:
+            transaction_ids = [f"TX{i+1:05d}" for i in range(n)]
+        self._record(features, features_scaled, out[:, 0], out[:, 1], out[:, 2], out[:, 3],
+                     transaction_ids, started)
+        return out
+    
+    def _score_block(self, features, out, policy, rf_model, features_scaled=None):
+        """Score rows into views of the caller's output arrays"""
+        scaled = self.scaler.transform(features)
+        if features_scaled is not None:
+            features_scaled[:] = scaled
+        out[:, 0] = self.lr_model.predict_proba(scaled)[:, 1]
+        out[:, 1] = rf_model.predict_proba(scaled)[:, 1]
+        out[:, 2], out[:, 3] = apply_consensus(out[:, 0], out[:, 1], policy)
+    
+    def _serial_forest(self):
+        """
+        The Random Forest set to predict on the calling thread
+        
+        A forest saved with n_jobs=-1 already fans out over all cores per
+        call; inside block workers that would oversubscribe them. The copy
+        is shallow, so the fitted trees are shared, not duplicated.
+        """
+        with self._lock:
+            if self._serial_rf is None:
+                model = copy.copy(self.rf_model)
+                target = model
+                if getattr(model, "negative_rate", None) is not None:
+                    target = model.estimator = copy.copy(model.estimator)
+                if hasattr(target, "n_jobs"):
+                    target.n_jobs = 1
+                self._serial_rf = model
+            return self._serial_rf
+    
+    def _pool(self, threads: int) -> ThreadPoolExecutor:
+        """Thread pool with the given number of workers, created once"""
+        with self._lock:
+            if threads not in self._pools:
+                self._pools[threads] = ThreadPoolExecutor(threads,
+                                                          thread_name_prefix="score-block")
+            return self._pools[threads]
+    
+    def _record(self, features, features_scaled, lr_proba, rf_proba, consensus_score,
+                consensus_pred, transaction_ids, started=None):
+        """Feed scored rows to live metrics, the audit log and drift monitor, if enabled"""
+        if self.live is not None and started is not None:
+            self.live.record(lr_proba, rf_proba, consensus_score, consensus_pred,
+                             time.perf_counter() - started)
+        
+        if self.audit is not None:
+            self.audit.append(features, lr_proba, rf_proba, consensus_score, consensus_pred,
+                              transaction_ids)
+        
+        if self.drift is not None:
+            report = self.drift.update(features_scaled, lr_proba, rf_proba)
+            if report and report.alerts:
+                print(f"⚠️ Drift detected over {report.window_rows:,} transactions: "
+                      f"{', '.join(report.alerts)}")
+    
     def predict_batch(self, features_list: List[List[float]], 
-                     transaction_ids: List[str] = None) -> List[PredictionResult]:
+                     transaction_ids: List[str] = None,
+                     entity_ids: Sequence = None) -> List[PredictionResult]:
         """
         Predict fraud for multiple transactions
         
+        Scored in one vectorized pass (see score_arrays); large batches use
+        the instance's worker threads.
+        
         Args:
             features_list: List of feature arrays
             transaction_ids: Optional list of transaction IDs
+            entity_ids: Optional card or account id per transaction keying
+                the velocity windows (rows are added in list order)
         
         Returns:
             List of PredictionResult objects
         """
-        results = []
+        if not len(features_list):
+            return []
+        if self.lr_model is None or self.rf_model is None:
+            raise ValueError("Models not loaded. Call load_models() first.")
+        features = self.schema.check(np.asarray(features_list))
+        ids = (list(transaction_ids) if transaction_ids
+               else [f"TX{idx+1:05d}" for idx in range(len(features))])
+        scores = self._score_checked(features, ids)
         
-        for idx, features in enumerate(features_list):
-            tx_id = transaction_ids[idx] if transaction_ids else f"TX{idx+1:05d}"
-            result = self.predict_single(features, tx_id)
-            results.append(result)
+        velocities = [None] * len(features)
+        if self.velocity is not None:
+            names = self.feature_names
+            times = features[:, names.index(TIME_COLUMN)].tolist()
+            amounts = features[:, names.index(AMOUNT_COLUMN)].tolist()
+            entities = list(entity_ids) if entity_ids is not None else [None] * len(times)
+            if len(entities) != len(times):
+                raise ValueError(f"Got {len(entities)} entity ids for {len(times)} transactions")
+            with self._lock:
+                velocities = [self.velocity.update(t, a, e)
+                              for t, a, e in zip(times, amounts, entities)]
         
-        return results
+        return [
+            PredictionResult(
+                transaction_id=tx_id,
+                lr_prediction=int(lr_proba > 0.5),
+                lr_probability=float(lr_proba),
+                rf_prediction=int(rf_proba > 0.5),
+                rf_probability=float(rf_proba),
+                consensus_prediction=int(consensus_pred),
+                consensus_score=float(consensus_score),
+                velocity=velocity
+            )
+            for tx_id, (lr_proba, rf_proba, consensus_score, consensus_pred), velocity
+            in zip(ids, scores.tolist(), velocities)
+        ]
     
     def predict_from_dict(self, transaction_dict: Dict[str, float], 
-                         transaction_id: str = "TX001") -> PredictionResult:
+                         transaction_id: str = "TX001", entity_id=None) -> PredictionResult:
         """
         Predict fraud from transaction dictionary
         
         Args:
             transaction_dict: Dict with feature names as keys
             transaction_id: Transaction identifier
+            entity_id: Card or account id keying the velocity windows
         
         Returns:
             PredictionResult object
@@ -159,7 +466,40 @@ class FraudDetectionAPI:
         for feature_name in self.feature_names:
             features.append(transaction_dict.get(feature_name, 0.0))
         
-        return self.predict_single(np.array(features), transaction_id)
+        return self.predict_single(np.array(features), transaction_id, entity_id)
+    
+    def score_file(self, path: str, reject_path: str = None,
+                   chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        """
+        Score a CSV by header, chunk by chunk, setting invalid rows aside
+        
+        Args:
+            path: CSV with a header naming the feature columns (any order,
+                extra columns ignored)
+            reject_path: Optional CSV receiving rejected rows with reasons
+            chunk_rows: Rows parsed and validated at a time
+        
+        Returns:
+            DataFrame with line, lr_probability, rf_probability,
+            consensus_score and consensus_prediction per valid row
+        """
+        import pandas as pd
+        
+        parts = []
+        for chunk in self.schema.iter_file(path, chunk_rows, reject_path):
+            if len(chunk.X):
+                scores = self.score_arrays(chunk.X, [str(line) for line in chunk.lines])
+                parts.append(pd.DataFrame({
+                    "line": chunk.lines,
+                    "lr_probability": scores[:, 0],
+                    "rf_probability": scores[:, 1],
+                    "consensus_score": scores[:, 2],
+                    "consensus_prediction": scores[:, 3].astype(int),
+                }))
+        if not parts:
+            return pd.DataFrame(columns=["line", "lr_probability", "rf_probability",
+                                         "consensus_score", "consensus_prediction"])
+        return pd.concat(parts, ignore_index=True)
     
     def get_model_info(self) -> Dict:
         """
@@ -176,9 +516,108 @@ class FraudDetectionAPI:
             "train_samples": self.metadata.get("train_samples"),
             "test_samples": self.metadata.get("test_samples"),
             "num_features": self.metadata.get("num_features"),
-            "fraud_rate": self.metadata.get("train_fraud_rate")
+            "fraud_rate": self.metadata.get("train_fraud_rate"),
+            "model_version": self.manifest.get("model_version") if self.manifest else None,
+            "consensus_policy": consensus_policy(self.metadata)
         }
     
+    def explain(self, features_list: List[List[float]], k: int = 3) -> List[Dict[str, List]]:
+        """
+        Top features pushing each transaction toward fraud, for both models
+        
+        LR contributions are in log-odds, RF contributions in probability;
+        see explanations.py.
+        
+        Args:
+            features_list: Feature arrays (30 features each)
+            k: Features per model and transaction
+        
+        Returns:
+            One {"lr": [(feature, contribution), ...], "rf": [...]} per transaction
+        """
+        if self.lr_model is None or self.rf_model is None:
+            raise ValueError("Models not loaded. Call load_models() first.")
+        with self._lock:
+            if self._explainer is None:
+                from explanations import Explainer
+                self._explainer = Explainer(self.lr_model, self.rf_model, self.feature_names)
+        
+        features = np.atleast_2d(np.asarray(features_list, dtype=float))
+        features_scaled = self.scaler.transform(features)
+        return self._explainer.top_reasons(features_scaled, k)
+    
+    def similar_frauds(self, features: np.ndarray, k: int = 5) -> List[Dict]:
+        """
+        Find the nearest confirmed frauds in the scaled feature space
+        
+        Args:
+            features: 1D array of transaction features (30 features)
+            k: Number of neighbours
+        
+        Returns:
+            List of dicts (distance, source, row, time, amount), nearest
+            first; empty if no index has been built (see fraud_index.py)
+        """
+        with self._lock:
+            if self._fraud_index is None:
+                from fraud_index import FraudIndex
+                try:
+                    self._fraud_index = FraudIndex.open(str(self.models_dir))
+                except (FileNotFoundError, ValueError) as e:
+                    # Remembered until load_models(); build the index and reload
+                    print(f"⚠️ Fraud index unavailable: {e}")
+                    self._fraud_index = False
+            if self._fraud_index is False:
+                return []
+        
+        features_scaled = self.scaler.transform(np.array(features).reshape(1, -1))
+        return [asdict(n) for n in self._fraud_index.query(features_scaled[0], k)]
+    
+    def drift_report(self) -> Dict:
+        """
+        Get the latest drift report
+        
+        Returns:
+            Dict with per-feature PSI/KS, mean shift, std ratio, score PSI
+            and alerts, or an empty dict if no window has completed
+        """
+        report = self.drift.latest() if self.drift is not None else None
+        return asdict(report) if report else {}
+    
+    def evaluate_file(self, path: str, shards: int = 1,
+                      refresh_metadata: bool = False) -> Dict[str, Dict[str, float]]:
+        """
+        Evaluate the loaded models on a labeled CSV in constant memory
+        
+        Args:
+            path: Labeled CSV with the feature columns and a Class column
+            shards: Worker processes scoring line-aligned parts of the file
+            refresh_metadata: Store the LR/RF metrics in model_metadata.pkl
+        
+        Returns:
+            Dict of metrics per scorer (lr, rf, consensus)
+        """
+        import streaming_eval
+        
+        acc = streaming_eval.evaluate_file(path, str(self.models_dir), shards)
+        if refresh_metadata:
+            streaming_eval.refresh_metadata(acc, str(self.models_dir), Path(path).name)
+            self.store = ModelStore(str(self.models_dir))
+            self.load_models()
+        return acc.compute()
+    
+    def close(self):
+        """Flush and close the audit log, if one is open, and stop worker threads"""
+        if self.audit is not None:
+            self.audit.close()
+            self.audit = None
+        if self.live is not None:
+            self.live.flush()
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown()
+    
     def result_to_dict(self, result: PredictionResult) -> Dict:
         """
         Convert PredictionResult to dictionary
@@ -189,7 +628,7 @@ class FraudDetectionAPI:
         Returns:
             Dictionary representation
         """
-        return {
+        output = {
             "transaction_id": result.transaction_id,
             "lr_prediction": result.lr_prediction,
             "lr_probability": result.lr_probability,
@@ -199,6 +638,9 @@ class FraudDetectionAPI:
             "consensus_score": result.consensus_score,
             "is_fraud": result.consensus_prediction == 1
         }
+        if result.velocity is not None:
+            output["velocity"] = result.velocity
+        return output
     
     def result_to_json(self, result: PredictionResult) -> str:
         """
@@ -219,7 +661,7 @@ if __name__ == "__main__":
     print("🔒 Fraud Detection API - Example Usage\n")
     
     # Initialize API
-    api = FraudDetectionAPI("models")
+    api = FraudDetectionAPI("fraud_detection_models")
     
     # Get model info
     print("📊 Model Information:")
@@ -229,9 +671,14 @@ if __name__ == "__main__":
     
     print("\n" + "="*50 + "\n")
     
+    # Synthetic transactions from the training statistics, with Time and
+    # Amount kept non-negative so they pass the input schema
+    from load_test import TrafficGenerator
+    generator = TrafficGenerator(api.scaler, api.feature_names, seed=0)
+    
     # Example 1: Single prediction with array
     print("Example 1: Single Transaction Prediction")
-    sample_features = np.random.randn(30)
+    sample_features = generator.sample(1)[0]
     result = api.predict_single(sample_features, "TX12345")
     print(api.result_to_json(result))
     
@@ -239,7 +686,7 @@ if __name__ == "__main__":
     
     # Example 2: Batch prediction
     print("Example 2: Batch Prediction (5 transactions)")
-    batch_features = [np.random.randn(30) for _ in range(5)]
+    batch_features = list(generator.sample(5))
     batch_results = api.predict_batch(
         batch_features,
         transaction_ids=[f"TX{i}" for i in range(1, 6)]
@@ -3,16 +3,26 @@ Credit Card Fraud Detection Deployment App
 A Streamlit-based web application for real-time fraud detection
 """
 
+import time
+
+_APP_START = time.perf_counter()
+
 import streamlit as st
-import pickle
-import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime
 import json
 import os
 
+from model_store import ModelStore, check_artifacts
+
+# pandas, numpy and plotly are imported inside the pages that use them so the
+# dashboard can paint before those (and the Random Forest) have loaded
+_IMPORT_TIME = time.perf_counter() - _APP_START
+
+MODELS_DIR = "fraud_detection_models"
+# Written by a scorer started with --live-metrics (load_test.py, stream_score.py)
+LIVE_METRICS_FILE = os.environ.get("FRAUD_LIVE_METRICS", "live_metrics.bin")
+LIVE_REFRESH_SECONDS = 5
+
 # Page configuration
 st.set_page_config(
     page_title="Fraud Detection System",
@@ -57,38 +67,57 @@ st.markdown("""
 
 # Load models and scaler
 @st.cache_resource
-def load_models():
-    """Load pickled models and scaler"""
+def load_model_store():
+    """Verify artifacts, load metadata and start unpickling the models in the background"""
+    store = ModelStore(MODELS_DIR)
+    failed = [check for check in check_artifacts(MODELS_DIR) if not check.ok]
+    if failed:
+        return store, failed
     try:
-        models_dir = "fraud_detection_models"
-        
-        # Load models
-        with open(f"{models_dir}/logistic_regression_model.pkl", "rb") as f:
-            lr_model = pickle.load(f)
-        
-        with open(f"{models_dir}/random_forest_model.pkl", "rb") as f:
-            rf_model = pickle.load(f)
-        
-        with open(f"{models_dir}/scaler.pkl", "rb") as f:
-            scaler = pickle.load(f)
-        
-        # Load metadata
-        with open(f"{models_dir}/model_metadata.pkl", "rb") as f:
-            metadata = pickle.load(f)
-        
-        # Load feature names
-        with open(f"{models_dir}/feature_names.pkl", "rb") as f:
-            feature_names = pickle.load(f)
-        
-        return lr_model, rf_model, scaler, metadata, feature_names
-    
+        # Metadata is loaded first so numpy is fully imported before the
+        # loader thread starts; concurrent first imports of numpy fail
+        store.get("metadata")
+    except Exception:
+        return store, failed
+    store.preload(["scaler", "lr_model", "rf_model"], background=True)
+    return store, failed
+
+def require_models():
+    """Return (lr_model, rf_model, scaler), waiting for the background load"""
+    try:
+        with st.spinner("Loading models..."):
+            return store.lr_model, store.rf_model, store.scaler
     except Exception as e:
         st.error(f"Error loading models: {str(e)}")
         st.info("Please ensure pickle files are in the 'fraud_detection_models' directory")
-        return None, None, None, None, None
+        st.stop()
 
-# Load models
-lr_model, rf_model, scaler, metadata, feature_names = load_models()
+@st.cache_resource
+def load_explainer():
+    """Build the per-leaf contribution tables once per model load"""
+    from explanations import Explainer
+    lr_model, rf_model, _ = require_models()
+    return Explainer(lr_model, rf_model, store.feature_names)
+
+@st.cache_resource
+def load_fraud_index():
+    """Open the confirmed-fraud similarity index, or None if not built"""
+    from fraud_index import FraudIndex
+    try:
+        return FraudIndex.open(MODELS_DIR)
+    except (FileNotFoundError, ValueError):
+        return None
+
+# Load metadata only; the dashboard renders from it while the models load
+store, failed_checks = load_model_store()
+try:
+    if failed_checks:
+        raise ValueError(", ".join(f"{check.name}: {check.message}" for check in failed_checks))
+    metadata = store.metadata
+except Exception as e:
+    st.error(f"Error loading models: {str(e)}")
+    st.info("Please ensure pickle files are in the 'fraud_detection_models' directory")
+    metadata = None
 
 # Header
 st.title("🔒 Credit Card Fraud Detection System")
@@ -98,11 +127,16 @@ st.markdown("---")
 st.sidebar.title("Navigation")
 app_mode = st.sidebar.radio(
     "Select Mode",
-    ["🏠 Dashboard", "🔍 Single Transaction", "📊 Batch Prediction", "📈 Model Performance"],
+    ["🏠 Dashboard", "📡 Live Operations", "🔍 Single Transaction", "📊 Batch Prediction",
+     "📈 Model Performance"],
     help="Choose between different operation modes"
 )
 
-if lr_model is None:
+# First paint: title and navigation are on screen before any page is built
+_first_paint = time.perf_counter() - _APP_START
+st.session_state.setdefault("first_paint_s", _first_paint)
+
+if metadata is None:
     st.error("Models not loaded. Please check the models directory.")
     st.stop()
 
@@ -160,12 +194,104 @@ if app_mode == "🏠 Dashboard":
         - Training Samples: {metadata['train_samples']:,}
         - Test Samples: {metadata['test_samples']:,}
         - Features: {metadata['num_features']}
-        - Trees: 100
+        - Trees: {metadata.get('n_estimators', 100)}
         - Model Size: Ensemble
         """)
 
+# ==================== LIVE OPERATIONS PAGE ====================
+elif app_mode == "📡 Live Operations":
+    import pandas as pd
+    import plotly.graph_objects as go
+    from live_metrics import LiveMetrics, SCORE_BINS
+    
+    st.header("Live Operations")
+    
+    windows = {"15 minutes": 900, "1 hour": 3600, "6 hours": 21600}
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        window = st.selectbox("Window", list(windows), index=1)
+    with col2:
+        st.button("🔄 Refresh")
+    with col3:
+        st.checkbox(f"Auto-refresh ({LIVE_REFRESH_SECONDS}s)", key="live_auto_refresh")
+    
+    # Reads one row per bucket in the window, however much traffic it held
+    try:
+        snap = LiveMetrics(LIVE_METRICS_FILE, readonly=True).snapshot(windows[window])
+    except ValueError as e:
+        snap = None
+        st.error(str(e))
+    except FileNotFoundError:
+        snap = None
+        st.info(f"No live metrics at '{LIVE_METRICS_FILE}' yet. Start a scorer with "
+                f"`--live-metrics {LIVE_METRICS_FILE}`, e.g. "
+                f"`python load_test.py --rate 200 --duration 600 --live-metrics {LIVE_METRICS_FILE}`, "
+                f"or point FRAUD_LIVE_METRICS at its file.")
+    
+    if snap is not None and not snap.transactions.sum():
+        st.warning(f"No transactions scored in the last {window}.")
+    elif snap is not None:
+        recent = snap.recent(60)
+        total = int(snap.transactions.sum())
+        latency = snap.latency_ms()
+    
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("⚡ Throughput (1 min)", f"{recent['throughput']:,.1f} tx/s")
+        with col2:
+            st.metric("🚨 Flag Rate (1 min)", f"{recent['flag_rate']:.2%}"
+                      if recent["transactions"] else "–")
+        with col3:
+            st.metric("🤝 LR/RF Disagreement (1 min)", f"{recent['disagreement_rate']:.2%}"
+                      if recent["transactions"] else "–")
+        with col4:
+            st.metric("⏱️ p99 Call Latency", f"{latency[99]:.2f} ms")
+    
+        st.caption(f"{total:,} transactions in {int(snap.calls.sum()):,} scoring calls over the "
+                   f"last {window}, {snap.bucket_seconds}s buckets")
+        times = pd.to_datetime(snap.times, unit="s")
+    
+        fig = go.Figure(go.Scatter(x=times, y=snap.throughput, mode="lines", name="Transactions/s"))
+        fig.update_layout(title="Throughput", yaxis_title="Transactions/s",
+                          template="plotly_white", height=300)
+        st.plotly_chart(fig, use_container_width=True)
+    
+        fig = go.Figure([
+            go.Scatter(x=times, y=snap.flag_rate * 100, mode="lines", name="Flag rate"),
+            go.Scatter(x=times, y=snap.disagreement_rate * 100, mode="lines",
+                       name="LR/RF disagreement"),
+        ])
+        fig.update_layout(title="Flag Rate and Model Disagreement", yaxis_title="% of transactions",
+                          template="plotly_white", height=300)
+        st.plotly_chart(fig, use_container_width=True)
+    
+        col1, col2 = st.columns(2)
+        with col1:
+            edges = [i / SCORE_BINS for i in range(SCORE_BINS)]
+            fig = go.Figure(go.Bar(x=[e + 0.5 / SCORE_BINS for e in edges], y=snap.score_hist,
+                                   width=1 / SCORE_BINS))
+            fig.update_layout(title="Consensus Score Distribution", xaxis_title="Consensus score",
+                              yaxis_title="Transactions", yaxis_type="log",
+                              template="plotly_white", height=350)
+            st.plotly_chart(fig, use_container_width=True)
+        with col2:
+            st.subheader("Call Latency")
+            st.dataframe(pd.DataFrame({
+                "Percentile": [f"p{p:g}" for p in latency],
+                "Latency (ms, ≤)": [f"{v:.3f}" for v in latency.values()],
+            }), hide_index=True)
+            active = snap.transactions > 0
+            gap = (snap.mean_gap[active] * snap.transactions[active]).sum() / total
+            st.metric("Mean |LR - RF| Probability Gap", f"{gap:.4f}")
+
 # ==================== SINGLE TRANSACTION PAGE ====================
 elif app_mode == "🔍 Single Transaction":
+    import numpy as np
+    import pandas as pd
+    import plotly.graph_objects as go
+    
+    lr_model, rf_model, scaler = require_models()
+    
     st.header("Single Transaction Fraud Detection")
     
     st.markdown("""
@@ -215,21 +341,17 @@ elif app_mode == "🔍 Single Transaction":
     # Prepare input data
     if st.button("🔍 Analyze Transaction", key="analyze_btn", use_container_width=True):
         
-        # Create input array with all features
+        # Create input array with all features, placed by name
         input_data = np.zeros((1, metadata['num_features']))
-        
-        # Set Time and Amount
-        input_data[0, 0] = transaction_time
-        
-        # Set V features (example mapping - adjust indices as needed)
-        v_features = {
-            1: v1, 2: v2, 3: v3, 4: v4, 5: v5,
-            10: v10, 12: v12, 14: v14, 17: v17, 21: v21
+        inputs = {
+            'Time': transaction_time, 'Amount': amount,
+            'V1': v1, 'V2': v2, 'V3': v3, 'V4': v4, 'V5': v5,
+            'V10': v10, 'V12': v12, 'V14': v14, 'V17': v17, 'V21': v21
         }
-        
-        for idx, val in v_features.items():
-            if idx < metadata['num_features']:
-                input_data[0, idx] = val
+        feature_index = {name: i for i, name in enumerate(store.feature_names)}
+        for name, val in inputs.items():
+            if name in feature_index:
+                input_data[0, feature_index[name]] = val
         
         # Scale the input
         input_scaled = scaler.transform(input_data)
@@ -306,32 +428,75 @@ elif app_mode == "🔍 Single Transaction":
         })
         
         st.dataframe(summary_df, use_container_width=True)
+        
+        # Feature contributions behind both scores
+        st.markdown("---")
+        st.subheader("Why This Score?")
+        
+        explained = load_explainer().explain(input_scaled)
+        col1, col2 = st.columns(2)
+        for col, key, title, unit in ((col1, "lr", "Logistic Regression", "log-odds"),
+                                      (col2, "rf", "Random Forest", "probability")):
+            names, values = explained[key].top_k(5, toward_fraud=False)
+            with col:
+                st.markdown(f"**{title}** (contribution in {unit})")
+                st.dataframe(pd.DataFrame({"Feature": names[0], "Contribution": values[0]}),
+                             use_container_width=True, hide_index=True)
+        
+        # Nearest confirmed frauds
+        fraud_index = load_fraud_index()
+        if fraud_index is not None:
+            st.markdown("---")
+            st.subheader("Similar Known Frauds")
+            neighbors = fraud_index.query(input_scaled[0], k=5)
+            st.dataframe(pd.DataFrame([{
+                "Distance": n.distance, "Source": n.source, "Row": n.row,
+                "Time": n.time, "Amount": f"${n.amount:.2f}"
+            } for n in neighbors]), use_container_width=True, hide_index=True)
 
 # ==================== BATCH PREDICTION PAGE ====================
 elif app_mode == "📊 Batch Prediction":
+    import numpy as np
+    import pandas as pd
+    from explanations import format_reasons
+    from fraud_detection_api import apply_consensus, consensus_policy
+    from input_schema import InputSchema, SchemaError
+    
     st.header("Batch Prediction")
     
     st.markdown("""
     Upload a CSV file with multiple transactions for batch prediction.
-    The CSV should contain the same features as single transactions.
+    Columns are matched by header name (Time, V1-V28, Amount); other columns
+    such as Class or an id are ignored. Invalid rows are listed separately.
     """)
     
     uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
     
     if uploaded_file is not None:
+        lr_model, rf_model, scaler = require_models()
+        
         try:
             # Read the CSV
             df = pd.read_csv(uploaded_file)
             
             st.success(f"✅ Loaded {len(df)} transactions")
             
-            # Prepare data for prediction
-            df_numeric = df.select_dtypes(include=[np.number])
+            # Map feature columns by header and set invalid rows aside
+            checked = InputSchema(store.feature_names).validate_frame(df)
+            X_batch = checked.X
             
-            if len(df_numeric.columns) >= metadata['num_features']:
-                # Take only required features
-                X_batch = df_numeric.iloc[:, :metadata['num_features']].values
-                
+            if checked.n_rejected:
+                st.warning(f"⚠️ {checked.n_rejected} rows rejected and not scored")
+                with st.expander("Rejected rows"):
+                    st.dataframe(checked.rejects, use_container_width=True)
+                    st.download_button(
+                        label="📥 Download Rejected Rows",
+                        data=checked.rejects.to_csv(index=False),
+                        file_name="rejected_transactions.csv",
+                        mime="text/csv"
+                    )
+            
+            if len(X_batch):
                 # Scale
                 X_batch_scaled = scaler.transform(X_batch)
                 
@@ -341,13 +506,25 @@ elif app_mode == "📊 Batch Prediction":
                 lr_proba = lr_model.predict_proba(X_batch_scaled)[:, 1]
                 rf_proba = rf_model.predict_proba(X_batch_scaled)[:, 1]
                 
+                # Same consensus policy as FraudDetectionAPI.predict_single
+                consensus_score, consensus_pred = apply_consensus(
+                    lr_proba, rf_proba, consensus_policy(metadata)
+                )
+                
+                # Top 3 features pushing each transaction toward fraud
+                explained = load_explainer().explain(X_batch_scaled)
+                
                 # Create results dataframe
                 results = pd.DataFrame({
+                    'Line': checked.lines,
                     'LR_Prediction': lr_preds,
                     'LR_Fraud_Probability': lr_proba,
                     'RF_Prediction': rf_preds,
                     'RF_Fraud_Probability': rf_proba,
-                    'Consensus': (lr_preds + rf_preds) / 2  # Average prediction
+                    'Consensus_Score': consensus_score,
+                    'Consensus': consensus_pred,
+                    'LR_Top_Reasons': format_reasons(*explained['lr'].top_k(3)),
+                    'RF_Top_Reasons': format_reasons(*explained['rf'].top_k(3))
                 })
                 
                 st.markdown("---")
@@ -357,15 +534,15 @@ elif app_mode == "📊 Batch Prediction":
                 
                 with col1:
                     lr_fraud_count = (lr_preds == 1).sum()
-                    st.metric("LR Frauds Detected", lr_fraud_count, f"{lr_fraud_count/len(df)*100:.1f}%")
+                    st.metric("LR Frauds Detected", lr_fraud_count, f"{lr_fraud_count/len(results)*100:.1f}%")
                 
                 with col2:
                     rf_fraud_count = (rf_preds == 1).sum()
-                    st.metric("RF Frauds Detected", rf_fraud_count, f"{rf_fraud_count/len(df)*100:.1f}%")
+                    st.metric("RF Frauds Detected", rf_fraud_count, f"{rf_fraud_count/len(results)*100:.1f}%")
                 
                 with col3:
-                    consensus_fraud = (results['Consensus'] > 0.5).sum()
-                    st.metric("Consensus Frauds", consensus_fraud, f"{consensus_fraud/len(df)*100:.1f}%")
+                    consensus_fraud = (results['Consensus'] == 1).sum()
+                    st.metric("Consensus Frauds", consensus_fraud, f"{consensus_fraud/len(results)*100:.1f}%")
                 
                 st.markdown("---")
                 st.subheader("Detailed Predictions")
@@ -380,13 +557,21 @@ elif app_mode == "📊 Batch Prediction":
                     mime="text/csv"
                 )
             else:
-                st.error(f"CSV must have at least {metadata['num_features']} numeric features")
+                st.error("No valid transactions to score")
+        
+        except SchemaError as e:
+            st.error(f"❌ {e}")
         
         except Exception as e:
             st.error(f"Error processing file: {str(e)}")
 
 # ==================== MODEL PERFORMANCE PAGE ====================
 elif app_mode == "📈 Model Performance":
+    import plotly.graph_objects as go
+    from fraud_detection_api import consensus_policy
+    
+    policy = consensus_policy(metadata)
+    
     st.header("Model Performance Metrics")
     
     col1, col2, col3, col4 = st.columns(4)
@@ -448,13 +633,27 @@ elif app_mode == "📈 Model Performance":
     with info_col2:
         st.success(f"""
         **Model Details**
-        - Logistic Regression: Trained with max_iter=1000
-        - Random Forest: 100 trees with random_state=42
+        - Logistic Regression: Trained with max_iter={metadata.get('max_iter', 1000)}
+        - Random Forest: {metadata.get('n_estimators', 100)} trees with random_state=42
         - Scaler: StandardScaler applied to all features
+        - Consensus: {policy['lr_weight']:.2f} × LR + {1 - policy['lr_weight']:.2f} × RF > {policy['threshold']:.3f}
         - Test Size: 20%
         - Stratified Split: Yes
         """)
 
+# Startup timings
+_script_run = time.perf_counter() - _APP_START
+
+with st.sidebar.expander("⏱️ Startup Timings"):
+    st.write(f"Import time: {_IMPORT_TIME * 1000:.0f} ms")
+    st.write(f"First paint (session): {st.session_state['first_paint_s'] * 1000:.0f} ms")
+    st.write(f"First paint (this run): {_first_paint * 1000:.0f} ms")
+    st.write(f"Script run (page built): {_script_run * 1000:.0f} ms")
+    for name, seconds in store.load_times.items():
+        st.write(f"{name}: {seconds * 1000:.0f} ms")
+    if not store.is_loaded("rf_model"):
+        st.write("rf_model: loading in background...")
+
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -463,3 +662,8 @@ st.markdown("""
 <p>Powered by Logistic Regression & Random Forest</p>
 </div>
 """, unsafe_allow_html=True)
+
+# Rerun last so the whole page has rendered before the pause
+if app_mode == "📡 Live Operations" and st.session_state.get("live_auto_refresh"):
+    time.sleep(LIVE_REFRESH_SECONDS)
+    (getattr(st, "rerun", None) or st.experimental_rerun)()
@@ -0,0 +1,371 @@
+"""
+Fraud Index - Nearest confirmed fraud cases in the scaled feature space
+Exact top-k search over a k-means ball partition stored as .npy memmaps
+
+Vectors are grouped by partition on disk. Each partition has a centroid and
+a radius, so d(q, c) - radius is a lower bound for every vector inside it;
+partitions are visited nearest-first and skipped once that bound exceeds
+the current k-th distance, which keeps results exact. New frauds go to a
+small delta segment that is scanned in full and merged on compaction.
+
+Usage:
+    python fraud_index.py build --csv creditcard.csv
+    python fraud_index.py add --csv confirmed_march.csv
+    python fraud_index.py stats
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from model_store import ARTIFACT_FILES, ModelStore, file_digest
+from train_pipeline import DEFAULT_CACHE_DIR, DEFAULT_MODELS_DIR, load_dataset
+
+INDEX_DIRNAME = "fraud_index"
+INDEX_FILE = "index.json"
+# Per-row info stored next to the vectors
+INFO_DTYPE = np.dtype([("source", "<i4"), ("row", "<i8"), ("time", "<f8"), ("amount", "<f8")])
+COMPACT_FRACTION = 0.1
+ROWS_PER_PARTITION = 64
+
+
+@dataclass
+class Neighbor:
+    """One similar confirmed fraud"""
+    distance: float
+    source: str
+    row: int
+    time: float
+    amount: float
+
+
+def _save_atomic(path: str, array: np.ndarray):
+    """Write an .npy file next to its target and rename it into place"""
+    tmp = f"{path}.tmp.npy"
+    np.save(tmp, array)
+    os.replace(tmp, path)
+
+
+def _partition(vectors: np.ndarray, rows_per_partition: int = ROWS_PER_PARTITION,
+               random_state: int = 42):
+    """
+    Cluster vectors into balls
+
+    Returns:
+        (order, centroids, radii, offsets): vectors[order] is grouped by
+        partition, partition p spans offsets[p]:offsets[p + 1]
+    """
+    n = len(vectors)
+    n_parts = max(1, n // rows_per_partition)
+    if n_parts == 1:
+        centroid = vectors.mean(axis=0, keepdims=True) if n else np.zeros((1, vectors.shape[1]))
+        labels = np.zeros(n, dtype=np.int64)
+        centroids = centroid.astype(np.float32)
+    else:
+        from sklearn.cluster import KMeans
+        km = KMeans(n_clusters=n_parts, n_init=1, random_state=random_state).fit(vectors)
+        labels, centroids = km.labels_, km.cluster_centers_.astype(np.float32)
+
+    order = np.argsort(labels, kind="stable")
+    counts = np.bincount(labels, minlength=len(centroids))
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    dist = np.linalg.norm(vectors - centroids[labels], axis=1)
+    radii = np.zeros(len(centroids), dtype=np.float32)
+    np.maximum.at(radii, labels, dist.astype(np.float32))
+    return order, centroids, radii, offsets
+
+
+class FraudIndex:
+    """
+    Memory-mapped exact k-nearest-neighbour index of confirmed frauds
+
+    Files in the index directory:
+        index.json                 sources, source hashes, scaler digest
+        vectors.npy / info.npy     partitioned main segment (memmapped)
+        centroids.npy radii.npy offsets.npy
+        delta_vectors.npy / delta_info.npy   unpartitioned recent additions
+    """
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, INDEX_FILE)) as f:
+            self.config = json.load(f)
+        self.sources: List[str] = self.config["sources"]
+
+        def load(name):
+            return np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r")
+
+        self.vectors, self.info = load("vectors"), load("info")
+        self.centroids = np.asarray(load("centroids"))
+        self.radii = np.asarray(load("radii"))
+        self.offsets = np.asarray(load("offsets"))
+        self.delta_vectors, self.delta_info = load("delta_vectors"), load("delta_info")
+
+    @classmethod
+    def open(cls, models_dir: str = DEFAULT_MODELS_DIR,
+             index_dir: Optional[str] = None) -> "FraudIndex":
+        """
+        Open an index and check it was built with the current scaler
+
+        Raises:
+            FileNotFoundError: No index has been built
+            ValueError: The index was built with a different scaler.pkl
+        """
+        index_dir = index_dir or os.path.join(models_dir, INDEX_DIRNAME)
+        index = cls(index_dir)
+        digest = file_digest(os.path.join(models_dir, ARTIFACT_FILES["scaler"]))
+        if index.config["scaler_sha256"] != digest:
+            raise ValueError(f"{index_dir} was built with a different scaler; rebuild it")
+        return index
+
+    def __len__(self) -> int:
+        return len(self.vectors) + len(self.delta_vectors)
+
+    def query(self, x_scaled: np.ndarray, k: int = 5) -> List[Neighbor]:
+        """
+        Exact k nearest confirmed frauds to one scaled transaction
+
+        Args:
+            x_scaled: Scaled feature vector (30 values)
+            k: Number of neighbours
+
+        Returns:
+            Neighbors sorted by Euclidean distance
+
+        Raises:
+            ValueError: If k is below 1
+        """
+        if k < 1:
+            raise ValueError(f"k must be at least 1, got {k}")
+        q = np.asarray(x_scaled, dtype=np.float32).ravel()
+        best_d = np.full(0, np.inf, dtype=np.float32)
+        best_i = np.full(0, -1, dtype=np.int64)
+
+        def merge(d, idx):
+            nonlocal best_d, best_i
+            best_d = np.concatenate((best_d, d))
+            best_i = np.concatenate((best_i, idx))
+            if len(best_d) > k:
+                keep = np.argpartition(best_d, k - 1)[:k]
+                best_d, best_i = best_d[keep], best_i[keep]
+
+        # Delta rows get negative ids: -1 - position
+        if len(self.delta_vectors):
+            d = np.linalg.norm(self.delta_vectors - q, axis=1)
+            merge(d, -1 - np.arange(len(d)))
+
+        centroid_d = np.linalg.norm(self.centroids - q, axis=1)
+        lower = centroid_d - self.radii
+        for p in np.argsort(lower):
+            if len(best_d) == k and lower[p] > best_d.max():
+                break
+            start, end = self.offsets[p], self.offsets[p + 1]
+            if start == end:
+                continue
+            d = np.linalg.norm(self.vectors[start:end] - q, axis=1)
+            merge(d, np.arange(start, end))
+
+        order = np.argsort(best_d)
+        neighbors = []
+        for d, i in zip(best_d[order], best_i[order]):
+            info = self.info[i] if i >= 0 else self.delta_info[-1 - i]
+            neighbors.append(Neighbor(float(d), self.sources[info["source"]], int(info["row"]),
+                                      float(info["time"]), float(info["amount"])))
+        return neighbors
+
+    def query_batch(self, X_scaled: np.ndarray, k: int = 5) -> List[List[Neighbor]]:
+        """Run query() for every row of a scaled batch"""
+        return [self.query(x, k) for x in np.atleast_2d(X_scaled)]
+
+
+def _fraud_rows(csv_path: str, store: ModelStore, cache_dir: str):
+    """Scaled vectors and info records of the fraud rows in a labeled CSV"""
+    ds = load_dataset(csv_path, cache_dir)
+    columns = [ds.feature_names.index(name) for name in store.feature_names]
+    rows = np.flatnonzero(np.asarray(ds.y) == 1)
+    X = np.asarray(ds.X[rows])[:, columns]
+    vectors = (store.scaler.transform(X).astype(np.float32) if len(rows)
+               else np.empty((0, len(columns)), dtype=np.float32))
+
+    info = np.zeros(len(rows), dtype=INFO_DTYPE)
+    info["row"] = rows
+    info["time"] = X[:, store.feature_names.index("Time")]
+    info["amount"] = X[:, store.feature_names.index("Amount")]
+    return ds.source_hash, vectors, info
+
+
+def _row_keys(vectors: np.ndarray) -> np.ndarray:
+    """One opaque key per row (its bytes), for exact duplicate detection"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    return vectors.view(np.dtype((np.void, vectors.itemsize * vectors.shape[1]))).ravel()
+
+
+def _new_rows(vectors: np.ndarray, indexed: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Mask of rows to index: the first copy of every feature vector that is
+    not already among the indexed vectors
+
+    Overlapping exports share fraud rows, so sources are deduplicated by
+    content as well as by file hash.
+    """
+    keys = _row_keys(vectors)
+    keep = np.zeros(len(keys), dtype=bool)
+    keep[np.unique(keys, return_index=True)[1]] = True
+    if indexed is not None and len(indexed):
+        keep &= ~np.isin(keys, _row_keys(indexed))
+    return keep
+
+
+def _write_main(index_dir: str, vectors: np.ndarray, info: np.ndarray):
+    """Partition all rows into the main segment and empty the delta"""
+    order, centroids, radii, offsets = _partition(vectors)
+    n_features = vectors.shape[1]
+    _save_atomic(os.path.join(index_dir, "vectors.npy"), np.ascontiguousarray(vectors[order]))
+    _save_atomic(os.path.join(index_dir, "info.npy"), info[order])
+    _save_atomic(os.path.join(index_dir, "centroids.npy"), centroids)
+    _save_atomic(os.path.join(index_dir, "radii.npy"), radii)
+    _save_atomic(os.path.join(index_dir, "offsets.npy"), offsets)
+    _save_atomic(os.path.join(index_dir, "delta_vectors.npy"),
+                 np.zeros((0, n_features), dtype=np.float32))
+    _save_atomic(os.path.join(index_dir, "delta_info.npy"), np.zeros(0, dtype=INFO_DTYPE))
+
+
+def _write_config(index_dir: str, config: Dict):
+    tmp = os.path.join(index_dir, INDEX_FILE + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(config, f, indent=2)
+    os.replace(tmp, os.path.join(index_dir, INDEX_FILE))
+
+
+def build_index(csv_paths: List[str], models_dir: str = DEFAULT_MODELS_DIR,
+                index_dir: Optional[str] = None,
+                cache_dir: str = DEFAULT_CACHE_DIR) -> Dict:
+    """
+    Build a fresh index from the fraud rows of labeled CSVs
+
+    Returns:
+        The index configuration
+
+    Raises:
+        ValueError: If the CSVs hold no fraud rows to index
+    """
+    index_dir = index_dir or os.path.join(models_dir, INDEX_DIRNAME)
+    store = ModelStore(models_dir)
+
+    sources, hashes, all_vectors, all_info = [], [], [], []
+    for path in csv_paths:
+        digest, vectors, info = _fraud_rows(path, store, cache_dir)
+        if digest in hashes:
+            continue
+        info["source"] = len(sources)
+        sources.append(os.path.basename(path))
+        hashes.append(digest)
+        all_vectors.append(vectors)
+        all_info.append(info)
+
+    if not sum(len(v) for v in all_vectors):
+        raise ValueError(f"No fraud rows to index in {len(csv_paths)} CSV(s); "
+                         "pass labeled files with Class == 1 rows")
+    os.makedirs(index_dir, exist_ok=True)
+    vectors, info = np.concatenate(all_vectors), np.concatenate(all_info)
+    keep = _new_rows(vectors)
+    _write_main(index_dir, vectors[keep], info[keep])
+    config = {
+        "sources": sources,
+        "source_hashes": hashes,
+        "scaler_sha256": file_digest(os.path.join(models_dir, ARTIFACT_FILES["scaler"])),
+        "duplicates_skipped": int(len(keep) - keep.sum()),
+        "built_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    _write_config(index_dir, config)
+    return config
+
+
+def add_to_index(csv_path: str, models_dir: str = DEFAULT_MODELS_DIR,
+                 index_dir: Optional[str] = None, cache_dir: str = DEFAULT_CACHE_DIR,
+                 compact_fraction: float = COMPACT_FRACTION) -> int:
+    """
+    Append the fraud rows of a labeled CSV to the delta segment
+
+    A CSV whose content hash is already indexed is skipped, as are fraud
+    rows whose features are already in the index. When the delta
+    grows past compact_fraction of the main segment, everything is
+    re-partitioned.
+
+    Returns:
+        Number of frauds added
+    """
+    index_dir = index_dir or os.path.join(models_dir, INDEX_DIRNAME)
+    index = FraudIndex.open(models_dir, index_dir)
+    config = index.config
+    digest, vectors, info = _fraud_rows(csv_path, ModelStore(models_dir), cache_dir)
+    if digest in config["source_hashes"]:
+        return 0
+    keep = _new_rows(vectors, np.concatenate((index.vectors, index.delta_vectors)))
+    vectors, info = vectors[keep], info[keep]
+    config["duplicates_skipped"] = config.get("duplicates_skipped", 0) + int(len(keep) - keep.sum())
+
+    info["source"] = len(config["sources"])
+    config["sources"].append(os.path.basename(csv_path))
+    config["source_hashes"].append(digest)
+
+    delta_vectors = np.concatenate((index.delta_vectors, vectors))
+    delta_info = np.concatenate((index.delta_info, info))
+    compact = len(delta_vectors) > compact_fraction * len(index.vectors)
+    if compact:
+        main_vectors = np.concatenate((index.vectors, delta_vectors))
+        main_info = np.concatenate((index.info, delta_info))
+    # Release the memmaps before their files are replaced
+    del index
+
+    if compact:
+        _write_main(index_dir, main_vectors, main_info)
+    else:
+        _save_atomic(os.path.join(index_dir, "delta_vectors.npy"), delta_vectors)
+        _save_atomic(os.path.join(index_dir, "delta_info.npy"), delta_info)
+    _write_config(index_dir, config)
+    return len(vectors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Similarity index over confirmed frauds")
+    parser.add_argument("command", choices=("build", "add", "stats"))
+    parser.add_argument("--csv", nargs="+", default=[], help="Labeled transactions CSV(s)")
+    parser.add_argument("--models-dir", default=DEFAULT_MODELS_DIR)
+    parser.add_argument("--index-dir", default=None)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        try:
+            build_index(args.csv, args.models_dir, args.index_dir, args.cache_dir)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"✅ Index built in {time.perf_counter() - start:.1f}s")
+    elif args.command == "add":
+        for path in args.csv:
+            added = add_to_index(path, args.models_dir, args.index_dir, args.cache_dir)
+            print(f"✅ {path}: {added} frauds added" if added else f"⚠️ {path} already indexed")
+
+    index = FraudIndex.open(args.models_dir, args.index_dir)
+    print(f"📊 {len(index):,} frauds ({len(index.delta_vectors):,} in delta), "
+          f"{len(index.centroids)} partitions, sources: {', '.join(index.sources)}")
+
+    start = time.perf_counter()
+    n_queries = min(100, len(index.vectors))
+    for x in index.vectors[:n_queries]:
+        index.query(x, k=5)
+    if n_queries:
+        print(f"  Query latency: {(time.perf_counter() - start) / n_queries * 1e3:.2f} ms (k=5)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Incremental Training - Out-of-core training on datasets larger than memory
+Streams row chunks from the binary dataset cache, so memory is bounded by
+the chunk size, the validation cap and the Random Forest sample size
+
+Usage:
+    python incremental_training.py --csv jan.csv feb.csv mar.csv --epochs 5
+"""
+
+import argparse
+import time
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from drift_monitor import build_reference
+from train_pipeline import (
+    DEFAULT_CACHE_DIR, DEFAULT_MODELS_DIR, Dataset, evaluate_models, load_dataset,
+    save_artifacts
+)
+
+DEFAULT_CHUNK_ROWS = 50_000
+
+
+class Reservoir:
+    """
+    Fixed-size uniform random sample of a row stream (Algorithm R)
+
+    Updates are vectorized per chunk; when several rows in one chunk pick
+    the same slot the later row wins, as in the sequential algorithm.
+    """
+
+    def __init__(self, capacity: int, n_features: int, seed: int = 42):
+        self.capacity = capacity
+        self.X = np.empty((capacity, n_features), dtype=np.float32)
+        self.y = np.empty(capacity, dtype=np.int8)
+        self.seen = 0
+        self._rng = np.random.default_rng(seed)
+
+    def add(self, X: np.ndarray, y: np.ndarray):
+        """Offer a chunk of rows to the sample"""
+        n = len(y)
+        fill = max(0, min(n, self.capacity - self.seen))
+        if fill:
+            self.X[self.seen:self.seen + fill] = X[:fill]
+            self.y[self.seen:self.seen + fill] = y[:fill]
+
+        if fill < n:
+            positions = np.arange(self.seen + fill, self.seen + n) + 1
+            slots = (self._rng.random(n - fill) * positions).astype(np.int64)
+            keep = slots < self.capacity
+            self.X[slots[keep]] = X[fill:][keep]
+            self.y[slots[keep]] = y[fill:][keep]
+
+        self.seen += n
+
+    def sample(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the current sample as (X, y)"""
+        size = min(self.seen, self.capacity)
+        return self.X[:size], self.y[:size]
+
+
+def iter_chunks(datasets: List[Dataset],
+                chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[Tuple[int, int, np.ndarray, np.ndarray]]:
+    """
+    Yield (dataset index, start row, X, y) chunks from memory-mapped datasets
+
+    Each chunk is a slice of the memory map, so only chunk_rows rows are
+    resident at a time.
+    """
+    for d, ds in enumerate(datasets):
+        for start in range(0, len(ds.y), chunk_rows):
+            yield (d, start, np.asarray(ds.X[start:start + chunk_rows]),
+                   np.asarray(ds.y[start:start + chunk_rows]))
+
+
+def _holdout_mask(n_rows: int, dataset_index: int, start: int,
+                  validation_fraction: float, seed: int) -> np.ndarray:
+    """Deterministic per-row validation assignment, stable across epochs"""
+    rng = np.random.default_rng([seed, dataset_index, start])
+    return rng.random(n_rows) < validation_fraction
+
+
+def _validation_mask(n_rows: int, dataset_index: int, start: int,
+                     validation_fraction: float, seed: int, kept: int) -> np.ndarray:
+    """
+    Rows of a chunk used for validation: the first `kept` held-out rows
+
+    Held-out rows beyond the validation cap are trained on rather than
+    dropped, so train and validation always cover every row.
+    """
+    mask = _holdout_mask(n_rows, dataset_index, start, validation_fraction, seed)
+    held_out = np.flatnonzero(mask)
+    mask[held_out[kept:]] = False
+    return mask
+
+
+def train_incremental(csv_paths: List[str], models_dir: str = DEFAULT_MODELS_DIR,
+                      cache_dir: str = DEFAULT_CACHE_DIR, epochs: int = 5,
+                      chunk_rows: int = DEFAULT_CHUNK_ROWS, validation_fraction: float = 0.2,
+                      max_validation_rows: int = 200_000, rf_sample_rows: int = 100_000,
+                      n_estimators: int = 100, alpha: float = 1e-4,
+                      random_state: int = 42) -> Dict:
+    """
+    Train the scaler and a linear model chunk by chunk, then save artifacts
+
+    Pass 1 updates StandardScaler statistics with partial_fit and collects a
+    bounded validation set plus a reservoir sample for the Random Forest.
+    Each epoch then streams all training chunks through
+    SGDClassifier(loss="log_loss").partial_fit in shuffled chunk order and
+    reports validation AUC, F1 and log loss.
+
+    Args:
+        csv_paths: Labeled CSVs in Time order
+        models_dir: Output directory for API-compatible artifacts
+        cache_dir: Binary dataset cache directory
+        epochs: Passes over the training chunks
+        chunk_rows: Rows resident per chunk
+        validation_fraction: Share of rows held out for validation
+        max_validation_rows: Cap on held-out rows kept in memory
+        rf_sample_rows: Reservoir size used to fit the Random Forest
+        n_estimators: Trees in the Random Forest
+        alpha: SGD L2 regularization strength
+        random_state: Seed for splits, shuffling and models
+
+    Returns:
+        The metadata dictionary that was saved
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.metrics import f1_score, log_loss, roc_auc_score
+    from sklearn.preprocessing import StandardScaler
+
+    datasets = [load_dataset(path, cache_dir, mmap=True) for path in csv_paths]
+    feature_names = datasets[0].feature_names
+    n_features = len(feature_names)
+
+    # ---- Pass 1: scaler statistics, validation set, forest sample ----
+    start = time.perf_counter()
+    scaler = StandardScaler()
+    reservoir = Reservoir(rf_sample_rows, n_features, seed=random_state)
+    X_val = np.empty((max_validation_rows, n_features), dtype=np.float32)
+    y_val = np.empty(max_validation_rows, dtype=np.int8)
+    n_val = n_train = n_train_fraud = 0
+    chunk_index = []
+
+    for d, chunk_start, X, y in iter_chunks(datasets, chunk_rows):
+        validation = _validation_mask(len(y), d, chunk_start, validation_fraction,
+                                      random_state, max_validation_rows - n_val)
+        kept = int(validation.sum())
+        X_val[n_val:n_val + kept] = X[validation]
+        y_val[n_val:n_val + kept] = y[validation]
+        n_val += kept
+
+        X_tr, y_tr = X[~validation], y[~validation]
+        if len(y_tr):
+            scaler.partial_fit(X_tr)
+            reservoir.add(X_tr, y_tr)
+        n_train += len(y_tr)
+        n_train_fraud += int(y_tr.sum())
+        chunk_index.append((d, chunk_start, kept))
+
+    X_val, y_val = X_val[:n_val], y_val[:n_val]
+    X_val_scaled = scaler.transform(X_val)
+    print(f"✅ Pass 1: {n_train + n_val:,} rows, {len(chunk_index)} chunks, "
+          f"{n_val:,} validation rows in {time.perf_counter() - start:.1f}s")
+
+    # ---- Epochs: SGD partial_fit over shuffled chunks ----
+    lr_model = SGDClassifier(loss="log_loss", alpha=alpha, random_state=random_state)
+    rng = np.random.default_rng(random_state)
+    history = []
+
+    for epoch in range(1, epochs + 1):
+        start = time.perf_counter()
+        order = rng.permutation(len(chunk_index))
+        for i, chunk_no in enumerate(order, 1):
+            d, chunk_start, kept = chunk_index[chunk_no]
+            X = np.asarray(datasets[d].X[chunk_start:chunk_start + chunk_rows])
+            y = np.asarray(datasets[d].y[chunk_start:chunk_start + chunk_rows])
+            validation = _validation_mask(len(y), d, chunk_start, validation_fraction,
+                                          random_state, kept)
+            X_tr, y_tr = X[~validation], y[~validation]
+            if len(y_tr):
+                lr_model.partial_fit(scaler.transform(X_tr), y_tr, classes=[0, 1])
+            print(f"\r  epoch {epoch}/{epochs}: chunk {i}/{len(order)}", end="", flush=True)
+
+        val_proba = lr_model.predict_proba(X_val_scaled)[:, 1]
+        metrics = {
+            "epoch": epoch,
+            "auc": roc_auc_score(y_val, val_proba) if 0 < y_val.sum() < n_val else float("nan"),
+            "f1": f1_score(y_val, (val_proba > 0.5).astype(int), zero_division=0),
+            "log_loss": log_loss(y_val, val_proba, labels=[0, 1]),
+            "seconds": time.perf_counter() - start,
+        }
+        history.append(metrics)
+        print(f"\r  epoch {epoch}/{epochs}: val AUC {metrics['auc']:.4f}  "
+              f"F1 {metrics['f1']:.4f}  log loss {metrics['log_loss']:.4f}  "
+              f"({metrics['seconds']:.1f}s)")
+
+    # ---- Random Forest on the bounded reservoir sample ----
+    start = time.perf_counter()
+    X_rf, y_rf = reservoir.sample()
+    rf_model = RandomForestClassifier(n_estimators=n_estimators,
+                                      random_state=random_state, n_jobs=-1)
+    X_rf_scaled = scaler.transform(X_rf)
+    rf_model.fit(X_rf_scaled, y_rf)
+    print(f"✅ Random Forest on {len(y_rf):,} sampled rows in {time.perf_counter() - start:.1f}s")
+
+    metadata = evaluate_models(lr_model, rf_model, X_rf, X_val_scaled, y_rf, y_val)
+    metadata.update({
+        "train_samples": n_train,
+        "total_samples": n_train + n_val,
+        "train_fraud_rate": (n_train_fraud / max(n_train, 1)) * 100,
+        "training_mode": "incremental",
+        "rf_sample_rows": len(y_rf),
+        "n_estimators": n_estimators,
+        "epoch_history": history,
+    })
+    save_artifacts(models_dir, lr_model, rf_model, scaler, feature_names, metadata)
+    # Feature reference from the training sample, score reference from validation
+    build_reference(models_dir, X_rf_scaled, lr_model.predict_proba(X_val_scaled)[:, 1],
+                    rf_model.predict_proba(X_val_scaled)[:, 1])
+
+    print(f"✅ Artifacts saved to {models_dir}/")
+    return metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Out-of-core incremental training")
+    parser.add_argument("--csv", nargs="+", required=True, help="Labeled CSVs in Time order")
+    parser.add_argument("--models-dir", default=DEFAULT_MODELS_DIR)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--validation-fraction", type=float, default=0.2)
+    parser.add_argument("--max-validation-rows", type=int, default=200_000)
+    parser.add_argument("--rf-sample-rows", type=int, default=100_000)
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--alpha", type=float, default=1e-4)
+    parser.add_argument("--random-state", type=int, default=42)
+    args = parser.parse_args()
+
+    train_incremental(args.csv, args.models_dir, args.cache_dir, args.epochs,
+                      args.chunk_rows, args.validation_fraction, args.max_validation_rows,
+                      args.rf_sample_rows, args.n_estimators, args.alpha, args.random_state)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+Input Schema - Header-aware column mapping and vectorized input validation
+Compiled once from feature_names.pkl; checks whole chunks with array operations
+
+A file's header is mapped onto the model's feature order once, by name, so
+extra columns (Class, ids) are ignored and column order does not matter.
+Every chunk is then checked with whole-array operations for non-numeric
+cells, missing values, infinities and per-feature ranges. Rows that fail are
+split off with their reason into a reject stream instead of being scored
+or stopping the file.
+
+Usage:
+    python input_schema.py --csv transactions.csv --rejects rejected.csv
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Row problem flags, combined bitwise per row (0 = valid)
+NON_NUMERIC, MISSING, INFINITE, OUT_OF_RANGE = 1, 2, 4, 8
+REASONS = {NON_NUMERIC: "non-numeric", MISSING: "missing", INFINITE: "infinite",
+           OUT_OF_RANGE: "out of range"}
+
+# Inclusive (low, high) limits; features not listed are unbounded
+DEFAULT_BOUNDS = {"Time": (0.0, np.inf), "Amount": (0.0, np.inf)}
+DEFAULT_CHUNK_ROWS = 100_000
+HEADER_LINES = 1
+
+
+class SchemaError(ValueError):
+    """Input that cannot be mapped onto the model's features at all"""
+
+
+@dataclass
+class ColumnMapping:
+    """Where each model feature lives in a particular file's header"""
+    source_columns: List[str]   # header name for each feature, in model order
+    extra_columns: List[str]    # header columns the models do not use
+
+
+@dataclass
+class ValidatedChunk:
+    """One chunk split into scoreable rows and rejects"""
+    X: np.ndarray               # (valid rows, features) float64 in model order
+    lines: np.ndarray           # file line number of each valid row
+    rejects: "object"           # DataFrame: line, reason, then the feature columns
+
+    @property
+    def n_rejected(self) -> int:
+        return len(self.rejects)
+
+
+def describe_flags(flags: np.ndarray) -> List[str]:
+    """Turn row flags into 'missing, out of range' style reason strings"""
+    return [", ".join(reason for bit, reason in REASONS.items() if f & bit)
+            for f in flags.tolist()]
+
+
+class InputSchema:
+    """Compiled feature schema: order, dtype and ranges from feature_names.pkl"""
+
+    def __init__(self, feature_names: Sequence[str],
+                 bounds: Optional[Dict[str, Tuple[float, float]]] = None):
+        """
+        Args:
+            feature_names: Model feature order
+            bounds: {feature: (low, high)} inclusive limits
+                (default: DEFAULT_BOUNDS, non-negative Time and Amount)
+        """
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        bounds = DEFAULT_BOUNDS if bounds is None else bounds
+        self.low = np.array([bounds.get(n, (-np.inf, np.inf))[0] for n in self.feature_names])
+        self.high = np.array([bounds.get(n, (-np.inf, np.inf))[1] for n in self.feature_names])
+        self.bounded_columns = np.flatnonzero(np.isfinite(self.low) | np.isfinite(self.high))
+
+    @classmethod
+    def from_models_dir(cls, models_dir: str = "fraud_detection_models",
+                        bounds: Optional[Dict[str, Tuple[float, float]]] = None) -> "InputSchema":
+        """Build the schema from a model directory's feature_names.pkl"""
+        from model_store import ModelStore
+        return cls(ModelStore(models_dir).feature_names, bounds)
+
+    def map_columns(self, columns: Sequence) -> ColumnMapping:
+        """
+        Map a header onto the feature order by name (surrounding spaces ignored)
+
+        Raises:
+            SchemaError: If any feature column is missing
+        """
+        lookup = {}
+        for column in columns:
+            lookup.setdefault(str(column).strip(), column)
+        missing = [name for name in self.feature_names if name not in lookup]
+        if missing:
+            shown = ", ".join(missing[:5]) + (" ..." if len(missing) > 5 else "")
+            raise SchemaError(f"Missing {len(missing)} of {self.n_features} feature columns "
+                              f"({shown}); the file needs a header naming the features")
+        used = {lookup[name] for name in self.feature_names}
+        return ColumnMapping([lookup[name] for name in self.feature_names],
+                             [str(c) for c in columns if c not in used])
+
+    def row_flags(self, X: np.ndarray, non_numeric: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Problem flags per row, computed over the whole array
+
+        Args:
+            X: (rows, features) float array in model order
+            non_numeric: Optional boolean mask of cells that were not numbers
+                (they appear as NaN in X)
+
+        Returns:
+            uint8 array of NON_NUMERIC | MISSING | INFINITE | OUT_OF_RANGE bits
+        """
+        flags = np.zeros(len(X), dtype=np.uint8)
+        if self.bounded_columns.size:
+            # NaN compares False, so missing values are not also out of range
+            Xb = X[:, self.bounded_columns]
+            outside = (Xb < self.low[self.bounded_columns]) | (Xb > self.high[self.bounded_columns])
+            flags[outside.any(axis=1)] = OUT_OF_RANGE
+
+        # One pass over the whole array; details only for rows that fail it
+        bad = np.flatnonzero(~np.isfinite(X).all(axis=1))
+        if non_numeric is not None:
+            bad = np.union1d(bad, np.flatnonzero(non_numeric.any(axis=1)))
+        if len(bad):
+            Xbad = X[bad]
+            nan = np.isnan(Xbad)
+            inf = np.isinf(Xbad)
+            if non_numeric is not None:
+                text = non_numeric[bad]
+                nan &= ~text
+                flags[bad[text.any(axis=1)]] |= NON_NUMERIC
+            flags[bad[nan.any(axis=1)]] |= MISSING
+            flags[bad[inf.any(axis=1)]] |= INFINITE
+        return flags
+
+    def check(self, features) -> np.ndarray:
+        """
+        Validate in-memory features for direct API calls
+
+        Args:
+            features: One row (features,) or a batch (rows, features)
+
+        Returns:
+            2D float array of shape (rows, features)
+
+        Raises:
+            SchemaError: On a wrong feature count or non-numeric values
+            ValueError: If any row is missing, infinite or out of range
+        """
+        try:
+            X = np.asarray(features)
+            if X.dtype.kind != "f":  # float32 input is kept as is
+                X = X.astype(np.float64)
+        except (TypeError, ValueError) as e:
+            raise SchemaError(f"Features must be numeric: {e}") from None
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise SchemaError(f"Expected {self.n_features} features per transaction, "
+                              f"got shape {np.shape(features)}")
+
+        flags = self.row_flags(X)
+        bad = np.flatnonzero(flags)
+        if len(bad):
+            reasons = describe_flags(flags[bad[:3]])
+            detail = "; ".join(f"row {i}: {r}" for i, r in zip(bad[:3].tolist(), reasons))
+            raise ValueError(f"{len(bad)} invalid transaction(s) - {detail}")
+        return X
+
+    def validate_frame(self, df, mapping: Optional[ColumnMapping] = None,
+                       first_line: int = HEADER_LINES + 1) -> ValidatedChunk:
+        """
+        Split a DataFrame chunk into valid feature rows and rejects
+
+        Args:
+            df: Chunk with named columns
+            mapping: Result of map_columns for this file (computed if None)
+            first_line: File line number of the chunk's first row
+
+        Returns:
+            ValidatedChunk
+        """
+        import pandas as pd
+
+        mapping = mapping or self.map_columns(df.columns)
+        block = df[mapping.source_columns]
+        non_numeric = None
+        if all(dtype.kind in "biuf" for dtype in block.dtypes):
+            X = block.to_numpy(dtype=np.float64)
+        else:
+            # Only the columns pandas could not parse as numbers need coercing
+            X = np.empty((len(block), self.n_features))
+            non_numeric = np.zeros(X.shape, dtype=bool)
+            for j, (column, dtype) in enumerate(zip(mapping.source_columns, block.dtypes)):
+                values = block.iloc[:, j]
+                if dtype.kind in "biuf":
+                    X[:, j] = values.to_numpy(dtype=np.float64)
+                else:
+                    coerced = pd.to_numeric(values, errors="coerce")
+                    X[:, j] = coerced.to_numpy(dtype=np.float64)
+                    non_numeric[:, j] = (coerced.isna() & values.notna()).to_numpy()
+
+        flags = self.row_flags(X, non_numeric)
+        valid = flags == 0
+        lines = first_line + np.arange(len(df))
+        if valid.all():
+            rejects = pd.DataFrame(columns=["line", "reason"] + self.feature_names)
+            return ValidatedChunk(X, lines, rejects)
+
+        rejects = block[~valid].copy()
+        rejects.columns = self.feature_names
+        rejects.insert(0, "reason", describe_flags(flags[~valid]))
+        rejects.insert(0, "line", lines[~valid])
+        return ValidatedChunk(X[valid], lines[valid], rejects.reset_index(drop=True))
+
+    def iter_file(self, path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                  reject_path: Optional[str] = None) -> Iterator[ValidatedChunk]:
+        """
+        Validate a CSV chunk by chunk, mapping its header once
+
+        Only the feature columns are parsed. Rejected rows are appended to
+        reject_path (a CSV with line, reason and the raw feature values).
+
+        Raises:
+            SchemaError: If the header lacks feature columns
+        """
+        import pandas as pd
+
+        header = pd.read_csv(path, nrows=0).columns
+        mapping = self.map_columns(header)
+        reject_file = open(reject_path, "w", newline="") if reject_path else None
+        write_header = True
+        line = HEADER_LINES + 1
+        try:
+            for df in pd.read_csv(path, usecols=mapping.source_columns, chunksize=chunk_rows,
+                                  low_memory=False):
+                chunk = self.validate_frame(df, mapping, line)
+                line += len(df)
+                if reject_file is not None and chunk.n_rejected:
+                    chunk.rejects.to_csv(reject_file, header=write_header, index=False)
+                    write_header = False
+                yield chunk
+        finally:
+            if reject_file is not None:
+                reject_file.close()
+
+
+def main():
+    import pandas as pd
+    from model_store import ModelStore
+    from fraud_detection_api import FraudDetectionAPI
+
+    parser = argparse.ArgumentParser(description="Validate a transaction CSV against the model schema")
+    parser.add_argument("--csv", required=True)
+    parser.add_argument("--models-dir", default="fraud_detection_models")
+    parser.add_argument("--rejects", default=None, help="Write rejected rows to this CSV")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--score", action="store_true",
+                        help="Also score valid rows and compare the time spent")
+    args = parser.parse_args()
+
+    schema = InputSchema(ModelStore(args.models_dir).feature_names)
+    api = FraudDetectionAPI(args.models_dir) if args.score else None
+    mapping = schema.map_columns(pd.read_csv(args.csv, nrows=0).columns)
+    if mapping.extra_columns:
+        print(f"📦 Ignoring columns: {', '.join(mapping.extra_columns)}")
+
+    valid = rejected = 0
+    seconds = {"parse": 0.0, "validate": 0.0, "score": 0.0}
+    reject_file = open(args.rejects, "w", newline="") if args.rejects else None
+    line = HEADER_LINES + 1
+    start = time.perf_counter()
+    for df in pd.read_csv(args.csv, usecols=mapping.source_columns, chunksize=args.chunk_rows,
+                          low_memory=False):
+        seconds["parse"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        chunk = schema.validate_frame(df, mapping, line)
+        seconds["validate"] += time.perf_counter() - start
+        line += len(df)
+        valid += len(chunk.X)
+        rejected += chunk.n_rejected
+        if reject_file is not None and chunk.n_rejected:
+            chunk.rejects.to_csv(reject_file, header=reject_file.tell() == 0, index=False)
+
+        if api is not None and len(chunk.X):
+            start = time.perf_counter()
+            api.score_arrays(chunk.X)
+            seconds["score"] += time.perf_counter() - start
+        start = time.perf_counter()
+    if reject_file is not None:
+        reject_file.close()
+
+    rows = valid + rejected
+    print(f"✅ {valid:,} valid rows, {rejected:,} rejected"
+          + (f" (written to {args.rejects})" if args.rejects and rejected else ""))
+    for stage, stage_seconds in seconds.items():
+        if stage != "score" or api is not None:
+            print(f"  {stage.capitalize():<9} {stage_seconds:7.2f}s "
+                  f"({rows / max(stage_seconds, 1e-9):>12,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
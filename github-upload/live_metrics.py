@@ -0,0 +1,243 @@
+"""
+Live Metrics - Time-bucketed scoring aggregates in fixed-size ring buffers
+Fed by the scoring path, read by the app's Live Operations page
+
+Every bucket covers bucket_seconds of wall-clock time and holds counters
+(transactions, flagged, LR/RF disagreements, scoring calls, summed |LR - RF|
+gap), a consensus-score histogram and a call-latency histogram. Buckets sit
+in a ring of fixed length that is reused as time moves on, so recording
+costs O(batch) and reading any window costs O(buckets), however long the
+service has been running.
+
+With a path the ring is a memory-mapped file: a scoring process records
+into it and the Streamlit app reads it from another process. Use one
+writing process per file; readers need no coordination (a refresh may see
+the newest bucket mid-update).
+
+Usage:
+    python load_test.py --rate 200 --duration 600 --live-metrics live_metrics.bin
+    python live_metrics.py live_metrics.bin --window 900
+"""
+
+import argparse
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+
+MAGIC = 0x4644_4C4D  # "FDLM"
+FORMAT_VERSION = 1
+HEADER_WORDS = 8
+DEFAULT_BUCKET_SECONDS = 10
+DEFAULT_BUCKETS = 2160          # six hours of 10-second buckets
+SCORE_BINS = 20
+LATENCY_EDGES = np.logspace(-5, 1, 49)  # 10 us .. 10 s, 8 bins per decade
+PERCENTILES = (50, 95, 99, 99.9)
+GAP_SCALE = 1_000_000           # |LR - RF| sums stored as integer millionths
+
+# Columns of one bucket row, followed by the two histograms
+COUNTERS = ("bucket_id", "transactions", "flagged", "disagreements", "calls", "gap")
+SCORE_OFFSET = len(COUNTERS)
+LATENCY_OFFSET = SCORE_OFFSET + SCORE_BINS
+ROW_WIDTH = LATENCY_OFFSET + len(LATENCY_EDGES) + 1
+
+
+@dataclass
+class LiveSnapshot:
+    """Aggregates over a window of buckets, oldest first"""
+    now: float
+    bucket_seconds: int
+    times: np.ndarray               # bucket start, epoch seconds
+    transactions: np.ndarray
+    flagged: np.ndarray
+    disagreements: np.ndarray
+    calls: np.ndarray
+    mean_gap: np.ndarray            # mean |LR - RF| probability per bucket
+    score_hist: np.ndarray          # consensus scores over the window
+    latency_hist: np.ndarray        # scoring calls over the window
+
+    @property
+    def throughput(self) -> np.ndarray:
+        """Transactions per second in each bucket"""
+        return self.transactions / self.bucket_seconds
+
+    @property
+    def flag_rate(self) -> np.ndarray:
+        return _ratio(self.flagged, self.transactions)
+
+    @property
+    def disagreement_rate(self) -> np.ndarray:
+        return _ratio(self.disagreements, self.transactions)
+
+    def recent(self, seconds: float = 60.0) -> Dict[str, float]:
+        """Totals and rates over the most recent seconds (current bucket included)"""
+        k = max(1, min(len(self.times), math.ceil(seconds / self.bucket_seconds)))
+        elapsed = (k - 1) * self.bucket_seconds + (self.now - self.times[-1])
+        transactions = int(self.transactions[-k:].sum())
+        return {
+            "transactions": transactions,
+            "throughput": float(transactions / max(elapsed, 1e-9)),
+            "flag_rate": float(_ratio(self.flagged[-k:].sum(), transactions)),
+            "disagreement_rate": float(_ratio(self.disagreements[-k:].sum(), transactions)),
+        }
+
+    def latency_ms(self) -> Dict[float, float]:
+        """Call latency percentiles (upper bucket edges) in milliseconds"""
+        return histogram_percentiles(self.latency_hist, LATENCY_EDGES * 1e3)
+
+
+def _ratio(numerator, denominator):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / np.maximum(denominator, 1), np.nan)
+
+
+def histogram_percentiles(counts: np.ndarray, edges: np.ndarray) -> Dict[float, float]:
+    """
+    Percentiles from a histogram with an underflow and an overflow bin
+
+    Returns the upper edge of the bin holding each percentile (the largest
+    edge for the overflow bin), or NaN for an empty histogram.
+    """
+    total = counts.sum()
+    if not total:
+        return {p: float("nan") for p in PERCENTILES}
+    cumulative = np.cumsum(counts)
+    bins = np.searchsorted(cumulative, np.asarray(PERCENTILES) / 100 * total)
+    upper = np.append(edges, edges[-1])
+    return dict(zip(PERCENTILES, upper[bins].tolist()))
+
+
+class LiveMetrics:
+    """Ring of time buckets updated by every scoring call"""
+
+    def __init__(self, path: Optional[str] = None,
+                 bucket_seconds: int = DEFAULT_BUCKET_SECONDS,
+                 buckets: int = DEFAULT_BUCKETS, readonly: bool = False):
+        """
+        Args:
+            path: Memory-mapped file shared with readers (None = in memory);
+                an existing file keeps its own bucket geometry
+            bucket_seconds: Width of one bucket
+            buckets: Ring length (history = buckets * bucket_seconds)
+            readonly: Attach to an existing file for reading only
+
+        Raises:
+            FileNotFoundError: readonly and the file does not exist
+            ValueError: The file is not a live metrics file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+        if path is not None and os.path.exists(path):
+            words = np.memmap(path, dtype=np.int64, mode="r" if readonly else "r+")
+            header = words[:HEADER_WORDS]
+            if header[0] != MAGIC or header[1] != FORMAT_VERSION or header[4] != ROW_WIDTH:
+                raise ValueError(f"{path} is not a live metrics file of this version")
+            bucket_seconds, buckets = int(header[2]), int(header[3])
+        elif readonly:
+            raise FileNotFoundError(path)
+        else:
+            size = HEADER_WORDS + buckets * ROW_WIDTH
+            if path is None:
+                words = np.zeros(size, dtype=np.int64)
+            else:
+                words = np.memmap(path, dtype=np.int64, mode="w+", shape=(size,))
+            words[:5] = (MAGIC, FORMAT_VERSION, bucket_seconds, buckets, ROW_WIDTH)
+
+        self._words = words
+        self.bucket_seconds = bucket_seconds
+        self.buckets = buckets
+        self.table = words[HEADER_WORDS:].reshape(buckets, ROW_WIDTH)
+
+    def record(self, lr_proba, rf_proba, consensus_score, consensus_pred,
+               seconds: float, now: Optional[float] = None):
+        """
+        Add one scoring call
+
+        Args:
+            lr_proba: LR fraud probabilities of the scored rows
+            rf_proba: RF fraud probabilities
+            consensus_score: Blended scores
+            consensus_pred: 0/1 consensus decisions
+            seconds: Wall time the call took
+            now: Epoch time of the call (default: time.time())
+        """
+        lr = np.atleast_1d(np.asarray(lr_proba, dtype=np.float64))
+        rf = np.atleast_1d(np.asarray(rf_proba, dtype=np.float64))
+        score = np.atleast_1d(np.asarray(consensus_score, dtype=np.float64))
+        pred = np.atleast_1d(np.asarray(consensus_pred))
+
+        score_counts = np.bincount(np.clip((score * SCORE_BINS).astype(np.int64),
+                                           0, SCORE_BINS - 1), minlength=SCORE_BINS)
+        flagged = int(np.count_nonzero(pred))
+        disagreements = int(np.count_nonzero((lr > 0.5) != (rf > 0.5)))
+        gap = int(round(float(np.abs(lr - rf).sum()) * GAP_SCALE))
+        latency_bin = LATENCY_OFFSET + int(np.searchsorted(LATENCY_EDGES, seconds))
+
+        bucket = int((time.time() if now is None else now) // self.bucket_seconds)
+        with self._lock:
+            row = self.table[bucket % self.buckets]
+            if row[0] != bucket:  # slot last used one lap ago: start over
+                row[:] = 0
+                row[0] = bucket
+            row[1:6] += (len(lr), flagged, disagreements, 1, gap)
+            row[SCORE_OFFSET:LATENCY_OFFSET] += score_counts
+            row[latency_bin] += 1
+
+    def snapshot(self, window_seconds: float = 3600.0,
+                 now: Optional[float] = None) -> LiveSnapshot:
+        """
+        Aggregates for the buckets covering the last window_seconds
+
+        Buckets without traffic (or overwritten by a later lap) read as zero.
+        """
+        now = time.time() if now is None else now
+        n = max(1, min(self.buckets, math.ceil(window_seconds / self.bucket_seconds)))
+        ids = np.arange(int(now // self.bucket_seconds) - n + 1,
+                        int(now // self.bucket_seconds) + 1)
+        rows = self.table[ids % self.buckets]  # fancy indexing copies
+        rows[rows[:, 0] != ids] = 0
+
+        transactions = rows[:, 1]
+        return LiveSnapshot(
+            now=now,
+            bucket_seconds=self.bucket_seconds,
+            times=ids * self.bucket_seconds,
+            transactions=transactions,
+            flagged=rows[:, 2],
+            disagreements=rows[:, 3],
+            calls=rows[:, 4],
+            mean_gap=_ratio(rows[:, 5] / GAP_SCALE, transactions),
+            score_hist=rows[:, SCORE_OFFSET:LATENCY_OFFSET].sum(axis=0),
+            latency_hist=rows[:, LATENCY_OFFSET:].sum(axis=0),
+        )
+
+    def flush(self):
+        """Write a memory-mapped ring back to its file"""
+        if isinstance(self._words, np.memmap) and self._words.mode != "r":
+            self._words.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print live scoring aggregates")
+    parser.add_argument("path", help="Live metrics file written by a scorer")
+    parser.add_argument("--window", type=float, default=900.0, help="Seconds to summarize")
+    args = parser.parse_args()
+
+    snap = LiveMetrics(args.path, readonly=True).snapshot(args.window)
+    recent = snap.recent(60)
+    total = int(snap.transactions.sum())
+    print(f"📊 Last {args.window:g}s: {total:,} transactions in {int(snap.calls.sum()):,} calls, "
+          f"flag rate {_ratio(snap.flagged.sum(), total):.3%}, "
+          f"LR/RF disagreement {_ratio(snap.disagreements.sum(), total):.3%}")
+    print(f"  Last minute: {recent['throughput']:,.1f} transactions/s, "
+          f"flag rate {recent['flag_rate']:.3%}")
+    print("  Call latency: " + "  ".join(f"p{p} {v:.3f} ms" for p, v in snap.latency_ms().items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+"""
+Load Test - Open-loop synthetic traffic and tail-latency measurement
+Sends transactions at a fixed rate to FraudDetectionAPI or a local HTTP endpoint
+
+Traffic is sampled from the training distribution kept in scaler.pkl
+(per-feature mean and variance), optionally mixed with fraud-like rows that
+are shifted along the Logistic Regression coefficients.
+
+Requests are issued on a fixed schedule (open loop): request i is due at
+start + i / rate whatever happened to earlier requests. Latency is measured
+from the scheduled time, not from the moment a worker got around to
+sending, so time spent queued behind a slow request is counted
+(coordinated-omission correction). Service time (send -> reply) is reported
+alongside for comparison.
+
+Usage:
+    python load_test.py --rate 500 --duration 10
+    python load_test.py --rate 200 --find-saturation --slo-ms 50
+    python load_test.py --serve 8080                       # HTTP endpoint
+    python load_test.py --url http://127.0.0.1:8080/predict --rate 300
+    python load_test.py --batch-scaling --threads 1 2 4 8 --batch-rows 200000
+    python load_test.py --rate 200 --duration 600 --live-metrics live_metrics.bin
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+
+PERCENTILES = (50, 95, 99, 99.9)
+FRAUD_TARGET_LOGIT = 3.0       # mean LR log-odds of fraud-like rows
+NONNEGATIVE_FEATURES = ("Time", "Amount")
+DEFAULT_WORKERS = 16
+SATURATION_THROUGHPUT = 0.95   # achieved / target rate below this = saturated
+DRAIN_SECONDS = 10.0           # extra time allowed to finish the schedule
+
+
+class TrafficGenerator:
+    """Synthetic transactions drawn from the scaler's training statistics"""
+
+    def __init__(self, scaler, feature_names: List[str], lr_model=None,
+                 fraud_fraction: float = 0.0, seed: Optional[int] = None):
+        """
+        Args:
+            scaler: Fitted StandardScaler (mean_ and var_ are used)
+            feature_names: Feature order of the models
+            lr_model: Logistic Regression used to shape fraud-like rows
+            fraud_fraction: Share of rows shifted toward fraud (0-1)
+            seed: Random seed for reproducible traffic
+        """
+        self.mean = np.asarray(scaler.mean_, dtype=np.float64)
+        self.std = np.sqrt(np.asarray(scaler.var_, dtype=np.float64))
+        self.feature_names = list(feature_names)
+        self.fraud_fraction = fraud_fraction
+        self.rng = np.random.default_rng(seed)
+        self.nonnegative = [i for i, name in enumerate(self.feature_names)
+                            if name in NONNEGATIVE_FEATURES]
+
+        # Move fraud-like rows along the coefficient direction far enough that
+        # their mean LR log-odds reach FRAUD_TARGET_LOGIT
+        self.fraud_shift = np.zeros(len(self.mean))
+        if lr_model is not None and fraud_fraction > 0:
+            coef = np.ravel(lr_model.coef_)
+            norm = np.linalg.norm(coef)
+            if norm > 0:
+                intercept = float(np.ravel(lr_model.intercept_)[0])
+                self.fraud_shift = coef / norm * (FRAUD_TARGET_LOGIT - intercept) / norm
+
+    def sample(self, n: int) -> np.ndarray:
+        """Return n raw (unscaled) transactions, shape (n, features)"""
+        z = self.rng.standard_normal((n, len(self.mean)))
+        if self.fraud_fraction > 0:
+            z[self.rng.random(n) < self.fraud_fraction] += self.fraud_shift
+        X = z * self.std + self.mean
+        X[:, self.nonnegative] = np.abs(X[:, self.nonnegative])
+        return X
+
+
+@dataclass
+class LoadResult:
+    """Outcome of one fixed-rate run"""
+    target_rate: float
+    sent: int
+    completed: int
+    errors: int
+    not_started: int                   # still queued when the run was cut off
+    achieved_rate: float
+    latency_ms: Dict[float, float]     # corrected: from scheduled start
+    service_ms: Dict[float, float]     # uncorrected: from actual send
+    max_ms: float
+    late_starts: float                 # share of requests sent > 1 ms late
+    saturated: bool = field(default=False)
+
+
+def in_process_target(api) -> Callable[[np.ndarray, str], None]:
+    """Send one transaction through FraudDetectionAPI.predict_single"""
+    def send(features: np.ndarray, transaction_id: str):
+        api.predict_single(features, transaction_id)
+    return send
+
+
+def http_target(url: str, feature_names: List[str]) -> Callable[[np.ndarray, str], None]:
+    """
+    POST one transaction as JSON ({feature: value, ..., "transaction_id": id})
+
+    Each worker thread keeps its own keep-alive connection.
+    """
+    parsed = urlparse(url)
+    path = parsed.path or "/"
+    local = threading.local()
+
+    def send(features: np.ndarray, transaction_id: str):
+        body = dict(zip(feature_names, features.tolist()))
+        body["transaction_id"] = transaction_id
+        payload = json.dumps(body).encode()
+        for attempt in range(2):  # reconnect once if the server closed the socket
+            conn = getattr(local, "conn", None)
+            if conn is None:
+                conn = local.conn = http.client.HTTPConnection(parsed.hostname,
+                                                               parsed.port or 80, timeout=30)
+            try:
+                conn.request("POST", path, payload, {"Content-Type": "application/json"})
+                response = conn.getresponse()
+                response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                conn.close()
+                local.conn = None
+                if attempt:
+                    raise
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+    return send
+
+
+def _percentiles(values_s: np.ndarray) -> Dict[float, float]:
+    if not len(values_s):
+        return {p: float("nan") for p in PERCENTILES}
+    return dict(zip(PERCENTILES, (np.percentile(values_s, PERCENTILES) * 1e3).tolist()))
+
+
+def run_open_loop(send: Callable[[np.ndarray, str], None], X: np.ndarray, rate: float,
+                  duration: float, workers: int = DEFAULT_WORKERS) -> LoadResult:
+    """
+    Issue requests on a fixed schedule and measure their latency
+
+    Workers take the next scheduled request from a shared counter, wait
+    until it is due and send it. When every worker is busy, due requests
+    start late and the lateness is part of their measured latency, as it
+    would be for real clients arriving at that rate.
+
+    Args:
+        send: Target callable taking (raw features, transaction id)
+        X: Pool of raw transactions, reused cyclically
+        rate: Target requests per second
+        duration: Length of the schedule in seconds
+        workers: Concurrent in-flight requests allowed
+
+    Returns:
+        LoadResult for the run
+    """
+    n = max(int(rate * duration), 1)
+    scheduled = np.arange(n) / rate
+    started = np.full(n, np.nan)
+    finished = np.full(n, np.nan)
+    failed = np.zeros(n, dtype=bool)
+    next_request = itertools.count()
+    cutoff = duration + DRAIN_SECONDS
+    t0 = time.perf_counter() + 0.05
+
+    def worker():
+        while True:
+            i = next(next_request)
+            if i >= n:
+                return
+            now = time.perf_counter() - t0
+            if now > cutoff:
+                return
+            if scheduled[i] > now:
+                time.sleep(scheduled[i] - now)
+            started[i] = time.perf_counter() - t0
+            try:
+                send(X[i % len(X)], f"LT{i:08d}")
+            except Exception:
+                failed[i] = True
+            finished[i] = time.perf_counter() - t0
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    done = ~np.isnan(finished)
+    ok = done & ~failed
+    latency = finished[ok] - scheduled[ok]
+    service = finished[ok] - started[ok]
+    span = np.nanmax(finished) if done.any() else duration
+    return LoadResult(
+        target_rate=rate,
+        sent=int((~np.isnan(started)).sum()),
+        completed=int(ok.sum()),
+        errors=int(failed.sum()),
+        not_started=int(np.isnan(started).sum()),
+        achieved_rate=ok.sum() / max(span, 1e-9),
+        latency_ms=_percentiles(latency),
+        service_ms=_percentiles(service),
+        max_ms=float(latency.max() * 1e3) if len(latency) else float("nan"),
+        late_starts=float(np.mean(started[done] - scheduled[done] > 1e-3)) if done.any() else 0.0,
+    )
+
+
+def is_saturated(result: LoadResult, slo_ms: Optional[float] = None) -> bool:
+    """A run is saturated if it fell behind the schedule or broke the p99 SLO"""
+    behind = (result.not_started > 0 or
+              result.achieved_rate < SATURATION_THROUGHPUT * result.target_rate)
+    over_slo = slo_ms is not None and result.latency_ms[99] > slo_ms
+    return behind or over_slo
+
+
+def find_saturation(send, X: np.ndarray, start_rate: float, duration: float,
+                    workers: int = DEFAULT_WORKERS, step: float = 1.5,
+                    max_rate: float = 100_000, slo_ms: Optional[float] = None
+                    ) -> Tuple[Optional[LoadResult], List[LoadResult]]:
+    """
+    Raise the rate geometrically until the target saturates
+
+    Returns:
+        (last sustainable LoadResult or None, all LoadResults in order)
+    """
+    results, sustainable = [], None
+    rate = start_rate
+    while rate <= max_rate:
+        result = run_open_loop(send, X, rate, duration, workers)
+        result.saturated = is_saturated(result, slo_ms)
+        results.append(result)
+        print_result(result)
+        if result.saturated:
+            break
+        sustainable = result
+        rate *= step
+    return sustainable, results
+
+
+def print_result(result: LoadResult):
+    """Print one run as a single summary line"""
+    lat = result.latency_ms
+    status = "❌ saturated" if result.saturated else "✅"
+    print(f"  {result.target_rate:9,.0f}/s -> {result.achieved_rate:9,.0f}/s  "
+          f"p50 {lat[50]:7.2f}  p95 {lat[95]:7.2f}  p99 {lat[99]:7.2f}  "
+          f"p99.9 {lat[99.9]:8.2f}  max {result.max_ms:8.2f} ms  "
+          f"errors {result.errors}  {status}")
+
+
+def print_report(result: LoadResult):
+    """Print the full breakdown of a single run"""
+    print(f"\n📊 Load test at {result.target_rate:,.0f} requests/s")
+    print(f"  Sent: {result.sent:,}  Completed: {result.completed:,}  "
+          f"Errors: {result.errors:,}  Not started: {result.not_started:,}")
+    print(f"  Throughput: {result.achieved_rate:,.1f} requests/s")
+    print(f"  Late starts (>1 ms behind schedule): {result.late_starts:.1%}")
+    print(f"  {'Percentile':<12}{'Latency (ms)':>14}{'Service (ms)':>14}")
+    for p in PERCENTILES:
+        print(f"  p{p:<11}{result.latency_ms[p]:>14.2f}{result.service_ms[p]:>14.2f}")
+    print(f"  {'max':<12}{result.max_ms:>14.2f}")
+    print("  Latency counts from the scheduled send time (coordinated-omission "
+          "corrected); service time from the actual send.")
+
+
+def available_cores() -> int:
+    """CPU cores this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def batch_scaling(api, X: np.ndarray, thread_counts: Sequence[int],
+                  repeats: int = 5) -> Dict[int, float]:
+    """
+    Measure score_arrays throughput on one large batch per thread count
+
+    Each setting is warmed up once and timed as the best of repeats, with
+    results written into one preallocated output array.
+
+    Returns:
+        {threads: rows per second}
+    """
+    out = np.empty((len(X), 4))
+    throughput = {}
+    for threads in thread_counts:
+        api.score_arrays(X, out=out, threads=threads)
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            api.score_arrays(X, out=out, threads=threads)
+            best = min(best, time.perf_counter() - start)
+        throughput[threads] = len(X) / best
+
+    base = throughput[thread_counts[0]]
+    print(f"\n📊 score_arrays on {len(X):,} rows ({available_cores()} cores available)")
+    print(f"  {'Threads':>7} {'Rows/s':>12} {'Speedup':>8}")
+    for threads, rate in throughput.items():
+        print(f"  {threads:>7} {rate:>12,.0f} {rate / base:>7.2f}x")
+    return throughput
+
+
+def serve(api, port: int, host: str = "127.0.0.1"):
+    """
+    Minimal JSON endpoint for HTTP load tests: POST /predict
+
+    The body is a {feature: value} object with an optional transaction_id;
+    the reply is FraudDetectionAPI.result_to_dict().
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            try:
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                result = api.predict_from_dict(body, str(body.get("transaction_id", "TX001")))
+                status, reply = 200, api.result_to_dict(result)
+            except Exception as e:
+                status, reply = 400, {"error": f"{type(e).__name__}: {e}"}
+            data = json.dumps(reply).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    print(f"✅ Serving POST http://{host}:{port}/predict (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    from model_store import ModelStore
+
+    parser = argparse.ArgumentParser(description="Open-loop load test for fraud scoring")
+    parser.add_argument("--models-dir", default="fraud_detection_models")
+    parser.add_argument("--url", default=None, help="HTTP endpoint (default: in-process API)")
+    parser.add_argument("--rate", type=float, default=200.0, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per run")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--fraud-fraction", type=float, default=0.0)
+    parser.add_argument("--pool", type=int, default=10_000, help="Distinct transactions")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--find-saturation", action="store_true",
+                        help="Step the rate up until the target saturates")
+    parser.add_argument("--step", type=float, default=1.5, help="Rate multiplier per step")
+    parser.add_argument("--max-rate", type=float, default=100_000)
+    parser.add_argument("--slo-ms", type=float, default=None, help="p99 latency limit")
+    parser.add_argument("--batch-scaling", action="store_true",
+                        help="Measure large-batch throughput across --threads instead")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--batch-rows", type=int, default=200_000)
+    parser.add_argument("--serve", type=int, default=None, metavar="PORT",
+                        help="Run the HTTP endpoint instead of a load test")
+    parser.add_argument("--live-metrics", default=None, metavar="PATH",
+                        help="Record in-process scoring for the app's Live Operations page")
+    args = parser.parse_args()
+
+    if args.serve is not None or args.url is None:
+        from fraud_detection_api import FraudDetectionAPI
+        api = FraudDetectionAPI(args.models_dir, live_metrics=args.live_metrics)
+        if args.serve is not None:
+            serve(api, args.serve)
+            return
+        if args.batch_scaling:
+            generator = TrafficGenerator(api.scaler, api.feature_names, api.lr_model,
+                                         args.fraud_fraction, args.seed)
+            batch_scaling(api, generator.sample(args.batch_rows), args.threads)
+            api.close()
+            return
+        send = in_process_target(api)
+        store = api.store
+    else:
+        store = ModelStore(args.models_dir)
+        send = http_target(args.url, store.feature_names)
+
+    generator = TrafficGenerator(store.scaler, store.feature_names, store.lr_model,
+                                 args.fraud_fraction, args.seed)
+    X = generator.sample(args.pool)
+    target = args.url or "in-process FraudDetectionAPI"
+    print(f"🚀 Target: {target}, {args.workers} workers, {args.duration:g}s per run")
+
+    if args.find_saturation:
+        sustainable, _ = find_saturation(send, X, args.rate, args.duration, args.workers,
+                                         args.step, args.max_rate, args.slo_ms)
+        if sustainable is None:
+            print(f"\n⚠️ Saturated already at {args.rate:,.0f} requests/s; "
+                  f"start lower with --rate")
+        else:
+            print(f"\n✅ Saturation point: about {sustainable.target_rate:,.0f} requests/s "
+                  f"(p99 {sustainable.latency_ms[99]:.2f} ms)")
+            print_report(sustainable)
+    else:
+        result = run_open_loop(send, X, args.rate, args.duration, args.workers)
+        result.saturated = is_saturated(result, args.slo_ms)
+        print_report(result)
+        if result.saturated:
+            print("⚠️ Target could not keep up with this rate")
+
+
+if __name__ == "__main__":
+    main()
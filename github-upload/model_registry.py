@@ -0,0 +1,296 @@
+"""
+Model Registry - Segment-routed scoring over several model sets
+Loads versioned model directories once, shares identical artifacts and
+routes every transaction of a batch to its segment's models
+
+Each segment names a model directory (the layout train_pipeline.py writes)
+and an optional range rule on one feature, e.g. Amount >= 1000. Rules are
+tried in order and the first match wins; the one segment without a rule
+takes everything else. Artifacts are keyed by the SHA-256 in each
+manifest, so a scaler, feature list or model shared by several sets is
+unpickled once, and when every set uses the same scaler a batch is
+standardized once.
+
+A batch is routed with whole-column comparisons, grouped by segment with
+one stable argsort, scored in bulk per group and scattered back to input
+order.
+
+Config (JSON):
+    {"segments": [
+        {"name": "high_amount", "models_dir": "models_high_amount",
+         "rule": {"feature": "Amount", "min": 1000}},
+        {"name": "default", "models_dir": "fraud_detection_models"}
+    ]}
+
+Usage:
+    python model_registry.py --config segments.json --csv transactions.csv
+"""
+
+import argparse
+import json
+import os
+import pickle
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from fraud_detection_api import apply_consensus, consensus_policy
+from input_schema import InputSchema
+from model_store import ARTIFACT_FILES, HASH_ALGORITHM, check_artifacts, file_digest, load_manifest
+
+SHARED_ARTIFACTS = ("feature_names", "scaler", "lr_model", "rf_model", "metadata")
+
+
+@dataclass
+class SegmentSpec:
+    """One segment: its model directory and the feature range it covers"""
+    name: str
+    models_dir: str
+    feature: Optional[str] = None   # None = default segment
+    min: float = -np.inf            # inclusive
+    max: float = np.inf             # exclusive
+
+    @classmethod
+    def from_dict(cls, entry: Dict) -> "SegmentSpec":
+        rule = entry.get("rule") or {}
+        return cls(
+            name=entry["name"],
+            models_dir=entry["models_dir"],
+            feature=rule.get("feature"),
+            min=float(rule.get("min", -np.inf)),
+            max=float(rule.get("max", np.inf)),
+        )
+
+
+@dataclass
+class ModelSet:
+    """Loaded artifacts of one model directory (objects may be shared)"""
+    models_dir: str
+    model_version: Optional[str]
+    scaler: Any = field(repr=False)
+    lr_model: Any = field(repr=False)
+    rf_model: Any = field(repr=False)
+    policy: Dict = field(default_factory=dict)
+    digests: Dict[str, str] = field(default_factory=dict)
+
+
+class ModelRegistry:
+    """Several model sets behind one routing, validation and scaling front"""
+
+    def __init__(self, segments: List[SegmentSpec], verify: bool = True):
+        """
+        Args:
+            segments: Segment specs in rule priority order; exactly one
+                must have no rule (the default)
+            verify: Check each directory against its manifest before loading
+
+        Raises:
+            ValueError: On a bad segment list, failed artifact checks or
+                model sets with different feature schemas
+        """
+        defaults = [i for i, s in enumerate(segments) if s.feature is None]
+        if len(defaults) != 1:
+            raise ValueError("Exactly one segment without a rule is required as the default")
+        self.segments = list(segments)
+        self.default_index = defaults[0]
+        self.verify = verify
+        self._artifacts: Dict[str, Any] = {}
+        self.references = 0
+
+        self.model_sets = [self._load_set(s.models_dir) for s in self.segments]
+
+        names = [self._artifacts[m.digests["feature_names"]] for m in self.model_sets]
+        if any(list(n) != list(names[0]) for n in names[1:]):
+            raise ValueError("All model sets must use the same feature names and order")
+        self.feature_names = list(names[0])
+        self.schema = InputSchema(self.feature_names)
+
+        unknown = [s.feature for s in self.segments
+                   if s.feature is not None and s.feature not in self.feature_names]
+        if unknown:
+            raise ValueError(f"Segment rules use unknown features: {unknown}")
+        self._rules = [(i, self.feature_names.index(s.feature), s.min, s.max)
+                       for i, s in enumerate(self.segments) if s.feature is not None]
+
+        scalers = {m.digests["scaler"] for m in self.model_sets}
+        self.shared_scaler = self.model_sets[0].scaler if len(scalers) == 1 else None
+
+    @classmethod
+    def from_config(cls, path: str, verify: bool = True) -> "ModelRegistry":
+        """Build a registry from a JSON config (relative dirs resolve against it)"""
+        with open(path) as f:
+            config = json.load(f)
+        base = os.path.dirname(os.path.abspath(path))
+        segments = []
+        for entry in config["segments"]:
+            spec = SegmentSpec.from_dict(entry)
+            spec.models_dir = os.path.join(base, spec.models_dir)
+            segments.append(spec)
+        return cls(segments, verify)
+
+    @property
+    def unique_artifacts(self) -> int:
+        return len(self._artifacts)
+
+    def _artifact(self, models_dir: str, name: str, digest: str):
+        """Unpickle an artifact unless one with the same digest is loaded"""
+        self.references += 1
+        if digest not in self._artifacts:
+            with open(os.path.join(models_dir, ARTIFACT_FILES[name]), "rb") as f:
+                self._artifacts[digest] = pickle.load(f)
+        return self._artifacts[digest]
+
+    def _load_set(self, models_dir: str) -> ModelSet:
+        if self.verify:
+            failed = [c for c in check_artifacts(models_dir) if not c.ok]
+            if failed:
+                details = ", ".join(f"{c.name} ({c.message})" for c in failed)
+                raise ValueError(f"Artifact check failed in {models_dir}: {details}")
+
+        manifest = load_manifest(models_dir) or {}
+        recorded = manifest.get("artifacts", {})
+        digests = {}
+        for name in SHARED_ARTIFACTS:
+            entry = recorded.get(name)
+            digests[name] = (entry[HASH_ALGORITHM] if entry else
+                             file_digest(os.path.join(models_dir, ARTIFACT_FILES[name])))
+
+        loaded = {name: self._artifact(models_dir, name, digests[name])
+                  for name in SHARED_ARTIFACTS}
+        return ModelSet(
+            models_dir=models_dir,
+            model_version=manifest.get("model_version"),
+            scaler=loaded["scaler"],
+            lr_model=loaded["lr_model"],
+            rf_model=loaded["rf_model"],
+            policy=consensus_policy(loaded["metadata"]),
+            digests=digests,
+        )
+
+    def route(self, features: np.ndarray) -> np.ndarray:
+        """
+        Segment index of every row
+
+        Rules are applied from lowest to highest priority so that the first
+        matching rule in config order ends up winning.
+        """
+        ids = np.full(len(features), self.default_index, dtype=np.intp)
+        for index, column, low, high in reversed(self._rules):
+            values = features[:, column]
+            ids[(values >= low) & (values < high)] = index
+        return ids
+
+    def score_arrays(self, features: np.ndarray,
+                     out: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Route, score each segment in bulk and return results in input order
+
+        Args:
+            features: Array of shape (rows, features)
+            out: Optional preallocated (rows, 4) float64 array to fill
+
+        Returns:
+            ((rows, 4) array of LR probability, RF probability, consensus
+            score, consensus prediction; segment index per row)
+        """
+        X = self.schema.check(features)
+        segments = self.route(X)
+        if out is None:
+            out = np.empty((len(X), 4))
+        X_scaled = self.shared_scaler.transform(X) if self.shared_scaler is not None else None
+
+        order = np.argsort(segments, kind="stable")
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(segments,
+                                                            minlength=len(self.segments)))))
+        for index, model_set in enumerate(self.model_sets):
+            start, end = bounds[index], bounds[index + 1]
+            if start == end:
+                continue
+            if end - start == len(X):  # the whole batch is one segment
+                rows, target = slice(None), out
+            else:
+                rows = order[start:end]
+                target = np.empty((end - start, 4))
+            if X_scaled is not None:
+                part = X_scaled[rows]
+            else:
+                part = model_set.scaler.transform(X[rows])
+            target[:, 0] = model_set.lr_model.predict_proba(part)[:, 1]
+            target[:, 1] = model_set.rf_model.predict_proba(part)[:, 1]
+            target[:, 2], target[:, 3] = apply_consensus(target[:, 0], target[:, 1],
+                                                          model_set.policy)
+            if target is not out:
+                out[rows] = target
+        return out, segments
+
+    def describe(self) -> List[Dict]:
+        """One summary dict per segment: rule, directory, version, digests"""
+        summary = []
+        for spec, model_set in zip(self.segments, self.model_sets):
+            rule = (f"{spec.min:g} <= {spec.feature} < {spec.max:g}"
+                    if spec.feature is not None else "default")
+            summary.append({
+                "segment": spec.name,
+                "rule": rule,
+                "models_dir": model_set.models_dir,
+                "model_version": model_set.model_version,
+                "digests": {k: v[:12] for k, v in model_set.digests.items()},
+            })
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Segment-routed scoring with several model sets")
+    parser.add_argument("--config", required=True, help="Segment config JSON")
+    parser.add_argument("--csv", default=None, help="Transactions to score")
+    parser.add_argument("--out", default=None, help="Write line, segment and scores here")
+    parser.add_argument("--rejects", default=None)
+    parser.add_argument("--no-verify", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    registry = ModelRegistry.from_config(args.config, verify=not args.no_verify)
+    print(f"✅ Loaded {len(registry.segments)} segments in {time.perf_counter() - start:.1f}s "
+          f"({registry.unique_artifacts} unique artifacts for {registry.references} references"
+          f"{', shared scaler' if registry.shared_scaler is not None else ''})")
+    for entry in registry.describe():
+        print(f"  {entry['segment']:<16} {entry['rule']:<32} version {entry['model_version']}")
+
+    if not args.csv:
+        return
+
+    import pandas as pd
+
+    counts = np.zeros(len(registry.segments), dtype=np.int64)
+    flagged = np.zeros(len(registry.segments), dtype=np.int64)
+    seconds, written = 0.0, False
+    for chunk in registry.schema.iter_file(args.csv, reject_path=args.rejects):
+        if not len(chunk.X):
+            continue
+        start = time.perf_counter()
+        scores, segments = registry.score_arrays(chunk.X)
+        seconds += time.perf_counter() - start
+        counts += np.bincount(segments, minlength=len(counts))
+        flagged += np.bincount(segments, weights=scores[:, 3],
+                               minlength=len(counts)).astype(np.int64)
+        if args.out:
+            pd.DataFrame({
+                "line": chunk.lines,
+                "segment": np.asarray([s.name for s in registry.segments])[segments],
+                "lr_probability": scores[:, 0],
+                "rf_probability": scores[:, 1],
+                "consensus_score": scores[:, 2],
+                "consensus_prediction": scores[:, 3].astype(int),
+            }).to_csv(args.out, mode="a" if written else "w", header=not written, index=False)
+            written = True
+
+    print(f"\n📊 Scored {counts.sum():,} rows in {seconds:.2f}s "
+          f"({counts.sum() / max(seconds, 1e-9):,.0f} rows/s)")
+    for spec, n, n_flagged in zip(registry.segments, counts, flagged):
+        print(f"  {spec.name:<16} {n:>10,} rows  {n_flagged:>8,} flagged")
+
+
+if __name__ == "__main__":
+    main()
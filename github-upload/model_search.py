@@ -0,0 +1,275 @@
+"""
+Model Search - Parallel hyperparameter and tree-count search
+Forests are grown with warm_start, so one training per configuration scores
+every tree count; each candidate is reported with AUC/F1 and inference latency
+
+Usage:
+    python model_search.py --csv creditcard.csv --trees 10 20 30 50 100 200
+"""
+
+import argparse
+import copy
+import itertools
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from train_pipeline import DEFAULT_CACHE_DIR, DEFAULT_CSV, load_dataset, preprocess
+
+DEFAULT_TREE_COUNTS = (10, 20, 30, 50, 100, 200)
+DEFAULT_MAX_DEPTHS = (None, 12)
+DEFAULT_LR_C = (0.1, 1.0, 10.0)
+DEFAULT_LR_MAX_ITER = (100, 1000)
+
+
+@dataclass
+class Candidate:
+    """One evaluated model configuration"""
+    model: str
+    params: Dict
+    auc: float
+    f1: float
+    fit_seconds: float
+    single_latency_ms: float = float("nan")
+    batch_latency_us: float = float("nan")
+    pareto: bool = False
+
+
+def _load_split(split_dir: str):
+    """Memory-map the shared train/test arrays written by the parent"""
+    return tuple(np.load(os.path.join(split_dir, f"{name}.npy"), mmap_mode="r")
+                 for name in ("X_train", "X_test", "y_train", "y_test"))
+
+
+def _search_forest(split_dir: str, tree_counts: Sequence[int], max_depth: Optional[int],
+                   random_state: int):
+    """
+    Grow one forest through all tree counts with warm_start
+
+    Returns:
+        (fitted forest, list of per-count Candidate results)
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import f1_score, roc_auc_score
+
+    X_train, X_test, y_train, y_test = _load_split(split_dir)
+    model = RandomForestClassifier(n_estimators=0, max_depth=max_depth, warm_start=True,
+                                   random_state=random_state, n_jobs=1)
+
+    # Per-tree fraud probabilities on the test set, accumulated as trees are added
+    proba_sum = np.zeros(len(y_test))
+    results = []
+    fit_seconds = 0.0
+    prev_trees = 0
+    for n_trees in sorted(tree_counts):
+        start = time.perf_counter()
+        model.set_params(n_estimators=n_trees)
+        model.fit(X_train, y_train)
+        fit_seconds += time.perf_counter() - start
+
+        for tree in model.estimators_[prev_trees:]:
+            proba_sum += tree.predict_proba(X_test)[:, 1]
+        prev_trees = n_trees
+        proba = proba_sum / n_trees
+
+        results.append(Candidate(
+            model="random_forest",
+            params={"n_estimators": n_trees, "max_depth": max_depth},
+            auc=float(roc_auc_score(y_test, proba)),
+            f1=float(f1_score(y_test, (proba > 0.5).astype(int))),
+            fit_seconds=fit_seconds,
+        ))
+    return model, results
+
+
+def _search_logistic(split_dir: str, C: float, max_iter: int, random_state: int):
+    """
+    Fit one Logistic Regression configuration
+
+    Returns:
+        (fitted model, [Candidate])
+    """
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import f1_score, roc_auc_score
+
+    X_train, X_test, y_train, y_test = _load_split(split_dir)
+    start = time.perf_counter()
+    model = LogisticRegression(C=C, max_iter=max_iter, random_state=random_state)
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    proba = model.predict_proba(X_test)[:, 1]
+    return model, [Candidate(
+        model="logistic_regression",
+        params={"C": C, "max_iter": max_iter},
+        auc=float(roc_auc_score(y_test, proba)),
+        f1=float(f1_score(y_test, model.predict(X_test))),
+        fit_seconds=fit_seconds,
+    )]
+
+
+def measure_latency(model, X: np.ndarray, single_repeats: int = 200,
+                    batch_rows: int = 10_000) -> Dict[str, float]:
+    """
+    Measure single-row and batch predict_proba latency
+
+    Returns:
+        {"single_latency_ms": median per call, "batch_latency_us": per row}
+    """
+    X = np.ascontiguousarray(X[:batch_rows], dtype=np.float64)
+    row = X[:1]
+    model.predict_proba(row)  # warm-up
+
+    timings = []
+    for _ in range(single_repeats):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    model.predict_proba(X)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        "single_latency_ms": float(np.median(timings) * 1e3),
+        "batch_latency_us": batch_seconds / len(X) * 1e6,
+    }
+
+
+def _forest_prefix(model, n_trees: int):
+    """Return a shallow copy of a fitted forest that uses its first n_trees trees"""
+    prefix = copy.copy(model)
+    prefix.estimators_ = model.estimators_[:n_trees]
+    prefix.n_estimators = n_trees
+    prefix.n_jobs = 1
+    return prefix
+
+
+def pareto_front(candidates: List[Candidate]) -> List[Candidate]:
+    """
+    Mark candidates that no candidate of the same model family beats on
+    both AUC and latency
+
+    The front is computed per family: Logistic Regression is faster and
+    smaller than any forest, so a joint front would never keep a tree count.
+
+    Returns:
+        Pareto-optimal candidates of all families sorted by single-row latency
+    """
+    front = []
+    for model in sorted({c.model for c in candidates}):
+        family = [c for c in candidates if c.model == model]
+        best_auc = -np.inf
+        for c in sorted(family, key=lambda c: (c.single_latency_ms, -c.auc)):
+            c.pareto = c.auc > best_auc
+            if c.pareto:
+                best_auc = c.auc
+                front.append(c)
+    return sorted(front, key=lambda c: c.single_latency_ms)
+
+
+def run_search(csv_path: str = DEFAULT_CSV, cache_dir: str = DEFAULT_CACHE_DIR,
+               tree_counts: Sequence[int] = DEFAULT_TREE_COUNTS,
+               max_depths: Sequence[Optional[int]] = DEFAULT_MAX_DEPTHS,
+               lr_C: Sequence[float] = DEFAULT_LR_C,
+               lr_max_iter: Sequence[int] = DEFAULT_LR_MAX_ITER,
+               workers: Optional[int] = None, random_state: int = 42) -> List[Candidate]:
+    """
+    Train all candidates in a process pool and measure their latency
+
+    The train/test split is written once to .npy files that workers
+    memory-map, so no matrices are pickled to the pool. Latency is measured
+    in the parent after training finishes, one model at a time, so workers
+    competing for cores do not skew it.
+
+    Args:
+        csv_path: Labeled transactions CSV
+        cache_dir: Binary dataset cache directory
+        tree_counts: Forest sizes to evaluate (one warm-started fit per depth)
+        max_depths: Forest max_depth values (None = unlimited)
+        lr_C: Logistic Regression inverse regularization strengths
+        lr_max_iter: Logistic Regression iteration limits
+        workers: Process pool size (default: CPU count)
+        random_state: Seed for the split and models
+
+    Returns:
+        All candidates with pareto flags set
+    """
+    ds = load_dataset(csv_path, cache_dir)
+    _, X_train, X_test, y_train, y_test = preprocess(ds.X, ds.y, random_state=random_state)
+
+    candidates = []
+    with tempfile.TemporaryDirectory() as split_dir:
+        for name, arr in (("X_train", X_train), ("X_test", X_test),
+                          ("y_train", y_train), ("y_test", y_test)):
+            np.save(os.path.join(split_dir, f"{name}.npy"), arr)
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_search_forest, split_dir, tree_counts, depth, random_state)
+                       for depth in max_depths]
+            futures += [pool.submit(_search_logistic, split_dir, C, it, random_state)
+                        for C, it in itertools.product(lr_C, lr_max_iter)]
+
+            trained = [future.result() for future in futures]
+
+    for model, results in trained:
+        for c in results:
+            timed = (_forest_prefix(model, c.params["n_estimators"])
+                     if c.model == "random_forest" else model)
+            c.__dict__.update(measure_latency(timed, X_test))
+            candidates.append(c)
+            print(f"  {c.model:<20} {json.dumps(c.params):<40} "
+                  f"AUC {c.auc:.4f}  F1 {c.f1:.4f}  "
+                  f"{c.single_latency_ms:.2f} ms/call")
+
+    pareto_front(candidates)
+    return candidates
+
+
+def print_report(candidates: List[Candidate]):
+    """Print all candidates sorted by latency, marking the Pareto front"""
+    print("\n" + "=" * 100)
+    print(f"{'':2}{'model':<20} {'params':<40} {'AUC':>7} {'F1':>7} "
+          f"{'fit s':>7} {'ms/call':>8} {'us/row':>7}")
+    print("=" * 100)
+    for c in sorted(candidates, key=lambda c: c.single_latency_ms):
+        mark = "★ " if c.pareto else "  "
+        print(f"{mark}{c.model:<20} {json.dumps(c.params):<40} {c.auc:7.4f} {c.f1:7.4f} "
+              f"{c.fit_seconds:7.1f} {c.single_latency_ms:8.2f} {c.batch_latency_us:7.2f}")
+    print("\n★ = on its model family's AUC / single-call latency Pareto front")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel model and tree-count search")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--trees", type=int, nargs="+", default=list(DEFAULT_TREE_COUNTS))
+    parser.add_argument("--max-depth", type=int, nargs="+", default=None,
+                        help="Forest depths to try; 0 means unlimited")
+    parser.add_argument("--lr-c", type=float, nargs="+", default=list(DEFAULT_LR_C))
+    parser.add_argument("--lr-max-iter", type=int, nargs="+", default=list(DEFAULT_LR_MAX_ITER))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--random-state", type=int, default=42)
+    parser.add_argument("--report", default=None, help="Write candidates to this JSON file")
+    args = parser.parse_args()
+
+    max_depths = (DEFAULT_MAX_DEPTHS if args.max_depth is None
+                  else [d or None for d in args.max_depth])
+    candidates = run_search(args.csv, args.cache_dir, args.trees, max_depths, args.lr_c,
+                            args.lr_max_iter, args.workers, args.random_state)
+    print_report(candidates)
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump([asdict(c) for c in candidates], f, indent=2)
+        print(f"\n✅ Report saved to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
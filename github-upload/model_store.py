@@ -0,0 +1,361 @@
+"""
+Model Store - Lazy, thread-safe access to the pickled model artifacts
+Small artifacts load on first use, the Random Forest can load in a background thread
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# Artifact name -> pickle file inside the models directory
+ARTIFACT_FILES = {
+    "lr_model": "logistic_regression_model.pkl",
+    "rf_model": "random_forest_model.pkl",
+    "scaler": "scaler.pkl",
+    "metadata": "model_metadata.pkl",
+    "feature_names": "feature_names.pkl",
+}
+
+# Artifacts that are cheap enough to load before the first page renders
+LIGHT_ARTIFACTS = ("metadata", "feature_names", "scaler", "lr_model")
+
+PICKLE_STOP_OPCODE = b"."
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+HASH_ALGORITHM = "sha256"
+HASH_CHUNK_SIZE = 1 << 20
+
+
+@dataclass
+class ArtifactCheck:
+    """Result of a structural (non-loading) artifact check"""
+    name: str
+    path: str
+    size_bytes: int
+    ok: bool
+    message: str = ""
+
+
+def file_digest(path: str, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """
+    Hash a file in fixed-size chunks so memory stays flat for large models
+
+    Args:
+        path: File to hash
+        chunk_size: Bytes read per iteration
+
+    Returns:
+        Hex digest using HASH_ALGORITHM
+    """
+    h = hashlib.new(HASH_ALGORITHM)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def write_manifest(models_dir: str = "fraud_detection_models",
+                   feature_names: Optional[List[str]] = None,
+                   model_version: Optional[str] = None) -> Dict:
+    """
+    Record size and content hash of every artifact in manifest.json
+
+    Call this after all pickle files have been written.
+
+    Args:
+        models_dir: Directory containing pickle files
+        feature_names: Ordered feature columns the models were trained on
+        model_version: Version label; defaults to the current timestamp
+
+    Returns:
+        The manifest dictionary that was written
+    """
+    artifacts = {}
+    for name, fname in ARTIFACT_FILES.items():
+        path = os.path.join(models_dir, fname)
+        artifacts[name] = {
+            "file": fname,
+            "size_bytes": os.path.getsize(path),
+            HASH_ALGORITHM: file_digest(path),
+        }
+
+    manifest = {
+        "manifest_version": MANIFEST_VERSION,
+        "model_version": model_version or datetime.now().strftime("%Y%m%d-%H%M%S"),
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "hash_algorithm": HASH_ALGORITHM,
+        "feature_schema": {
+            "names": list(feature_names) if feature_names is not None else None,
+            "num_features": len(feature_names) if feature_names is not None else None,
+        },
+        "artifacts": artifacts,
+    }
+
+    with open(os.path.join(models_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+def load_manifest(models_dir: str = "fraud_detection_models") -> Optional[Dict]:
+    """
+    Read manifest.json from the models directory
+
+    Returns:
+        Manifest dictionary, or None if the directory has no manifest
+    """
+    path = os.path.join(models_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def update_metadata(models_dir: str, updates: Dict) -> Dict:
+    """
+    Merge keys into model_metadata.pkl and refresh the manifest
+
+    The artifacts are verified first so a corrupt file is never re-hashed
+    into a valid-looking manifest.
+
+    Args:
+        models_dir: Directory containing pickle files
+        updates: Keys to set in the metadata dictionary
+
+    Returns:
+        The updated metadata dictionary
+    """
+    failed = [check for check in check_artifacts(models_dir) if not check.ok]
+    if failed:
+        raise ValueError(f"Refusing to update metadata, artifact checks failed: "
+                         f"{[(c.name, c.message) for c in failed]}")
+
+    metadata_path = os.path.join(models_dir, ARTIFACT_FILES["metadata"])
+    with open(metadata_path, "rb") as f:
+        metadata = pickle.load(f)
+
+    metadata.update(updates)
+    with open(metadata_path, "wb") as f:
+        pickle.dump(metadata, f)
+
+    manifest = load_manifest(models_dir) or {}
+    write_manifest(models_dir, manifest.get("feature_schema", {}).get("names"),
+                   manifest.get("model_version"))
+    return metadata
+
+
+def _check_pickle_structure(name: str, path: str) -> ArtifactCheck:
+    """Check size, pickle protocol header and trailing STOP opcode"""
+    if not os.path.exists(path):
+        return ArtifactCheck(name, path, 0, False, "missing")
+
+    size = os.path.getsize(path)
+    if size < 2:
+        return ArtifactCheck(name, path, size, False, "empty file")
+
+    with open(path, "rb") as f:
+        header = f.read(2)
+        f.seek(-1, os.SEEK_END)
+        trailer = f.read(1)
+
+    if header[0:1] != b"\x80" or header[1] > pickle.HIGHEST_PROTOCOL:
+        return ArtifactCheck(name, path, size, False, "not a pickle file")
+    if trailer != PICKLE_STOP_OPCODE:
+        return ArtifactCheck(name, path, size, False, "truncated pickle")
+    return ArtifactCheck(name, path, size, True, f"protocol {header[1]}")
+
+
+def check_artifacts(models_dir: str = "fraud_detection_models",
+                    verify_hashes: bool = True) -> List[ArtifactCheck]:
+    """
+    Verify model artifacts without unpickling them
+
+    When the directory has a manifest.json, every file must match its
+    recorded size and (with verify_hashes) content hash, and the hashed
+    feature_names.pkl must match the manifest's feature schema (the only
+    artifact unpickled, as it is a short list). Without a manifest only
+    the pickle header and trailing STOP opcode are inspected.
+
+    Args:
+        models_dir: Directory containing pickle files
+        verify_hashes: Stream-hash each file against the manifest
+
+    Returns:
+        List of ArtifactCheck results, one per expected artifact
+    """
+    try:
+        manifest = load_manifest(models_dir)
+    except (OSError, ValueError) as e:
+        path = os.path.join(models_dir, MANIFEST_FILE)
+        return [ArtifactCheck("manifest", path, 0, False, f"unreadable manifest: {e}")]
+
+    results = []
+    for name, fname in ARTIFACT_FILES.items():
+        path = os.path.join(models_dir, fname)
+        check = _check_pickle_structure(name, path)
+        if not check.ok or manifest is None:
+            results.append(check)
+            continue
+
+        entry = manifest.get("artifacts", {}).get(name)
+        algorithm = manifest.get("hash_algorithm", HASH_ALGORITHM)
+        if entry is None:
+            check.ok, check.message = False, "not listed in manifest"
+        elif entry.get("size_bytes") != check.size_bytes:
+            check.ok = False
+            check.message = f"size mismatch (expected {entry.get('size_bytes')} bytes)"
+        elif verify_hashes:
+            if not entry.get(algorithm):
+                check.ok, check.message = False, "manifest entry has no hash"
+            elif file_digest(path) != entry[algorithm]:
+                check.ok, check.message = False, f"{algorithm} mismatch"
+            else:
+                check.message = f"{algorithm} ok"
+        else:
+            check.message = "size ok"
+        if check.ok and verify_hashes and name == "feature_names":
+            _check_feature_schema(check, manifest.get("feature_schema") or {})
+        results.append(check)
+
+    return results
+
+
+def _check_feature_schema(check: ArtifactCheck, schema: Dict):
+    """Compare feature_names.pkl with the manifest's recorded feature names"""
+    expected = schema.get("names")
+    if expected is None:
+        return
+    try:
+        with open(check.path, "rb") as f:
+            names = list(pickle.load(f))
+    except Exception as e:
+        check.ok, check.message = False, f"unreadable feature names: {e}"
+        return
+    if len(names) != len(expected):
+        check.ok = False
+        check.message = (f"feature schema mismatch ({len(names)} features, "
+                         f"manifest lists {len(expected)})")
+    elif names != list(expected):
+        first = next(i for i, (a, b) in enumerate(zip(names, expected)) if a != b)
+        check.ok = False
+        check.message = (f"feature schema mismatch (position {first}: {names[first]!r}, "
+                         f"manifest has {expected[first]!r})")
+    else:
+        check.message += f", {len(names)} features match schema"
+
+
+class ModelStore:
+    """
+    Lazily loads model artifacts and caches them for the process lifetime
+
+    Every artifact is loaded at most once; concurrent callers asking for the
+    same artifact wait on a per-artifact lock instead of unpickling twice.
+    """
+
+    def __init__(self, models_dir: str = "fraud_detection_models"):
+        """
+        Initialize store without touching the disk
+
+        Args:
+            models_dir: Directory containing pickle files
+        """
+        self.models_dir = Path(models_dir)
+        self.load_times: Dict[str, float] = {}
+        self._artifacts: Dict[str, object] = {}
+        self._locks = {name: threading.Lock() for name in ARTIFACT_FILES}
+        self._threads: List[threading.Thread] = []
+        self._errors: Dict[str, Exception] = {}
+
+    def get(self, name: str):
+        """
+        Return an artifact, loading it on first access
+
+        Args:
+            name: Artifact name (key of ARTIFACT_FILES)
+
+        Returns:
+            The unpickled artifact
+        """
+        if name in self._artifacts:
+            return self._artifacts[name]
+
+        with self._locks[name]:
+            if name not in self._artifacts:
+                start = time.perf_counter()
+                try:
+                    with open(self.models_dir / ARTIFACT_FILES[name], "rb") as f:
+                        self._artifacts[name] = pickle.load(f)
+                except Exception as e:
+                    self._errors[name] = e
+                    raise
+                self.load_times[name] = time.perf_counter() - start
+                self._errors.pop(name, None)
+
+        return self._artifacts[name]
+
+    def preload(self, names: Iterable[str] = ("rf_model",),
+                background: bool = True) -> Optional[threading.Thread]:
+        """
+        Load artifacts ahead of first use
+
+        Args:
+            names: Artifact names to load
+            background: Load in a daemon thread instead of blocking
+
+        Returns:
+            The loader thread when background=True, else None
+        """
+        names = [n for n in names if n not in self._artifacts]
+
+        def _load_all():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception:
+                    # Recorded in self._errors; re-raised on the next get()
+                    pass
+
+        if not background:
+            _load_all()
+            return None
+
+        thread = threading.Thread(target=_load_all, name="model-preload", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        return thread
+
+    def is_loaded(self, name: str) -> bool:
+        """Check whether an artifact is already in memory"""
+        return name in self._artifacts
+
+    def error(self, name: str) -> Optional[Exception]:
+        """Return the last load error for an artifact, if any"""
+        return self._errors.get(name)
+
+    @property
+    def lr_model(self):
+        return self.get("lr_model")
+
+    @property
+    def rf_model(self):
+        return self.get("rf_model")
+
+    @property
+    def scaler(self):
+        return self.get("scaler")
+
+    @property
+    def metadata(self):
+        return self.get("metadata")
+
+    @property
+    def feature_names(self):
+        return self.get("feature_names")
@@ -0,0 +1,277 @@
+"""
+Policy Tuning - Offline threshold and LR/RF blend tuning for the consensus
+Scores a labeled file once, caches both models' probabilities and sweeps
+thousands of (lr_weight, threshold) policies with sorted cumulative counts
+
+Usage:
+    python policy_tuning.py --csv creditcard.csv --test-split --objective f1 --write
+"""
+
+import argparse
+import os
+import pickle
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from fraud_detection_api import consensus_policy
+from model_store import ARTIFACT_FILES, ModelStore, load_manifest, update_metadata
+from train_pipeline import DEFAULT_CACHE_DIR, DEFAULT_CSV, DEFAULT_MODELS_DIR, load_dataset
+
+OBJECTIVES = ("f1", "cost", "recall_at_precision")
+SCORE_CACHE_PREFIX = "scores"
+
+
+@dataclass
+class PolicyResult:
+    """Confusion-matrix summary of one consensus policy"""
+    lr_weight: float
+    threshold: float
+    precision: float
+    recall: float
+    f1: float
+    fpr: float
+    cost: float
+    flagged: int
+
+
+def score_file(csv_path: str = DEFAULT_CSV, models_dir: str = DEFAULT_MODELS_DIR,
+               cache_dir: str = DEFAULT_CACHE_DIR, test_split: bool = False,
+               test_size: float = 0.2, random_state: int = 42) -> Tuple[np.ndarray, ...]:
+    """
+    Score a labeled file with both models, reusing cached probabilities
+
+    The cache key combines the file hash, the model version from the
+    manifest and the split settings, so new models or data rescore.
+
+    Args:
+        csv_path: Labeled transactions CSV
+        models_dir: Directory containing pickle files
+        cache_dir: Binary dataset cache directory
+        test_split: Only use the rows train_pipeline held out for testing
+        test_size: Test fraction used by train_pipeline
+        random_state: Split seed used by train_pipeline
+
+    Returns:
+        (lr_proba, rf_proba, y) as float64/float64/int8 arrays
+    """
+    ds = load_dataset(csv_path, cache_dir)
+    manifest = load_manifest(models_dir) or {}
+    version = str(manifest.get("model_version", "unversioned")).replace(":", "")
+    split = f"test{test_size}-{random_state}" if test_split else "all"
+    cache_path = os.path.join(cache_dir, f"{SCORE_CACHE_PREFIX}-{ds.source_hash[:16]}-"
+                                         f"{version}-{split}.npz")
+
+    if os.path.exists(cache_path):
+        cached = np.load(cache_path)
+        return cached["lr_proba"], cached["rf_proba"], cached["y"]
+
+    rows = np.arange(len(ds.y))
+    if test_split:
+        from sklearn.model_selection import train_test_split
+        # Same shuffle as train_pipeline.preprocess, applied to row indices
+        _, rows = train_test_split(rows, test_size=test_size,
+                                   random_state=random_state, stratify=ds.y)
+        rows = np.sort(rows)
+
+    store = ModelStore(models_dir)
+    start = time.perf_counter()
+    X_scaled = store.scaler.transform(ds.X[rows])
+    lr_proba = store.lr_model.predict_proba(X_scaled)[:, 1]
+    rf_proba = store.rf_model.predict_proba(X_scaled)[:, 1]
+    y = np.asarray(ds.y[rows])
+    print(f"✅ Scored {len(y):,} rows with both models in {time.perf_counter() - start:.1f}s")
+
+    os.makedirs(cache_dir, exist_ok=True)
+    np.savez(cache_path, lr_proba=lr_proba, rf_proba=rf_proba, y=y)
+    return lr_proba, rf_proba, y
+
+
+def sweep_policies(lr_proba: np.ndarray, rf_proba: np.ndarray, y: np.ndarray,
+                   weights: np.ndarray, thresholds: np.ndarray,
+                   fp_cost: float = 1.0, fn_cost: float = 10.0) -> Dict[str, np.ndarray]:
+    """
+    Evaluate every (weight, threshold) pair without rescoring
+
+    For each weight the blended scores are sorted once; the number of
+    frauds and legitimate rows above every threshold then comes from one
+    searchsorted over the sorted scores plus cumulative label counts.
+
+    Args:
+        lr_proba: LR fraud probabilities
+        rf_proba: RF fraud probabilities
+        y: True labels
+        weights: Candidate lr_weight values
+        thresholds: Candidate decision thresholds (flag when score > threshold)
+        fp_cost: Cost of flagging a legitimate transaction
+        fn_cost: Cost of missing a fraud
+
+    Returns:
+        Dict of (len(weights), len(thresholds)) arrays: tp, fp, precision,
+        recall, f1, fpr, cost
+    """
+    y = np.asarray(y, dtype=bool)
+    n, n_pos = len(y), int(y.sum())
+    n_neg = n - n_pos
+
+    tp = np.empty((len(weights), len(thresholds)), dtype=np.int64)
+    flagged = np.empty_like(tp)
+    for i, w in enumerate(weights):
+        scores = w * lr_proba + (1.0 - w) * rf_proba
+        order = np.argsort(scores, kind="stable")
+        sorted_scores = scores[order]
+        # cum_pos[k] = frauds among the k lowest scores
+        cum_pos = np.concatenate(([0], np.cumsum(y[order])))
+        below = np.searchsorted(sorted_scores, thresholds, side="right")
+        tp[i] = n_pos - cum_pos[below]
+        flagged[i] = n - below
+
+    fp = flagged - tp
+    fn = n_pos - tp
+    precision = np.divide(tp, flagged, out=np.zeros(tp.shape), where=flagged > 0)
+    recall = tp / max(n_pos, 1)
+    denom = precision + recall
+    f1 = np.divide(2 * precision * recall, denom, out=np.zeros(tp.shape), where=denom > 0)
+
+    return {
+        "tp": tp,
+        "fp": fp,
+        "flagged": flagged,
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "fpr": fp / max(n_neg, 1),
+        "cost": fp * fp_cost + fn * fn_cost,
+    }
+
+
+def select_policy(sweep: Dict[str, np.ndarray], weights: np.ndarray,
+                  thresholds: np.ndarray, objective: str = "f1",
+                  min_precision: float = 0.5) -> Optional[PolicyResult]:
+    """
+    Pick the best policy from a sweep
+
+    Args:
+        sweep: Output of sweep_policies
+        weights: lr_weight grid used for the sweep
+        thresholds: Threshold grid used for the sweep
+        objective: "f1" (max F1), "cost" (min expected cost) or
+            "recall_at_precision" (max recall with precision >= min_precision)
+        min_precision: Precision floor for recall_at_precision
+
+    Returns:
+        The selected PolicyResult, or None for recall_at_precision when no
+        policy reaches min_precision
+    """
+    if objective == "f1":
+        flat = np.argmax(sweep["f1"])
+    elif objective == "cost":
+        flat = np.argmin(sweep["cost"])
+    elif objective == "recall_at_precision":
+        eligible = sweep["precision"] >= min_precision
+        if not eligible.any():
+            return None
+        flat = np.argmax(np.where(eligible, sweep["recall"], -1.0))
+    else:
+        raise ValueError(f"objective must be one of {OBJECTIVES}, got {objective!r}")
+
+    i, j = np.unravel_index(flat, sweep["f1"].shape)
+    return _policy_at(sweep, weights, thresholds, i, j)
+
+
+def _policy_at(sweep: Dict[str, np.ndarray], weights: np.ndarray,
+               thresholds: np.ndarray, i: int, j: int) -> PolicyResult:
+    """Build a PolicyResult from one cell of the sweep"""
+    return PolicyResult(
+        lr_weight=round(float(weights[i]), 6),
+        threshold=round(float(thresholds[j]), 6),
+        precision=float(sweep["precision"][i, j]),
+        recall=float(sweep["recall"][i, j]),
+        f1=float(sweep["f1"][i, j]),
+        fpr=float(sweep["fpr"][i, j]),
+        cost=float(sweep["cost"][i, j]),
+        flagged=int(sweep["flagged"][i, j]),
+    )
+
+
+def write_policy(policy: PolicyResult, models_dir: str = DEFAULT_MODELS_DIR,
+                 objective: str = "f1", source: Optional[str] = None) -> Dict:
+    """
+    Store the policy in model_metadata.pkl and refresh the manifest
+
+    Returns:
+        The updated metadata dictionary
+    """
+    return update_metadata(models_dir, {"consensus_policy": {
+        "lr_weight": policy.lr_weight,
+        "threshold": policy.threshold,
+        "objective": objective,
+        "precision": policy.precision,
+        "recall": policy.recall,
+        "f1": policy.f1,
+        "tuned_on": source,
+        "tuned_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the consensus threshold and blend")
+    parser.add_argument("--csv", default=DEFAULT_CSV, help="Labeled transactions CSV")
+    parser.add_argument("--models-dir", default=DEFAULT_MODELS_DIR)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--test-split", action="store_true",
+                        help="Only use the rows train_pipeline held out for testing")
+    parser.add_argument("--objective", choices=OBJECTIVES, default="f1")
+    parser.add_argument("--min-precision", type=float, default=0.5)
+    parser.add_argument("--fp-cost", type=float, default=1.0)
+    parser.add_argument("--fn-cost", type=float, default=10.0)
+    parser.add_argument("--weight-steps", type=int, default=21)
+    parser.add_argument("--threshold-steps", type=int, default=1001)
+    parser.add_argument("--write", action="store_true",
+                        help="Store the selected policy in model_metadata.pkl")
+    args = parser.parse_args()
+
+    lr_proba, rf_proba, y = score_file(args.csv, args.models_dir, args.cache_dir,
+                                       args.test_split)
+    weights = np.linspace(0.0, 1.0, args.weight_steps)
+    thresholds = np.linspace(0.0, 1.0, args.threshold_steps)
+
+    start = time.perf_counter()
+    sweep = sweep_policies(lr_proba, rf_proba, y, weights, thresholds,
+                           args.fp_cost, args.fn_cost)
+    best = select_policy(sweep, weights, thresholds, args.objective, args.min_precision)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Evaluated {len(weights) * len(thresholds):,} policies in {elapsed * 1e3:.0f} ms")
+
+    # Current policy, snapped to the grid, for comparison
+    with open(os.path.join(args.models_dir, ARTIFACT_FILES["metadata"]), "rb") as f:
+        current = consensus_policy(pickle.load(f))
+    i = int(np.abs(weights - current["lr_weight"]).argmin())
+    j = int(np.abs(thresholds - current["threshold"]).argmin())
+
+    print(f"\n{'policy':<10} {'lr_weight':>9} {'threshold':>9} {'precision':>9} "
+          f"{'recall':>7} {'F1':>7} {'FPR':>8} {'cost':>9} {'flagged':>8}")
+    rows = [("current", _policy_at(sweep, weights, thresholds, i, j))]
+    if best is not None:
+        rows.append(("selected", best))
+    for label, p in rows:
+        print(f"{label:<10} {p.lr_weight:9.2f} {p.threshold:9.3f} {p.precision:9.4f} "
+              f"{p.recall:7.4f} {p.f1:7.4f} {p.fpr:8.5f} {p.cost:9.1f} {p.flagged:8,}")
+
+    if best is None:
+        print(f"\n❌ No policy reaches precision {args.min_precision:.3f} (best reached: "
+              f"{sweep['precision'].max():.4f}); nothing selected"
+              + (", metadata left unchanged" if args.write else ""))
+        sys.exit(1)
+    if args.write:
+        write_policy(best, args.models_dir, args.objective, os.path.basename(args.csv))
+        print(f"\n✅ Policy written to {args.models_dir}/model_metadata.pkl")
+    else:
+        print(f"\nRun with --write to store the selected policy: {asdict(best)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,11 @@ import os
 import sys
 import subprocess
 
+from model_store import MANIFEST_FILE, check_artifacts
+
 def main():
     # Change to app directory
-    app_dir = r"d:\credit card\archive (5)"
+    app_dir = os.path.dirname(os.path.abspath(__file__))
     os.chdir(app_dir)
     
     print("=" * 60)
@@ -32,28 +34,22 @@ def main():
         print(f"  Expected: {models_dir}")
         sys.exit(1)
     
-    # Check for required pickle files
-    required_files = [
-        "logistic_regression_model.pkl",
-        "random_forest_model.pkl",
-        "scaler.pkl",
-        "model_metadata.pkl",
-        "feature_names.pkl"
-    ]
-    
+    # Check required pickle files against the artifact manifest
     print(f"\n✓ Models directory found")
-    missing = []
-    for fname in required_files:
-        fpath = os.path.join(models_dir, fname)
-        if os.path.exists(fpath):
-            size_mb = os.path.getsize(fpath) / (1024 * 1024)
-            print(f"  ✓ {fname} ({size_mb:.2f} MB)")
+    if not os.path.exists(os.path.join(models_dir, MANIFEST_FILE)):
+        print(f"  ⚠ {MANIFEST_FILE} not found - checking pickle structure only")
+    
+    failed = []
+    for check in check_artifacts(models_dir):
+        if check.ok:
+            size_mb = check.size_bytes / (1024 * 1024)
+            print(f"  ✓ {os.path.basename(check.path)} ({size_mb:.2f} MB, {check.message})")
         else:
-            print(f"  ✗ {fname} (MISSING)")
-            missing.append(fname)
+            print(f"  ✗ {os.path.basename(check.path)} ({check.message.upper()})")
+            failed.append(os.path.basename(check.path))
     
-    if missing:
-        print(f"\n✗ Missing required files: {missing}")
+    if failed:
+        print(f"\n✗ Missing or corrupt model files: {failed}")
         print("  Please run the notebook Cell 14 to generate models")
         sys.exit(1)
     
@@ -45,30 +45,27 @@ def install_dependencies():
         return False
 
 def verify_models():
-    """Verify that all model files exist"""
+    """Verify model files against the artifact manifest"""
     print_header("Verifying Model Files")
     
-    models_dir = Path("models")
-    required_files = [
-        "logistic_regression_model.pkl",
-        "random_forest_model.pkl",
-        "scaler.pkl",
-        "model_metadata.json",
-        "feature_names.pkl"
-    ]
+    from model_store import MANIFEST_FILE, check_artifacts
+    
+    models_dir = Path("fraud_detection_models")
+    if not (models_dir / MANIFEST_FILE).exists():
+        print(f"⚠️  {MANIFEST_FILE} not found - checking pickle structure only")
     
-    all_exist = True
-    for file in required_files:
-        file_path = models_dir / file
-        if file_path.exists():
-            size = file_path.stat().st_size / (1024 * 1024)  # Size in MB
-            print(f"✅ {file} ({size:.2f} MB)")
+    all_ok = True
+    for check in check_artifacts(str(models_dir)):
+        file = Path(check.path).name
+        if check.ok:
+            size = check.size_bytes / (1024 * 1024)  # Size in MB
+            print(f"✅ {file} ({size:.2f} MB, {check.message})")
         else:
-            print(f"❌ {file} - NOT FOUND")
-            all_exist = False
+            print(f"❌ {file} - {check.message.upper()}")
+            all_ok = False
     
-    if not all_exist:
-        print("\n⚠️  Some model files are missing!")
+    if not all_ok:
+        print("\n⚠️  Some model files are missing or corrupt!")
         print("   Please run main.ipynb to train and save models.")
         return False
     
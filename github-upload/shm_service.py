@@ -0,0 +1,497 @@
+"""
+Shared-Memory Scoring Service - Zero-copy batch scoring for co-located processes
+Feature rows and results live in multiprocessing.shared_memory ring buffers
+
+The service creates one ring per client. Each ring has `slots` request
+slots; a slot holds up to max_rows feature rows (float32 or float64), a
+paired (max_rows, 4) float64 result block (LR, RF, consensus score,
+consensus prediction) and one uint8 input_schema flag per row. A client writes features straight into a slot,
+bumps the ring's submitted counter, and reads results in place once the
+completed counter passes its ticket, so nothing is pickled or copied
+between processes.
+
+Rows that fail the schema checks (missing, infinite or out-of-range
+values) get their flags set and NaN results; the rest of the ticket is
+still scored. A ticket only fails as a whole if scoring itself raises,
+and the exception text is left in the slot for the client.
+
+Each ring is single-producer / single-consumer, so the counters need no
+locks: only the client writes `submitted` and only the service writes
+`completed`, each as one aligned 8-byte store.
+
+Usage:
+    python shm_service.py --rings 4          # run the service
+    python shm_service.py --benchmark        # compare with pickled IPC
+"""
+
+import argparse
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+MAGIC = 0x46445348  # "FDSH"
+HEADER_FIELDS = ("magic", "slots", "max_rows", "n_features", "itemsize",
+                 "submitted", "completed", "closed")
+HEADER_BYTES = 64
+SLOT_CONTROL_BYTES = 16  # int64 n_rows, int64 status
+SLOT_MESSAGE_BYTES = 240  # UTF-8 error text when status is STATUS_ERROR
+SLOT_HEADER_BYTES = SLOT_CONTROL_BYTES + SLOT_MESSAGE_BYTES
+RESULT_COLUMNS = 4
+STATUS_OK, STATUS_ERROR = 0, 1
+DTYPES = {4: np.float32, 8: np.float64}
+
+DEFAULT_SLOTS = 8
+DEFAULT_MAX_ROWS = 65_536
+SPIN_CHECKS = 200
+MIN_SLEEP = 20e-6
+MAX_SLEEP = 1e-3
+
+
+def _align(n: int, to: int = 64) -> int:
+    return (n + to - 1) // to * to
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing block without letting this process unlink it at exit"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13: skip resource tracker registration
+        from multiprocessing import resource_tracker
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class ShmRing:
+    """
+    Typed views over one ring's shared memory block
+
+    Layout: 64-byte int64 header, then per slot a 16-byte control word and
+    240-byte error message, the feature block, the result block and the
+    row flags, each 64-byte aligned.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray(len(HEADER_FIELDS), dtype=np.int64, buffer=shm.buf)
+        if self.header[0] != MAGIC:
+            raise ValueError(f"{shm.name} is not a scoring ring")
+        self.slots, self.max_rows, self.n_features, itemsize = (int(v) for v in self.header[1:5])
+        self.dtype = DTYPES[itemsize]
+
+        feature_bytes = _align(self.max_rows * self.n_features * itemsize)
+        result_bytes = _align(self.max_rows * RESULT_COLUMNS * 8)
+        slot_bytes = self.slot_bytes(self.max_rows, self.n_features, itemsize)
+
+        self.control, self.messages, self.features, self.results, self.flags = [], [], [], [], []
+        for i in range(self.slots):
+            base = HEADER_BYTES + i * slot_bytes
+            self.control.append(np.ndarray(2, np.int64, shm.buf, base))
+            self.messages.append(np.ndarray(SLOT_MESSAGE_BYTES, np.uint8, shm.buf,
+                                            base + SLOT_CONTROL_BYTES))
+            base += SLOT_HEADER_BYTES
+            self.features.append(np.ndarray((self.max_rows, self.n_features), self.dtype,
+                                            shm.buf, base))
+            self.results.append(np.ndarray((self.max_rows, RESULT_COLUMNS), np.float64, shm.buf,
+                                           base + feature_bytes))
+            self.flags.append(np.ndarray(self.max_rows, np.uint8, shm.buf,
+                                         base + feature_bytes + result_bytes))
+
+    @staticmethod
+    def slot_bytes(max_rows: int, n_features: int, itemsize: int) -> int:
+        return (SLOT_HEADER_BYTES + _align(max_rows * n_features * itemsize)
+                + _align(max_rows * RESULT_COLUMNS * 8) + _align(max_rows))
+
+    @classmethod
+    def size(cls, slots: int, max_rows: int, n_features: int, itemsize: int) -> int:
+        return HEADER_BYTES + slots * cls.slot_bytes(max_rows, n_features, itemsize)
+
+    @classmethod
+    def create(cls, name: Optional[str], slots: int, max_rows: int, n_features: int,
+               dtype=np.float64) -> "ShmRing":
+        itemsize = np.dtype(dtype).itemsize
+        shm = shared_memory.SharedMemory(name=name, create=True,
+                                         size=cls.size(slots, max_rows, n_features, itemsize))
+        header = np.ndarray(len(HEADER_FIELDS), dtype=np.int64, buffer=shm.buf)
+        header[:] = [MAGIC, slots, max_rows, n_features, itemsize, 0, 0, 0]
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "ShmRing":
+        return cls(_attach(name), owner=False)
+
+    @property
+    def submitted(self) -> int:
+        return int(self.header[5])
+
+    @property
+    def completed(self) -> int:
+        return int(self.header[6])
+
+    @property
+    def closed(self) -> bool:
+        return bool(self.header[7])
+
+    def close(self):
+        # Views must go before the buffer can be released
+        self.header = self.control = self.messages = self.features = None
+        self.results = self.flags = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _wait(predicate, timeout: Optional[float]) -> bool:
+    """
+    Spin briefly, then poll with exponentially growing sleeps
+
+    The backoff caps the added latency at MAX_SLEEP while keeping an idle
+    waiter from taking CPU away from the scorer on small hosts.
+    """
+    for _ in range(SPIN_CHECKS):
+        if predicate():
+            return True
+    deadline = None if timeout is None else time.monotonic() + timeout
+    sleep = MIN_SLEEP
+    while not predicate():
+        if deadline is not None and time.monotonic() > deadline:
+            return False
+        time.sleep(sleep)
+        sleep = min(sleep * 2, MAX_SLEEP)
+    return True
+
+
+class ScoringService:
+    """
+    Scores batches submitted through shared-memory rings with FraudDetectionAPI
+
+    One background thread polls every ring and scores each submitted slot
+    in place with api.score_arrays(..., out=result view). Rows failing
+    api.schema.row_flags are flagged and left as NaN instead of failing
+    the slot. Give each client process its own ring name from ring_names.
+    """
+
+    def __init__(self, api, rings: int = 1, slots: int = DEFAULT_SLOTS,
+                 max_rows: int = DEFAULT_MAX_ROWS, dtype=np.float64, prefix: str = "fdscore"):
+        """
+        Args:
+            api: Loaded FraudDetectionAPI
+            rings: Number of client rings to create
+            slots: Requests that may be in flight per ring
+            max_rows: Largest batch per request
+            dtype: Feature dtype clients write (np.float32 or np.float64)
+            prefix: Shared memory name prefix
+        """
+        self.api = api
+        n_features = len(api.feature_names)
+        self.rings: List[ShmRing] = [
+            ShmRing.create(f"{prefix}-{i}", slots, max_rows, n_features, dtype)
+            for i in range(rings)
+        ]
+        self.ring_names = [ring.shm.name for ring in self.rings]
+        self.processed = [0] * rings
+        self.batches = 0
+        self.rows = 0
+        self.rejected = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="shm-scorer", daemon=True)
+
+    def start(self) -> "ScoringService":
+        self._thread.start()
+        return self
+
+    def _pending(self) -> bool:
+        return any(ring.submitted > done for ring, done in zip(self.rings, self.processed))
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not _wait(lambda: self._pending() or self._stop.is_set(), timeout=None):
+                continue
+            for r, ring in enumerate(self.rings):
+                while ring.submitted > self.processed[r]:
+                    slot = self.processed[r] % ring.slots
+                    control = ring.control[slot]
+                    n = int(control[0])
+                    try:
+                        self._score_slot(ring, slot, n)
+                        control[1] = STATUS_OK
+                    except Exception as e:
+                        message = f"{type(e).__name__}: {e}".encode()[:SLOT_MESSAGE_BYTES]
+                        ring.messages[slot][:] = 0
+                        ring.messages[slot][:len(message)] = np.frombuffer(message, np.uint8)
+                        control[1] = STATUS_ERROR
+                    self.processed[r] += 1
+                    ring.header[6] = self.processed[r]
+                    self.batches += 1
+                    self.rows += min(max(n, 0), ring.max_rows)
+
+    def _score_slot(self, ring: ShmRing, slot: int, n: int):
+        """Flag invalid rows, then score the rest into the slot's result view"""
+        if not 0 < n <= ring.max_rows:
+            raise ValueError(f"Slot holds {n} rows; expected 1 to {ring.max_rows}")
+        X = ring.features[slot][:n]
+        out = ring.results[slot][:n]
+        flags = ring.flags[slot][:n]
+        flags[:] = self.api.schema.row_flags(X)
+        valid = flags == 0
+        if valid.all():
+            self.api.score_arrays(X, out=out)
+            return
+        out[~valid] = np.nan
+        if valid.any():
+            out[valid] = self.api.score_arrays(X[valid])
+        self.rejected += int(n - valid.sum())
+
+    def stop(self):
+        """Stop scoring, mark rings closed and release the shared memory"""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        for ring in self.rings:
+            ring.header[7] = 1
+            ring.close()
+
+
+class ScoringClient:
+    """
+    Client side of one ring
+
+    Zero-copy use:
+        view = client.reserve(n)          # (n, features) view into shared memory
+        view[:] = ...                     # write features in place
+        ticket = client.submit(n)
+        results = client.result(ticket)   # (n, 4) view, valid until release
+        flags = client.flags(ticket)      # (n,) input_schema flags, 0 = scored
+        client.release(ticket)
+    """
+
+    def __init__(self, ring_name: str):
+        self.ring = ShmRing.attach(ring_name)
+        self.submitted = self.ring.submitted
+        self.released = self.submitted
+        self._reserved: Optional[Tuple[int, int]] = None  # (ticket, rows) from reserve()
+
+    def _slot(self, ticket: int) -> int:
+        return ticket % self.ring.slots
+
+    def reserve(self, n_rows: int, timeout: Optional[float] = None) -> np.ndarray:
+        """Wait for a free slot and return its feature view for n_rows rows"""
+        if not 0 < n_rows <= self.ring.max_rows:
+            raise ValueError(f"Batch of {n_rows} rows; expected 1 to ring max_rows "
+                             f"{self.ring.max_rows}")
+        if not _wait(lambda: self.submitted - self.released < self.ring.slots, timeout):
+            raise TimeoutError("No free slot; release() finished tickets")
+        self._reserved = (self.submitted, n_rows)
+        return self.ring.features[self._slot(self.submitted)][:n_rows]
+
+    def submit(self, n_rows: int) -> int:
+        """
+        Hand the reserved slot to the service; returns its ticket
+
+        Raises:
+            RuntimeError: Without a reserve() for this slot, or once the service stopped
+            ValueError: If n_rows is outside 1 to the reserved row count
+        """
+        if self.ring.closed:
+            raise RuntimeError("Scoring service has stopped")
+        ticket = self.submitted
+        if self._reserved is None or self._reserved[0] != ticket:
+            raise RuntimeError("submit() needs a reserve() for the next slot first")
+        if not 0 < n_rows <= self._reserved[1]:
+            raise ValueError(f"Submitting {n_rows} rows; reserved {self._reserved[1]}")
+        self._reserved = None
+        self.ring.control[self._slot(ticket)][0] = n_rows
+        self.submitted += 1
+        self.ring.header[5] = self.submitted
+        return ticket
+
+    def result(self, ticket: int, timeout: Optional[float] = 30.0) -> np.ndarray:
+        """
+        Wait for a ticket and return its (rows, 4) result view
+
+        Rejected rows hold NaN; see flags() for the reason.
+
+        Raises:
+            RuntimeError: If scoring the ticket raised, with the service's message
+        """
+        if not _wait(lambda: self.ring.completed > ticket or self.ring.closed, timeout):
+            raise TimeoutError(f"Ticket {ticket} not scored within {timeout}s")
+        control = self.ring.control[self._slot(ticket)]
+        if self.ring.completed <= ticket:
+            raise RuntimeError("Scoring service has stopped")
+        if control[1] != STATUS_OK:
+            message = self.ring.messages[self._slot(ticket)].tobytes().rstrip(b"\0")
+            raise RuntimeError(f"Scoring failed for ticket {ticket}: "
+                               f"{message.decode(errors='replace')}")
+        return self.ring.results[self._slot(ticket)][:int(control[0])]
+
+    def flags(self, ticket: int) -> np.ndarray:
+        """Per-row input_schema flags of a finished ticket (0 = scored)"""
+        return self.ring.flags[self._slot(ticket)][:int(self.ring.control[self._slot(ticket)][0])]
+
+    def release(self, ticket: int):
+        """Free the slots up to and including ticket for reuse"""
+        self.released = max(self.released, ticket + 1)
+
+    def score(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Copy a batch in, score it and return copies of its results and flags
+
+        Returns:
+            ((rows, 4) results with NaN for rejected rows, (rows,) uint8 flags;
+            input_schema.describe_flags turns nonzero flags into reasons)
+        """
+        features = np.atleast_2d(features)
+        self.reserve(len(features))[:] = features
+        ticket = self.submit(len(features))
+        results = self.result(ticket).copy()
+        flags = self.flags(ticket).copy()
+        self.release(ticket)
+        return results, flags
+
+    def close(self):
+        self.ring.close()
+
+
+# ==================== BENCHMARK ====================
+
+def _pickle_server(conn, models_dir: str):
+    # Exceptions go back over the pipe; otherwise the parent blocks in recv()
+    try:
+        from fraud_detection_api import FraudDetectionAPI
+        api = FraudDetectionAPI(models_dir)
+    except Exception as e:
+        conn.send(e)
+        return
+    conn.send("ready")
+    while True:
+        X = conn.recv()
+        if X is None:
+            return
+        try:
+            conn.send(api.score_arrays(X))
+        except Exception as e:
+            conn.send(e)
+
+
+def _pipe_reply(conn):
+    reply = conn.recv()
+    if isinstance(reply, Exception):
+        raise RuntimeError(f"Pickle server failed: {type(reply).__name__}: {reply}") from reply
+    return reply
+
+
+def _shm_client(ring_name: str, X: np.ndarray, repeats: int, queue):
+    client = ScoringClient(ring_name)
+    try:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            view = client.reserve(len(X))
+            view[:] = X
+            ticket = client.submit(len(X))
+            client.result(ticket)
+            client.release(ticket)
+        queue.put(time.perf_counter() - start)
+    except Exception as e:
+        queue.put(e)
+    finally:
+        client.close()
+
+
+def benchmark(models_dir: str = "fraud_detection_models", rows: int = 20_000,
+              repeats: int = 20) -> Tuple[float, float]:
+    """
+    Time the same batches through a pickled Pipe and through a ring
+
+    Returns:
+        (pipe seconds per batch, shared memory seconds per batch)
+    """
+    import multiprocessing as mp
+    from fraud_detection_api import FraudDetectionAPI
+    from load_test import TrafficGenerator
+
+    api = FraudDetectionAPI(models_dir)
+    X = TrafficGenerator(api.scaler, api.feature_names, seed=0).sample(rows)
+
+    parent, child = mp.Pipe()
+    server = mp.Process(target=_pickle_server, args=(child, models_dir))
+    server.start()
+    try:
+        _pipe_reply(parent)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            parent.send(X)
+            _pipe_reply(parent)
+        pipe_seconds = (time.perf_counter() - start) / repeats
+    finally:
+        if server.is_alive():
+            parent.send(None)
+        server.join()
+
+    service = ScoringService(api, rings=1, max_rows=rows).start()
+    queue = mp.Queue()
+    client = mp.Process(target=_shm_client, args=(service.ring_names[0], X, repeats, queue))
+    client.start()
+    try:
+        elapsed = queue.get()
+        client.join()
+    finally:
+        service.stop()
+    if isinstance(elapsed, Exception):
+        raise RuntimeError(f"Ring client failed: {type(elapsed).__name__}: {elapsed}") from elapsed
+    shm_seconds = elapsed / repeats
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        api.score_arrays(X)
+    local_seconds = (time.perf_counter() - start) / repeats
+
+    print(f"\n📊 {rows:,}-row batches ({X.nbytes / 1e6:.1f} MB of features):")
+    print(f"  In-process scoring: {local_seconds * 1e3:8.1f} ms")
+    print(f"  Pickled Pipe:       {pipe_seconds * 1e3:8.1f} ms "
+          f"(transport {(pipe_seconds - local_seconds) * 1e3:+.1f} ms)")
+    print(f"  Shared memory ring: {shm_seconds * 1e3:8.1f} ms "
+          f"(transport {(shm_seconds - local_seconds) * 1e3:+.1f} ms)")
+    return pipe_seconds, shm_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared-memory scoring service")
+    parser.add_argument("--models-dir", default="fraud_detection_models")
+    parser.add_argument("--rings", type=int, default=1)
+    parser.add_argument("--slots", type=int, default=DEFAULT_SLOTS)
+    parser.add_argument("--max-rows", type=int, default=DEFAULT_MAX_ROWS)
+    parser.add_argument("--float32", action="store_true", help="Clients write float32 features")
+    parser.add_argument("--prefix", default="fdscore")
+    parser.add_argument("--benchmark", action="store_true")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.models_dir)
+        return
+
+    from fraud_detection_api import FraudDetectionAPI
+    api = FraudDetectionAPI(args.models_dir)
+    service = ScoringService(api, args.rings, args.slots, args.max_rows,
+                             np.float32 if args.float32 else np.float64, args.prefix).start()
+    print(f"✅ Scoring service ready on rings: {', '.join(service.ring_names)}")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"  {service.batches:,} batches, {service.rows:,} rows scored, "
+                  f"{service.rejected:,} rejected")
+    except KeyboardInterrupt:
+        service.stop()
+        print("✅ Service stopped")
+
+
+if __name__ == "__main__":
+    main()
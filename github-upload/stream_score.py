@@ -0,0 +1,392 @@
+"""
+Stream Scoring - Score NDJSON or CSV records from stdin or a tailed file
+Micro-batches by size and time, scores vectorized, writes NDJSON in input order
+
+Three threads are joined by bounded queues: reader -> scorer -> writer.
+When the consumer of stdout is slow the writer blocks, the queues fill up
+and the reader stops reading, so backpressure reaches the producer and
+memory stays bounded by (queue_batches * batch_size) records per queue.
+
+Usage:
+    cat transactions.ndjson | python stream_score.py > scored.ndjson
+    python stream_score.py --input transactions.csv --follow --max-wait-ms 20
+"""
+
+import argparse
+import io
+import itertools
+import json
+import math
+import os
+import queue
+import sys
+import threading
+import time
+from typing import List, Optional, TextIO
+
+import numpy as np
+
+from input_schema import describe_flags
+
+FORMATS = ("auto", "ndjson", "csv")
+ID_FIELDS = ("transaction_id", "id")
+DEFAULT_BATCH_SIZE = 1024
+DEFAULT_MAX_WAIT_MS = 50.0
+DEFAULT_QUEUE_BATCHES = 8
+FOLLOW_POLL_SECONDS = 0.2
+
+_EOF = object()
+
+
+class _Stop(Exception):
+    """Raised inside a stage when another stage has shut the pipeline down"""
+
+
+class StreamScorer:
+    """
+    Reader / micro-batching scorer / writer pipeline around FraudDetectionAPI
+
+    A single scorer thread consumes batches in arrival order, so output
+    order always matches input order. Records that cannot be parsed are
+    answered in place with {"line": n, "error": ...}.
+    """
+
+    def __init__(self, api, fmt: str = "auto", batch_size: int = DEFAULT_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+                 queue_batches: int = DEFAULT_QUEUE_BATCHES):
+        """
+        Args:
+            api: Loaded FraudDetectionAPI
+            fmt: "ndjson", "csv" or "auto" (decided by the first line)
+            batch_size: Most records scored together
+            max_wait_ms: Longest a record waits for its batch to fill
+            queue_batches: Batches each queue may hold before blocking
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"format must be one of {FORMATS}, got {fmt!r}")
+        self.api = api
+        self.feature_names = list(api.feature_names)
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.lines: "queue.Queue" = queue.Queue(queue_batches * batch_size)
+        self.results: "queue.Queue" = queue.Queue(queue_batches)
+        self.csv_header: Optional[List[str]] = None
+        self.stopped = threading.Event()
+        self.error: Optional[BaseException] = None
+        self.records = 0
+        self.errors = 0
+
+    # ---------- helpers ----------
+
+    def _put(self, q: queue.Queue, item):
+        """Blocking put that gives up when the pipeline is stopping"""
+        while True:
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if self.stopped.is_set():
+                    raise _Stop()
+
+    def _get(self, q: queue.Queue, timeout: Optional[float] = None):
+        """Blocking get that gives up when the pipeline is stopping"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if wait <= 0:
+                raise queue.Empty()
+            try:
+                return q.get(timeout=wait)
+            except queue.Empty:
+                if self.stopped.is_set():
+                    raise _Stop()
+
+    # ---------- reader ----------
+
+    def read_stream(self, stream: TextIO, first_number: int = 1):
+        """Feed lines from a finite stream (stdin or a file)"""
+        try:
+            for number, line in enumerate(stream, first_number):
+                if line.strip():
+                    self._put(self.lines, (number, line))
+            self._put(self.lines, _EOF)
+        except _Stop:
+            pass
+
+    def follow_file(self, path: str, from_start: bool = True):
+        """Feed lines appended to a growing file, like tail -f (until stopped)"""
+        try:
+            f = open(path, "r")
+            if not from_start:
+                f.seek(0, os.SEEK_END)
+            number, partial = 0, ""
+            while not self.stopped.is_set():
+                chunk = f.readline()
+                if not chunk:
+                    if os.path.getsize(path) < f.tell():  # truncated or rotated
+                        f.close()
+                        f = open(path, "r")
+                        partial = ""
+                    time.sleep(FOLLOW_POLL_SECONDS)
+                    continue
+                partial += chunk
+                if not partial.endswith("\n"):
+                    continue  # wait for the rest of the line
+                number += 1
+                if partial.strip():
+                    self._put(self.lines, (number, partial))
+                partial = ""
+            f.close()
+        except _Stop:
+            pass
+
+    # ---------- scorer ----------
+
+    def _next_batch(self) -> Optional[list]:
+        """Collect up to batch_size lines, waiting at most max_wait after the first"""
+        first = self._get(self.lines)
+        if first is _EOF:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            try:
+                item = self._get(self.lines, max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                break
+            if item is _EOF:
+                self.lines.put(_EOF)  # seen again after this batch
+                break
+            batch.append(item)
+        return batch
+
+    def _check_first_line(self, line: str) -> bool:
+        """
+        Fix the format from the first record and check a CSV header
+
+        Returns:
+            True if the line is the CSV header (it is not a record)
+
+        Raises:
+            SchemaError: If the CSV header is missing feature columns
+        """
+        if self.fmt == "auto":
+            self.fmt = "ndjson" if line.lstrip().startswith("{") else "csv"
+        if self.fmt != "csv" or self.csv_header is not None:
+            return False
+        header = [c.strip() for c in line.strip().split(",")]
+        self.api.schema.map_columns(header)
+        self.csv_header = header
+        return True
+
+    def _parse_ndjson(self, batch):
+        ids, rows, errors = [], [], {}
+        names = self.feature_names
+        for i, (number, line) in enumerate(batch):
+            try:
+                record = json.loads(line)
+                rows.append([float(record[name]) for name in names])
+                ids.append(next((record[f] for f in ID_FIELDS if f in record), number))
+            except (ValueError, KeyError, TypeError) as e:
+                errors[i] = f"{type(e).__name__}: {e}"
+                rows.append([math.nan] * len(names))
+                ids.append(number)
+        return ids, np.asarray(rows, dtype=np.float64), errors
+
+    def _parse_csv(self, batch):
+        import pandas as pd
+
+        df = pd.read_csv(io.StringIO("".join(line for _, line in batch)), header=None,
+                         names=self.csv_header, dtype=str, on_bad_lines="skip",
+                         skip_blank_lines=False)
+        X = df[self.feature_names].apply(pd.to_numeric, errors="coerce").to_numpy(np.float64)
+        if len(X) != len(batch):  # a malformed line was dropped; parse one by one
+            return self._parse_csv_lines(batch) + (batch,)
+
+        id_column = next((f for f in ID_FIELDS if f in self.csv_header), None)
+        ids = (df[id_column].tolist() if id_column else [number for number, _ in batch])
+        bad = np.flatnonzero(np.isnan(X).any(axis=1))
+        errors = {i: "non-numeric or missing feature" for i in bad}
+        return ids, X, errors, batch
+
+    def _parse_csv_lines(self, batch):
+        ids, rows, errors = [], [], {}
+        index = [self.csv_header.index(name) for name in self.feature_names]
+        id_column = next((self.csv_header.index(f) for f in ID_FIELDS if f in self.csv_header),
+                         None)
+        for i, (number, line) in enumerate(batch):
+            values = line.rstrip("\n").split(",")
+            try:
+                rows.append([float(values[j]) for j in index])
+                ids.append(values[id_column] if id_column is not None else number)
+            except (ValueError, IndexError) as e:
+                errors[i] = f"{type(e).__name__}: {e}"
+                rows.append([math.nan] * len(index))
+                ids.append(number)
+        return ids, np.asarray(rows, dtype=np.float64), errors
+
+    def _format(self, batch, ids, scores, errors) -> str:
+        out = []
+        for i, (number, _) in enumerate(batch):
+            if i in errors:
+                out.append(json.dumps({"line": number, "error": errors[i]}))
+                continue
+            lr, rf, score, pred = scores[i]
+            out.append(f'{{"transaction_id": {json.dumps(ids[i])}, "lr_probability": {lr:.6g}, '
+                       f'"rf_probability": {rf:.6g}, "consensus_score": {score:.6g}, '
+                       f'"is_fraud": {"true" if pred else "false"}}}')
+        return "\n".join(out) + "\n" if out else ""
+
+    def score_batches(self):
+        """Scorer loop: parse, score and hand formatted batches to the writer"""
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    break
+                if self.fmt == "auto" or (self.fmt == "csv" and self.csv_header is None):
+                    if self._check_first_line(batch[0][1]):
+                        batch = batch[1:]
+                        if not batch:
+                            continue
+                if self.fmt == "ndjson":
+                    ids, X, errors = self._parse_ndjson(batch)
+                else:
+                    ids, X, errors, batch = self._parse_csv(batch)
+                if not batch:
+                    continue
+
+                # Range checks the parsers do not cover (e.g. negative Amount)
+                flags = self.api.schema.row_flags(X)
+                flags[list(errors)] = 0
+                bad = np.flatnonzero(flags)
+                errors.update(zip(bad.tolist(), describe_flags(flags[bad])))
+
+                valid = np.ones(len(X), dtype=bool)
+                valid[list(errors)] = False
+                scores = np.zeros((len(X), 4))
+                if valid.any():
+                    scores[valid] = self.api.score_arrays(
+                        X[valid], [str(ids[i]) for i in np.flatnonzero(valid)])
+                self.records += len(batch)
+                self.errors += len(errors)
+                self._put(self.results, self._format(batch, ids, scores, errors))
+            self._put(self.results, _EOF)
+        except _Stop:
+            pass
+        except Exception as e:
+            # Kept for run() to raise; the writer still gets its end marker
+            self.error = e
+            self.stopped.set()
+            try:
+                self._put(self.results, _EOF)
+            except _Stop:
+                pass
+
+    # ---------- writer ----------
+
+    def write_results(self, out: TextIO):
+        """Writer loop: write each formatted batch and flush it"""
+        try:
+            while True:
+                chunk = self._get(self.results)
+                if chunk is _EOF:
+                    break
+                out.write(chunk)
+                out.flush()
+        except (_Stop, BrokenPipeError):
+            self.stopped.set()
+
+    def run(self, stream: Optional[TextIO] = None, follow: Optional[str] = None,
+            out: TextIO = sys.stdout):
+        """
+        Run the pipeline until the input ends (or until interrupted when following)
+
+        The first record of a finite stream is read up front, so a CSV
+        header missing feature columns fails before anything is scored.
+
+        Args:
+            stream: Finite input stream (default: stdin)
+            follow: Path of a file to tail instead of reading stream
+            out: Output stream for NDJSON results
+
+        Raises:
+            SchemaError: If the CSV header is missing feature columns
+            Exception: Whatever stopped the scorer thread
+        """
+        if follow:
+            reader = threading.Thread(target=self.follow_file, args=(follow,), daemon=True)
+        else:
+            stream = stream or sys.stdin
+            number, first = 1, stream.readline()
+            while first and not first.strip():
+                number, first = number + 1, stream.readline()
+            pending = []
+            if first:
+                if self._check_first_line(first):
+                    number += 1
+                else:
+                    pending.append(first)
+            reader = threading.Thread(target=self.read_stream,
+                                      args=(itertools.chain(pending, stream), number),
+                                      daemon=True)
+        scorer = threading.Thread(target=self.score_batches, daemon=True)
+        reader.start()
+        scorer.start()
+        try:
+            self.write_results(out)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stopped.set()
+            scorer.join(timeout=5)
+        if self.error is not None:
+            raise self.error
+
+
+def main():
+    from fraud_detection_api import FraudDetectionAPI
+
+    parser = argparse.ArgumentParser(description="Score NDJSON/CSV records from stdin or a file")
+    parser.add_argument("--input", default=None, help="Input file (default: stdin)")
+    parser.add_argument("--follow", action="store_true", help="Tail the input file for new lines")
+    parser.add_argument("--format", choices=FORMATS, default="auto")
+    parser.add_argument("--models-dir", default="fraud_detection_models")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument("--queue-batches", type=int, default=DEFAULT_QUEUE_BATCHES)
+    parser.add_argument("--live-metrics", default=None, metavar="PATH",
+                        help="Record scoring for the app's Live Operations page")
+    args = parser.parse_args()
+
+    if args.follow and not args.input:
+        parser.error("--follow needs --input")
+
+    # Keep stdout clean for results: status messages go to stderr
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+    api = FraudDetectionAPI(args.models_dir, live_metrics=args.live_metrics)
+
+    scorer = StreamScorer(api, args.format, args.batch_size, args.max_wait_ms,
+                          args.queue_batches)
+    start = time.perf_counter()
+    try:
+        if args.follow:
+            scorer.run(follow=args.input, out=stdout)
+        elif args.input:
+            with open(args.input) as f:
+                scorer.run(f, out=stdout)
+        else:
+            scorer.run(sys.stdin, out=stdout)
+    except Exception as e:
+        print(f"❌ Scoring stopped after {scorer.records:,} records: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Scored {scorer.records - scorer.errors:,} records "
+          f"({scorer.errors:,} rejected) in {elapsed:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
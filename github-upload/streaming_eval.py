@@ -0,0 +1,272 @@
+"""
+Streaming Evaluation - Constant-memory model evaluation against labeled files
+Scores a labeled CSV of any size block by block and accumulates fixed-bin
+score histograms, so ROC-AUC and PR-AUC need no per-row storage
+
+Usage:
+    python streaming_eval.py --csv labeled_march.csv --shards 4 --refresh-metadata
+"""
+
+import argparse
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from fraud_detection_api import apply_consensus, consensus_policy
+from model_store import ModelStore, update_metadata
+
+DEFAULT_BINS = 10_000
+DEFAULT_BLOCK_BYTES = 8 << 20
+LABEL_COLUMN = "Class"
+SCORERS = ("lr", "rf", "consensus")
+
+
+class MetricAccumulator:
+    """
+    Mergeable streaming accumulator for binary classification metrics
+
+    Per scorer it keeps exact confusion counts at the decision threshold and
+    two fixed-bin histograms (fraud / legitimate) of the fraud probability.
+    Memory is O(bins) regardless of how many rows are added; AUC values are
+    exact up to ties inside one bin (error bounded by the bin width).
+    """
+
+    def __init__(self, bins: int = DEFAULT_BINS, scorers: Tuple[str, ...] = SCORERS):
+        self.bins = bins
+        self.scorers = scorers
+        self.pos_hist = {s: np.zeros(bins, dtype=np.int64) for s in scorers}
+        self.neg_hist = {s: np.zeros(bins, dtype=np.int64) for s in scorers}
+        self.confusion = {s: np.zeros(4, dtype=np.int64) for s in scorers}  # tp fp fn tn
+        self.rows = 0
+
+    def update(self, y: np.ndarray, scores: Dict[str, np.ndarray],
+               predictions: Dict[str, np.ndarray]):
+        """
+        Add one block of labeled, scored rows
+
+        Args:
+            y: True labels (0/1)
+            scores: Fraud probability per scorer
+            predictions: 0/1 decision per scorer
+        """
+        y = np.asarray(y, dtype=bool)
+        for s in self.scorers:
+            idx = np.minimum((scores[s] * self.bins).astype(np.int64), self.bins - 1)
+            self.pos_hist[s] += np.bincount(idx[y], minlength=self.bins)
+            self.neg_hist[s] += np.bincount(idx[~y], minlength=self.bins)
+
+            pred = np.asarray(predictions[s], dtype=bool)
+            self.confusion[s] += [
+                np.count_nonzero(pred & y), np.count_nonzero(pred & ~y),
+                np.count_nonzero(~pred & y), np.count_nonzero(~pred & ~y),
+            ]
+        self.rows += len(y)
+
+    def merge(self, other: "MetricAccumulator") -> "MetricAccumulator":
+        """Add another shard's counts into this accumulator"""
+        if other.bins != self.bins:
+            raise ValueError("Cannot merge accumulators with different bin counts")
+        for s in self.scorers:
+            self.pos_hist[s] += other.pos_hist[s]
+            self.neg_hist[s] += other.neg_hist[s]
+            self.confusion[s] += other.confusion[s]
+        self.rows += other.rows
+        return self
+
+    def compute(self) -> Dict[str, Dict[str, float]]:
+        """
+        Compute metrics per scorer
+
+        Returns:
+            {scorer: {accuracy, precision, recall, f1, roc_auc, pr_auc}}
+        """
+        results = {}
+        for s in self.scorers:
+            tp, fp, fn, tn = (int(v) for v in self.confusion[s])
+            precision = tp / (tp + fp) if tp + fp else 0.0
+            recall = tp / (tp + fn) if tp + fn else 0.0
+
+            # Walk bins from the highest score down
+            pos = self.pos_hist[s][::-1].astype(np.float64)
+            neg = self.neg_hist[s][::-1].astype(np.float64)
+            n_pos, n_neg = pos.sum(), neg.sum()
+            pos_above = np.cumsum(pos) - pos
+            cum_pos, cum_all = np.cumsum(pos), np.cumsum(pos + neg)
+
+            roc_auc = (float(np.sum(neg * (pos_above + 0.5 * pos)) / (n_pos * n_neg))
+                       if n_pos and n_neg else float("nan"))
+            bin_precision = np.divide(cum_pos, cum_all, out=np.zeros_like(cum_pos),
+                                      where=cum_all > 0)
+            pr_auc = float(np.sum(bin_precision * pos) / n_pos) if n_pos else float("nan")
+
+            results[s] = {
+                "accuracy": (tp + tn) / max(tp + fp + fn + tn, 1),
+                "precision": precision,
+                "recall": recall,
+                "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+                "roc_auc": roc_auc,
+                "pr_auc": pr_auc,
+            }
+        return results
+
+
+def _shard_ranges(path: str, shards: int) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """
+    Split a CSV into byte ranges that start and end on line boundaries
+
+    Returns:
+        (header line bytes, [(start, end), ...])
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.readline()
+        starts = [len(header)]
+        for i in range(1, shards):
+            f.seek(max(size * i // shards, len(header)))
+            f.readline()
+            starts.append(f.tell())
+    starts = sorted(set(min(s, size) for s in starts))
+    return header, [(a, b) for a, b in zip(starts, starts[1:] + [size]) if a < b]
+
+
+def _iter_blocks(path: str, header: bytes, start: int, end: int,
+                 block_bytes: int = DEFAULT_BLOCK_BYTES):
+    """Yield DataFrames parsed from newline-aligned blocks of a byte range"""
+    import pandas as pd
+
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        carry = b""
+        while remaining > 0:
+            data = carry + f.read(min(block_bytes, remaining))
+            remaining = end - f.tell()
+            cut = data.rfind(b"\n") + 1 if remaining > 0 else len(data)
+            block, carry = data[:cut], data[cut:]
+            if block.strip():
+                yield pd.read_csv(io.BytesIO(header + block))
+
+
+def evaluate_range(path: str, header: bytes, start: int, end: int,
+                   models_dir: str = "fraud_detection_models", bins: int = DEFAULT_BINS,
+                   label_column: str = LABEL_COLUMN,
+                   block_bytes: int = DEFAULT_BLOCK_BYTES) -> MetricAccumulator:
+    """
+    Score one byte range of a labeled CSV into a fresh accumulator
+
+    Runs in worker processes for sharded evaluation; each worker loads its
+    own models through ModelStore.
+    """
+    store = ModelStore(models_dir)
+    policy = consensus_policy(store.metadata)
+    feature_names = store.feature_names
+    acc = MetricAccumulator(bins)
+
+    for df in _iter_blocks(path, header, start, end, block_bytes):
+        X_scaled = store.scaler.transform(df[feature_names].to_numpy(dtype=np.float64))
+        lr_proba = store.lr_model.predict_proba(X_scaled)[:, 1]
+        rf_proba = store.rf_model.predict_proba(X_scaled)[:, 1]
+        consensus, consensus_pred = apply_consensus(lr_proba, rf_proba, policy)
+        acc.update(
+            df[label_column].to_numpy(),
+            {"lr": lr_proba, "rf": rf_proba, "consensus": consensus},
+            {"lr": lr_proba > 0.5, "rf": rf_proba > 0.5, "consensus": consensus_pred},
+        )
+    return acc
+
+
+def evaluate_file(path: str, models_dir: str = "fraud_detection_models", shards: int = 1,
+                  bins: int = DEFAULT_BINS, label_column: str = LABEL_COLUMN,
+                  block_bytes: int = DEFAULT_BLOCK_BYTES) -> MetricAccumulator:
+    """
+    Evaluate the deployed models on a labeled CSV in constant memory
+
+    Args:
+        path: Labeled CSV with the model's feature columns and a label column
+        models_dir: Directory containing pickle files
+        shards: Worker processes; each scores a line-aligned byte range
+        bins: Histogram bins per scorer
+        label_column: Name of the 0/1 label column
+        block_bytes: Bytes of CSV parsed per block
+
+    Returns:
+        Merged MetricAccumulator (call .compute() for metrics)
+    """
+    header, ranges = _shard_ranges(path, shards)
+    if len(ranges) == 1:
+        return evaluate_range(path, header, *ranges[0], models_dir, bins,
+                              label_column, block_bytes)
+
+    total = MetricAccumulator(bins)
+    with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+        futures = [pool.submit(evaluate_range, path, header, start, end, models_dir,
+                               bins, label_column, block_bytes) for start, end in ranges]
+        for future in futures:
+            total.merge(future.result())
+    return total
+
+
+def refresh_metadata(acc: MetricAccumulator, models_dir: str = "fraud_detection_models",
+                     source: Optional[str] = None) -> Dict:
+    """
+    Write streamed LR/RF metrics into the metadata the app displays
+
+    Returns:
+        The updated metadata dictionary
+    """
+    metrics = acc.compute()
+    updates = {}
+    for prefix in ("lr", "rf"):
+        m = metrics[prefix]
+        updates.update({
+            f"{prefix}_auc": m["roc_auc"],
+            f"{prefix}_f1": m["f1"],
+            f"{prefix}_accuracy": m["accuracy"],
+            f"{prefix}_precision": m["precision"],
+            f"{prefix}_recall": m["recall"],
+            f"{prefix}_pr_auc": m["pr_auc"],
+        })
+    updates.update({
+        "test_samples": acc.rows,
+        "test_fraud_rate": float(sum(acc.pos_hist["lr"]) / max(acc.rows, 1) * 100),
+        "evaluated_on": source,
+        "evaluated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    })
+    return update_metadata(models_dir, updates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming evaluation on a labeled CSV")
+    parser.add_argument("--csv", required=True, help="Labeled transactions CSV")
+    parser.add_argument("--models-dir", default="fraud_detection_models")
+    parser.add_argument("--shards", type=int, default=1)
+    parser.add_argument("--bins", type=int, default=DEFAULT_BINS)
+    parser.add_argument("--label-column", default=LABEL_COLUMN)
+    parser.add_argument("--block-mb", type=int, default=DEFAULT_BLOCK_BYTES >> 20)
+    parser.add_argument("--refresh-metadata", action="store_true",
+                        help="Store the LR/RF metrics in model_metadata.pkl for the app")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    acc = evaluate_file(args.csv, args.models_dir, args.shards, args.bins,
+                        args.label_column, args.block_mb << 20)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Evaluated {acc.rows:,} rows in {elapsed:.1f}s ({acc.rows / elapsed:,.0f} rows/s)")
+
+    print(f"\n{'scorer':<10} {'accuracy':>9} {'precision':>9} {'recall':>7} "
+          f"{'F1':>7} {'ROC-AUC':>8} {'PR-AUC':>7}")
+    for scorer, m in acc.compute().items():
+        print(f"{scorer:<10} {m['accuracy']:9.4f} {m['precision']:9.4f} {m['recall']:7.4f} "
+              f"{m['f1']:7.4f} {m['roc_auc']:8.4f} {m['pr_auc']:7.4f}")
+
+    if args.refresh_metadata:
+        refresh_metadata(acc, args.models_dir, os.path.basename(args.csv))
+        print(f"\n✅ Metrics written to {args.models_dir}/model_metadata.pkl")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,33 +6,33 @@ import os
 import sys
 import pickle
 
+from model_store import MANIFEST_FILE, check_artifacts
+
+# --full also unpickles the models and runs a prediction smoke test
+FULL = "--full" in sys.argv
+
 print("\n" + "=" * 70)
 print("TESTING FRAUD DETECTION APP")
 print("=" * 70)
 
-# Test 1: Load all pickle files
-print("\n[TEST 1] Loading all model files...")
+# Test 1: Verify all pickle files against the manifest without loading them
+print("\n[TEST 1] Verifying all model files...")
+if not os.path.exists(os.path.join("fraud_detection_models", MANIFEST_FILE)):
+    print(f"  ⚠ {MANIFEST_FILE} not found - checking pickle structure only")
+checks = check_artifacts("fraud_detection_models")
+failed = [check for check in checks if not check.ok]
+for check in checks:
+    mark = "✓" if check.ok else "✗"
+    print(f"  {mark} {check.name} ({check.size_bytes / 1024:.1f} KB, {check.message})")
+
+if failed:
+    print(f"  ✗ ERROR: {[check.name for check in failed]}")
+    sys.exit(1)
+
 try:
-    with open("fraud_detection_models/logistic_regression_model.pkl", "rb") as f:
-        lr_model = pickle.load(f)
-    print("  ✓ Logistic Regression model")
-    
-    with open("fraud_detection_models/random_forest_model.pkl", "rb") as f:
-        rf_model = pickle.load(f)
-    print("  ✓ Random Forest model")
-    
-    with open("fraud_detection_models/scaler.pkl", "rb") as f:
-        scaler = pickle.load(f)
-    print("  ✓ Scaler")
-    
     with open("fraud_detection_models/model_metadata.pkl", "rb") as f:
         metadata = pickle.load(f)
     print("  ✓ Metadata")
-    
-    with open("fraud_detection_models/feature_names.pkl", "rb") as f:
-        features = pickle.load(f)
-    print("  ✓ Feature names")
-    
 except Exception as e:
     print(f"  ✗ ERROR: {e}")
     sys.exit(1)
@@ -55,25 +55,35 @@ if missing:
     sys.exit(1)
 
 # Test 3: Test model predictions
-print("\n[TEST 3] Testing model predictions...")
-try:
-    import numpy as np
-    
-    # Create dummy transaction (30 features)
-    test_input = np.random.randn(1, 30)
-    test_scaled = scaler.transform(test_input)
-    
-    lr_pred = lr_model.predict(test_scaled)
-    lr_prob = lr_model.predict_proba(test_scaled)
-    print(f"  ✓ LR Prediction: {lr_pred[0]} (prob: {lr_prob[0][1]:.4f})")
-    
-    rf_pred = rf_model.predict(test_scaled)
-    rf_prob = rf_model.predict_proba(test_scaled)
-    print(f"  ✓ RF Prediction: {rf_pred[0]} (prob: {rf_prob[0][1]:.4f})")
-    
-except Exception as e:
-    print(f"  ✗ ERROR: {e}")
-    sys.exit(1)
+if FULL:
+    print("\n[TEST 3] Testing model predictions...")
+    try:
+        import numpy as np
+        
+        with open("fraud_detection_models/logistic_regression_model.pkl", "rb") as f:
+            lr_model = pickle.load(f)
+        with open("fraud_detection_models/random_forest_model.pkl", "rb") as f:
+            rf_model = pickle.load(f)
+        with open("fraud_detection_models/scaler.pkl", "rb") as f:
+            scaler = pickle.load(f)
+        
+        # Create dummy transaction (30 features)
+        test_input = np.random.randn(1, 30)
+        test_scaled = scaler.transform(test_input)
+        
+        lr_pred = lr_model.predict(test_scaled)
+        lr_prob = lr_model.predict_proba(test_scaled)
+        print(f"  ✓ LR Prediction: {lr_pred[0]} (prob: {lr_prob[0][1]:.4f})")
+        
+        rf_pred = rf_model.predict(test_scaled)
+        rf_prob = rf_model.predict_proba(test_scaled)
+        print(f"  ✓ RF Prediction: {rf_pred[0]} (prob: {rf_prob[0][1]:.4f})")
+        
+    except Exception as e:
+        print(f"  ✗ ERROR: {e}")
+        sys.exit(1)
+else:
+    print("\n[TEST 3] Skipping model predictions (run with --full to enable)")
 
 # Test 4: Import Streamlit
 print("\n[TEST 4] Checking Streamlit...")
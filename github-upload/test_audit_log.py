@@ -0,0 +1,85 @@
+"""
+Checks for audit_log.py - round trip and bounded backpressure
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from audit_log import AuditLog, read_range
+
+FEATURES = [f"f{i}" for i in range(4)]
+
+
+def _batch(n, seed=0):
+    rng = np.random.default_rng(seed)
+    p = rng.random((3, n))
+    return rng.standard_normal((n, len(FEATURES))), p[0], p[1], p[2], (p[2] > 0.5).astype(int)
+
+
+def test_round_trip(tmp_path):
+    log = AuditLog(str(tmp_path), FEATURES, "v1", block_rows=100)
+    X, lr, rf, score, pred = _batch(1050)
+    log.append(X, lr, rf, score, pred, [f"TX{i}" for i in range(len(X))])
+    log.close()
+
+    rows = read_range(str(tmp_path))
+    np.testing.assert_array_equal(rows["features"], X.astype(np.float32))
+    np.testing.assert_array_equal(rows["consensus_prediction"], pred)
+    assert rows["transaction_id"][-1] == b"TX1049"
+    assert log.written_rows == 1050 and log.dropped_rows == 0
+
+
+def test_full_queue_never_blocks_writer_or_flush(tmp_path, monkeypatch):
+    release = threading.Event()
+    write = AuditLog._write
+
+    def slow_write(self, blocks):
+        release.wait(5)
+        write(self, blocks)
+
+    monkeypatch.setattr(AuditLog, "_write", slow_write)
+    log = AuditLog(str(tmp_path), FEATURES, block_rows=10, max_pending_blocks=1,
+                   max_wait_seconds=0.01, flush_interval=0.05)
+    X, lr, rf, score, pred = _batch(35)
+    ids = [str(i) for i in range(len(X))]
+
+    log.append(X[:10], lr[:10], rf[:10], score[:10], pred[:10], ids[:10])  # writer busy
+    log.append(X[10:20], lr[10:20], rf[10:20], score[10:20], pred[10:20], ids[10:20])  # queued
+    log.append(X[20:25], lr[20:25], rf[20:25], score[20:25], pred[20:25], ids[20:25])  # partial
+    time.sleep(0.2)  # partial block ages while the queue is full
+
+    start = time.monotonic()
+    log.append(X[25:], lr[25:], rf[25:], score[25:], pred[25:], ids[25:])
+    log.flush(timeout=0.1)
+    assert time.monotonic() - start < 1.0
+
+    release.set()
+    log.close()
+    assert log.written_rows + log.dropped_rows == len(X)
+    assert len(read_range(str(tmp_path))["features"]) == log.written_rows
+
+
+def test_concurrent_appends_account_for_every_row(tmp_path, monkeypatch):
+    write = AuditLog._write
+    monkeypatch.setattr(AuditLog, "_write",
+                        lambda self, blocks: (time.sleep(0.002), write(self, blocks)))
+    log = AuditLog(str(tmp_path), FEATURES, block_rows=5, max_pending_blocks=1,
+                   max_wait_seconds=0.0005)
+    X, lr, rf, score, pred = _batch(20)
+    ids = [str(i) for i in range(len(X))]
+
+    def worker():
+        for _ in range(50):
+            log.append(X, lr, rf, score, pred, ids)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    log.close()
+
+    assert log.dropped_rows > 0
+    assert log.written_rows + log.dropped_rows == 8 * 50 * len(X)
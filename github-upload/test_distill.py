@@ -0,0 +1,37 @@
+"""
+Checks for distill.py - student fidelity and an exported, loadable directory
+"""
+
+import numpy as np
+
+from distill import distill, export_student
+from fraud_detection_api import FraudDetectionAPI
+from model_store import check_artifacts
+
+
+def test_distilled_student_tracks_teacher_and_exports(transactions_csv, models_dir, tmp_path):
+    student, reports, context = distill(transactions_csv, models_dir, str(tmp_path / "cache"),
+                                        tree_counts=(5,), max_depths=(10,), synthetic=20_000,
+                                        min_agreement=0.95, max_auc_drop=0.05)
+
+    assert student is not None and len(reports) == 1
+    report = reports[0]
+    assert report.mean_gap < 0.03
+    assert report.decision_agreement >= 0.95
+
+    teacher = FraudDetectionAPI(models_dir)
+    teacher_test = teacher.rf_model.predict_proba(context["X_test"])[:, 1]
+    student_test = student.predict_proba(context["X_test"])[:, 1]
+    assert np.corrcoef(teacher_test, student_test)[0, 1] > 0.85
+
+    out_dir = str(tmp_path / "distilled")
+    metadata = export_student(models_dir, out_dir, student, context, transactions_csv)
+    assert metadata["n_estimators"] == 5
+    assert all(check.ok for check in check_artifacts(out_dir))
+
+    api = FraudDetectionAPI(out_dir)
+    assert not api.failed_checks
+    X = teacher.scaler.inverse_transform(context["X_test"][:200].astype(np.float64))
+    np.testing.assert_allclose(api.score_arrays(X)[:, 1],
+                               student.predict_proba(context["X_test"][:200])[:, 1], atol=1e-6)
+    np.testing.assert_allclose(api.score_arrays(X)[:, 0], teacher.score_arrays(X)[:, 0])
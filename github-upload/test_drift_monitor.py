@@ -0,0 +1,42 @@
+"""
+Checks for drift_monitor.py - reference handling and alerts
+"""
+
+import numpy as np
+
+from drift_monitor import DriftMonitor, build_reference
+
+FEATURES = ["Time"] + [f"V{i}" for i in range(1, 29)] + ["Amount"]
+
+
+def _heavy_tailed(rng, n):
+    """Standardized rows whose Amount column is far from normal"""
+    X = rng.standard_normal((n, len(FEATURES)))
+    amount = rng.exponential(1.0, n) ** 2
+    X[:, -1] = (amount - amount.mean()) / amount.std()
+    return X
+
+
+def test_normal_approximation_warns_instead_of_alerting():
+    rng = np.random.default_rng(0)
+    monitor = DriftMonitor(FEATURES, models_dir=None, check_every=5000)
+    report = monitor.update(_heavy_tailed(rng, 5000), rng.random(5000), rng.random(5000))
+
+    assert report.feature_psi["Amount"] > monitor.psi_alert
+    assert report.alerts == []
+    assert report.warnings
+
+
+def test_reference_file_matches_same_distribution_and_alerts_on_shift(tmp_path):
+    rng = np.random.default_rng(1)
+    scores = rng.beta(0.5, 20, (2, 20_000))
+    build_reference(str(tmp_path), _heavy_tailed(rng, 20_000), scores[0], scores[1])
+    monitor = DriftMonitor(FEATURES, str(tmp_path), check_every=5000)
+
+    same = monitor.update(_heavy_tailed(rng, 5000), *rng.beta(0.5, 20, (2, 5000)))
+    assert same.alerts == [] and same.warnings == []
+
+    shifted = _heavy_tailed(rng, 5000)
+    shifted[:, 3] += 1.5
+    report = monitor.update(shifted, *rng.beta(0.5, 20, (2, 5000)))
+    assert [a.split(":")[0] for a in report.alerts] == ["V3"]
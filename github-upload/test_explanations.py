@@ -0,0 +1,55 @@
+"""
+Checks for explanations.py - attributions add up to the model outputs
+"""
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from conftest import make_transactions
+from explanations import Explainer
+from train_pipeline import PriorCorrectedClassifier
+
+
+def _data(n_rows=3000, seed=5):
+    df = make_transactions(n_rows, seed=seed)
+    X = df.drop(columns="Class").to_numpy()
+    X = (X - X.mean(axis=0)) / X.std(axis=0)
+    return X, df["Class"].to_numpy(), list(df.columns[:-1])
+
+
+def test_contributions_sum_to_model_outputs():
+    X, y, names = _data()
+    lr = LogisticRegression(max_iter=1000).fit(X, y)
+    rf = RandomForestClassifier(n_estimators=8, max_depth=6, random_state=0).fit(X, y)
+    explained = Explainer(lr, rf, names).explain(X[:200])
+
+    lr_logit = lr.decision_function(X[:200])
+    np.testing.assert_allclose(explained["lr"].base_value
+                               + explained["lr"].contributions.sum(axis=1), lr_logit)
+    np.testing.assert_allclose(explained["rf"].base_value
+                               + explained["rf"].contributions.sum(axis=1),
+                               rf.predict_proba(X[:200])[:, 1], atol=1e-9)
+
+
+def test_prior_corrected_forest_stays_additive():
+    X, y, names = _data()
+    rf = RandomForestClassifier(n_estimators=8, max_depth=6, random_state=0).fit(X, y)
+    model = PriorCorrectedClassifier(rf, negative_rate=0.2)
+    lr = LogisticRegression(max_iter=1000).fit(X, y)
+    rf_explained = Explainer(lr, model, names).explain(X[:200])["rf"]
+
+    np.testing.assert_allclose(rf_explained.base_value + rf_explained.contributions.sum(axis=1),
+                               model.predict_proba(X[:200])[:, 1], atol=1e-9)
+
+
+def test_top_k_orders_strongest_first():
+    X, y, names = _data()
+    lr = LogisticRegression(max_iter=1000).fit(X, y)
+    rf = RandomForestClassifier(n_estimators=4, max_depth=4, random_state=0).fit(X, y)
+    explained = Explainer(lr, rf, names).explain(X[:50])["lr"]
+
+    top_names, top_values = explained.top_k(3)
+    assert top_names.shape == (50, 3)
+    assert (np.diff(top_values, axis=1) <= 0).all()
+    np.testing.assert_allclose(top_values[:, 0], explained.contributions.max(axis=1))
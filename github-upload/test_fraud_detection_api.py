@@ -0,0 +1,58 @@
+"""
+Checks for fraud_detection_api.py - block-parallel scoring and shared instances
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from audit_log import read_range
+from conftest import make_transactions
+from fraud_detection_api import MIN_BLOCK_ROWS, FraudDetectionAPI
+from live_metrics import LiveMetrics
+
+
+def test_threaded_blocks_match_serial(api):
+    X = make_transactions(2 * MIN_BLOCK_ROWS + 1500, seed=11)[api.feature_names].to_numpy()
+
+    # Equal up to the last bits: BLAS sums rows in block-sized chunks
+    serial = api.score_arrays(X, threads=1)
+    np.testing.assert_allclose(api.score_arrays(X, threads=4), serial, rtol=1e-12)
+
+    out = np.full((len(X), 4), np.nan)
+    returned = api.score_arrays(X, out=out, threads=4)
+    assert returned is out
+    np.testing.assert_allclose(out, serial, rtol=1e-12)
+
+
+def test_shared_instance_under_concurrent_calls(models_dir, tmp_path):
+    shared = FraudDetectionAPI(models_dir, audit_dir=str(tmp_path), live_metrics=LiveMetrics())
+    X = make_transactions(3000, seed=12)[shared.feature_names].to_numpy()
+    expected = shared.score_arrays(X, threads=1)
+    singles = [0, 7, 99, 2500]
+    chunks = np.array_split(np.arange(len(X)), 24)
+
+    def score(rows):
+        return rows, shared.score_arrays(X[rows], [f"TX{i}" for i in rows], threads=2)
+
+    def single(i):
+        return i, shared.predict_single(X[i], f"S{i}")
+
+    with ThreadPoolExecutor(8) as pool:
+        batches = list(pool.map(score, chunks))
+        results = list(pool.map(single, singles * 5))
+
+    for rows, scores in batches:
+        np.testing.assert_allclose(scores, expected[rows], rtol=1e-12)
+    for i, result in results:
+        np.testing.assert_allclose(result.consensus_score, expected[i, 2])
+
+    calls = 1 + len(chunks) + len(results)
+    rows = 2 * len(X) + len(results)
+    snapshot = shared.live.snapshot(window_seconds=600)
+    assert snapshot.calls.sum() == calls
+    assert snapshot.transactions.sum() == rows
+
+    shared.close()
+    audit = read_range(str(tmp_path))
+    assert len(audit["transaction_id"]) == rows
@@ -0,0 +1,81 @@
+"""
+Checks for fraud_index.py - exact search and duplicate handling
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fraud_index import FraudIndex, add_to_index, build_index
+from model_store import ModelStore
+
+
+def _split_with_overlap(transactions_csv, tmp_path):
+    df = pd.read_csv(transactions_csv)
+    first, second = tmp_path / "first.csv", tmp_path / "second.csv"
+    df.iloc[:4000].to_csv(first, index=False)
+    df.iloc[3000:].to_csv(second, index=False)
+    return df, str(first), str(second)
+
+
+def test_overlapping_sources_index_each_fraud_once(models_dir, transactions_csv, tmp_path):
+    df, first, second = _split_with_overlap(transactions_csv, tmp_path)
+    index_dir = str(tmp_path / "index")
+    build_index([first, second], models_dir, index_dir, str(tmp_path / "cache"))
+
+    index = FraudIndex.open(models_dir, index_dir)
+    assert len(index) == int(df["Class"].sum())
+    assert index.config["duplicates_skipped"] == int(df.iloc[3000:4000]["Class"].sum())
+
+
+def test_add_skips_indexed_rows(models_dir, transactions_csv, tmp_path):
+    df, first, second = _split_with_overlap(transactions_csv, tmp_path)
+    index_dir = str(tmp_path / "index")
+    build_index([first], models_dir, index_dir, str(tmp_path / "cache"))
+
+    added = add_to_index(second, models_dir, index_dir, str(tmp_path / "cache"))
+    assert added == int(df.iloc[4000:]["Class"].sum())
+    assert len(FraudIndex.open(models_dir, index_dir)) == int(df["Class"].sum())
+
+
+def test_query_matches_brute_force(models_dir, transactions_csv, tmp_path):
+    index_dir = str(tmp_path / "index")
+    build_index([transactions_csv], models_dir, index_dir, str(tmp_path / "cache"))
+    index = FraudIndex.open(models_dir, index_dir)
+
+    df = pd.read_csv(transactions_csv)
+    scaler = ModelStore(models_dir).scaler
+    frauds = scaler.transform(df[df["Class"] == 1].drop(columns="Class").to_numpy())
+    queries = scaler.transform(df.drop(columns="Class").to_numpy()[:50])
+    for q in queries:
+        expected = np.sort(np.linalg.norm(frauds - q, axis=1))[:5]
+        got = [n.distance for n in index.query(q.astype(np.float32), k=5)]
+        np.testing.assert_allclose(got, expected, rtol=1e-4, atol=1e-4)
+
+
+def test_rejects_empty_inputs(models_dir, transactions_csv, tmp_path):
+    index_dir = str(tmp_path / "index")
+    legit = tmp_path / "legit.csv"
+    df = pd.read_csv(transactions_csv)
+    df[df["Class"] == 0].to_csv(legit, index=False)
+
+    with pytest.raises(ValueError, match="No fraud rows"):
+        build_index([], models_dir, index_dir, str(tmp_path / "cache"))
+    with pytest.raises(ValueError, match="No fraud rows"):
+        build_index([str(legit)], models_dir, index_dir, str(tmp_path / "cache"))
+    assert not os.path.exists(index_dir)
+
+    build_index([transactions_csv], models_dir, index_dir, str(tmp_path / "cache"))
+    index = FraudIndex.open(models_dir, index_dir)
+    with pytest.raises(ValueError, match="k must be at least 1"):
+        index.query(index.vectors[0], k=0)
+    assert add_to_index(str(legit), models_dir, index_dir, str(tmp_path / "cache")) == 0
+
+
+def test_missing_index_is_reported_once(api, capsys):
+    features = np.zeros(30)
+    assert api.similar_frauds(features) == []
+    assert api.similar_frauds(features) == []
+    assert capsys.readouterr().out.count("Fraud index unavailable") == 1
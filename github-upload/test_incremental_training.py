@@ -0,0 +1,49 @@
+"""
+Checks for incremental_training.py - train/validation split under the cap
+"""
+
+import os
+
+import numpy as np
+
+from conftest import make_transactions
+from drift_monitor import REFERENCE_FILE
+from incremental_training import Reservoir, train_incremental
+
+
+def test_capped_validation_rows_are_trained_on(tmp_path, monkeypatch):
+    from sklearn.linear_model import SGDClassifier
+
+    csv = tmp_path / "train.csv"
+    make_transactions(12_000, seed=1).to_csv(csv, index=False)
+
+    fitted_rows = []
+    partial_fit = SGDClassifier.partial_fit
+
+    def counting_partial_fit(self, X, y, *args, **kwargs):
+        fitted_rows.append(len(y))
+        return partial_fit(self, X, y, *args, **kwargs)
+
+    monkeypatch.setattr(SGDClassifier, "partial_fit", counting_partial_fit)
+
+    epochs = 2
+    metadata = train_incremental([str(csv)], str(tmp_path / "models"), str(tmp_path / "cache"),
+                                 epochs=epochs, chunk_rows=2000, max_validation_rows=500,
+                                 rf_sample_rows=2000, n_estimators=5)
+
+    assert metadata["total_samples"] == 12_000
+    assert metadata["train_samples"] == 12_000 - 500
+    assert sum(fitted_rows) == epochs * metadata["train_samples"]
+    assert os.path.exists(tmp_path / "models" / REFERENCE_FILE)
+
+
+def test_reservoir_keeps_capacity_rows():
+    reservoir = Reservoir(100, 2, seed=0)
+    X = np.arange(2000, dtype=np.float32).reshape(1000, 2)
+    for start in range(0, 1000, 64):
+        reservoir.add(X[start:start + 64], np.zeros(len(X[start:start + 64]), dtype=np.int8))
+
+    sample, _ = reservoir.sample()
+    assert reservoir.seen == 1000
+    assert len(sample) == 100
+    assert len(np.unique(sample[:, 0])) == 100
@@ -0,0 +1,59 @@
+"""
+Checks for input_schema.py - column mapping, row flags and direct checks
+"""
+
+import numpy as np
+import pytest
+
+from input_schema import (INFINITE, MISSING, NON_NUMERIC, OUT_OF_RANGE, InputSchema,
+                          SchemaError, describe_flags)
+
+NAMES = ["Time", "V1", "V2", "Amount"]
+
+
+def test_map_columns_by_name_in_any_order():
+    schema = InputSchema(NAMES)
+    mapping = schema.map_columns(["Class", " Amount", "V2", "Time", "V1", "id"])
+    assert mapping.source_columns == ["Time", "V1", "V2", " Amount"]
+    assert mapping.extra_columns == ["Class", "id"]
+
+    with pytest.raises(SchemaError, match="Missing 1 of 4"):
+        schema.map_columns(["Time", "V1", "V2"])
+
+
+def test_row_flags_combine_reasons():
+    schema = InputSchema(NAMES)
+    X = np.array([[0.0, 1.0, 2.0, 10.0],
+                  [-1.0, 1.0, np.nan, 10.0],
+                  [0.0, np.inf, 2.0, 10.0],
+                  [0.0, np.nan, 2.0, 10.0]])
+    text = np.zeros(X.shape, dtype=bool)
+    text[3, 1] = True
+
+    flags = schema.row_flags(X, non_numeric=text)
+    assert flags.tolist() == [0, OUT_OF_RANGE | MISSING, INFINITE, NON_NUMERIC]
+    assert describe_flags(flags[1:2]) == ["missing, out of range"]
+
+
+def test_check_shapes_and_rejects():
+    schema = InputSchema(NAMES)
+    assert schema.check([1.0, 2.0, 3.0, 4.0]).shape == (1, 4)
+    assert schema.check(np.ones((3, 4), dtype=np.float32)).dtype == np.float32
+
+    with pytest.raises(SchemaError, match="Expected 4 features"):
+        schema.check(np.ones((2, 3)))
+    with pytest.raises(ValueError, match="1 invalid transaction.*row 1: out of range"):
+        schema.check([[0, 0, 0, 1], [0, 0, 0, -1]])
+
+
+def test_predict_batch_checks_features_once(api, monkeypatch):
+    from conftest import make_transactions
+
+    calls = []
+    check = api.schema.check
+    monkeypatch.setattr(api.schema, "check", lambda X: calls.append(1) or check(X))
+    X = make_transactions(5, seed=2)[api.feature_names].to_numpy()
+
+    results = api.predict_batch(X)
+    assert len(calls) == 1
+    np.testing.assert_allclose([r.consensus_score for r in results], api.score_arrays(X)[:, 2])
@@ -0,0 +1,44 @@
+"""
+Checks for live_metrics.py - bucket totals, ring reuse and file sharing
+"""
+
+import numpy as np
+
+from live_metrics import LiveMetrics
+
+
+def _record(live, n, now, flagged=0):
+    pred = np.zeros(n, dtype=int)
+    pred[:flagged] = 1
+    live.record(np.full(n, 0.2), np.full(n, 0.7), np.full(n, 0.45), pred, 0.002, now=now)
+
+
+def test_window_totals_and_lap_reuse():
+    live = LiveMetrics(bucket_seconds=10, buckets=6)
+    _record(live, 100, now=1000.0, flagged=5)
+    _record(live, 50, now=1015.0)
+
+    snap = live.snapshot(window_seconds=60, now=1019.0)
+    assert snap.transactions.sum() == 150
+    assert snap.flagged.sum() == 5
+    assert snap.disagreements.sum() == 150
+    np.testing.assert_allclose(np.nanmax(snap.mean_gap), 0.5)
+    assert snap.score_hist.sum() == 150 and snap.latency_hist.sum() == 2
+
+    # Six buckets later the first bucket's slot is reused and starts over
+    _record(live, 7, now=1060.0)
+    snap = live.snapshot(window_seconds=60, now=1060.0)
+    assert snap.transactions.sum() == 57
+
+
+def test_reader_sees_writer_through_file(tmp_path):
+    path = str(tmp_path / "live.bin")
+    writer = LiveMetrics(path, bucket_seconds=5, buckets=12)
+    _record(writer, 20, now=500.0, flagged=2)
+    writer.flush()
+
+    reader = LiveMetrics(path, readonly=True)
+    assert (reader.bucket_seconds, reader.buckets) == (5, 12)
+    snap = reader.snapshot(window_seconds=30, now=501.0)
+    assert snap.transactions.sum() == 20
+    assert snap.recent(5)["flag_rate"] == 0.1
@@ -0,0 +1,41 @@
+"""
+Checks for load_test.py - schema-valid traffic and coordinated-omission correction
+"""
+
+import time
+
+import numpy as np
+
+import load_test
+from load_test import TrafficGenerator, run_open_loop
+
+
+def test_generated_traffic_passes_the_schema(api):
+    generator = TrafficGenerator(api.scaler, api.feature_names, api.lr_model,
+                                 fraud_fraction=0.2, seed=0)
+    X = generator.sample(5000)
+
+    for name in ("Time", "Amount"):
+        assert (X[:, api.feature_names.index(name)] >= 0).all()
+    assert api.schema.check(X).shape == (5000, len(api.feature_names))
+
+    legit = TrafficGenerator(api.scaler, api.feature_names, seed=0).sample(5000)
+    assert api.score_arrays(X)[:, 0].mean() > api.score_arrays(legit)[:, 0].mean()
+
+
+def test_latency_counts_time_behind_schedule(monkeypatch):
+    monkeypatch.setattr(load_test, "DRAIN_SECONDS", 0.3)
+
+    def slow_send(features, transaction_id):
+        time.sleep(0.02)
+
+    result = run_open_loop(slow_send, np.zeros((1, 3)), rate=200, duration=0.25, workers=1)
+
+    assert result.sent + result.not_started == 50
+    assert result.not_started > 0
+    assert result.completed == result.sent and result.errors == 0
+    # Service time stays ~20 ms; latency from the schedule grows with the backlog
+    assert result.service_ms[50] < 40
+    assert result.latency_ms[50] > 3 * result.service_ms[50]
+    assert result.late_starts > 0.5
+    assert load_test.is_saturated(result)
@@ -0,0 +1,47 @@
+"""
+Checks for model_registry.py - routed scores match each set scored alone
+"""
+
+import numpy as np
+import pytest
+
+from conftest import make_transactions
+from fraud_detection_api import FraudDetectionAPI
+from model_registry import ModelRegistry, SegmentSpec
+from train_pipeline import run_pipeline
+
+
+@pytest.fixture(scope="module")
+def second_models_dir(tmp_path_factory):
+    root = tmp_path_factory.mktemp("second")
+    csv = root / "second.csv"
+    make_transactions(3000, seed=8).to_csv(csv, index=False)
+    run_pipeline(str(csv), str(root / "models"), str(root / "cache"), n_estimators=5)
+    return str(root / "models")
+
+
+def test_routed_scores_keep_input_order(models_dir, second_models_dir):
+    registry = ModelRegistry([
+        SegmentSpec("high_amount", second_models_dir, "Amount", 100.0),
+        SegmentSpec("default", models_dir),
+    ])
+    X = make_transactions(500, seed=9)[registry.feature_names].to_numpy()
+
+    scores, segments = registry.score_arrays(X)
+
+    high = X[:, registry.feature_names.index("Amount")] >= 100.0
+    np.testing.assert_array_equal(segments, np.where(high, 0, 1))
+    for rows, directory in ((high, second_models_dir), (~high, models_dir)):
+        alone = FraudDetectionAPI(directory)
+        np.testing.assert_allclose(scores[rows], alone.score_arrays(X[rows]))
+        alone.close()
+
+
+def test_shared_artifacts_load_once(models_dir):
+    registry = ModelRegistry([
+        SegmentSpec("small", models_dir, "Amount", max=10.0),
+        SegmentSpec("default", models_dir),
+    ])
+    assert registry.unique_artifacts == 5
+    assert registry.references == 10
+    assert registry.shared_scaler is registry.model_sets[0].scaler
@@ -0,0 +1,22 @@
+"""
+Checks for model_search.py - per-family Pareto front
+"""
+
+from model_search import Candidate, pareto_front
+
+
+def _candidate(model, auc, latency_ms, **params):
+    return Candidate(model, params, auc, f1=0.0, fit_seconds=0.0,
+                     single_latency_ms=latency_ms)
+
+
+def test_front_is_computed_per_model_family():
+    lr = _candidate("logistic_regression", 0.97, 0.1, C=1.0)
+    forests = [_candidate("random_forest", 0.90, 2.0, n_estimators=10),
+               _candidate("random_forest", 0.95, 5.0, n_estimators=50),
+               _candidate("random_forest", 0.94, 9.0, n_estimators=100)]
+
+    front = pareto_front([lr] + forests)
+
+    assert front == [lr, forests[0], forests[1]]
+    assert [c.pareto for c in forests] == [True, True, False]
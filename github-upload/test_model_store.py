@@ -0,0 +1,125 @@
+"""
+Checks for model_store.py - manifest verification and lazy loading
+"""
+
+import json
+import os
+import pickle
+import shutil
+import threading
+
+import pytest
+
+import model_store
+from model_store import ARTIFACT_FILES, MANIFEST_FILE, ModelStore, check_artifacts
+
+
+@pytest.fixture
+def copy_dir(models_dir, tmp_path):
+    target = tmp_path / "models"
+    shutil.copytree(models_dir, target)
+    return str(target)
+
+
+def _failed(models_dir):
+    return {c.name: c.message for c in check_artifacts(models_dir) if not c.ok}
+
+
+def _path(models_dir, name):
+    return os.path.join(models_dir, ARTIFACT_FILES[name])
+
+
+def _edit_manifest(models_dir, edit):
+    path = os.path.join(models_dir, MANIFEST_FILE)
+    with open(path) as f:
+        manifest = json.load(f)
+    edit(manifest)
+    with open(path, "w") as f:
+        json.dump(manifest, f)
+
+
+def test_intact_directory_passes(copy_dir):
+    assert _failed(copy_dir) == {}
+
+
+def test_truncated_file(copy_dir):
+    path = _path(copy_dir, "rf_model")
+    os.truncate(path, os.path.getsize(path) // 2)
+    assert _failed(copy_dir) == {"rf_model": "truncated pickle"}
+
+
+def test_size_mismatch(copy_dir):
+    with open(_path(copy_dir, "scaler"), "ab") as f:
+        f.write(b".")
+    assert _failed(copy_dir)["scaler"].startswith("size mismatch")
+
+
+def test_hash_mismatch_with_same_size(copy_dir):
+    path = _path(copy_dir, "lr_model")
+    data = bytearray(open(path, "rb").read())
+    data[len(data) // 2] ^= 0xFF
+    open(path, "wb").write(bytes(data))
+    assert _failed(copy_dir) == {"lr_model": "sha256 mismatch"}
+
+
+def test_manifest_entry_without_hash(copy_dir):
+    _edit_manifest(copy_dir, lambda m: m["artifacts"]["metadata"].pop("sha256"))
+    assert _failed(copy_dir) == {"metadata": "manifest entry has no hash"}
+
+
+def test_missing_file(copy_dir):
+    os.remove(_path(copy_dir, "feature_names"))
+    assert _failed(copy_dir) == {"feature_names": "missing"}
+
+
+def test_feature_schema_mismatch(copy_dir):
+    def swap(manifest):
+        names = manifest["feature_schema"]["names"]
+        names[1], names[2] = names[2], names[1]
+
+    _edit_manifest(copy_dir, swap)
+    assert _failed(copy_dir)["feature_names"].startswith("feature schema mismatch (position 1")
+
+    _edit_manifest(copy_dir, lambda m: m["feature_schema"]["names"].pop())
+    assert "manifest lists 29" in _failed(copy_dir)["feature_names"]
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Names of the files unpickled through model_store, in order"""
+    seen = []
+    load = pickle.load
+
+    def counting_load(f, *args, **kwargs):
+        seen.append(os.path.basename(f.name))
+        return load(f, *args, **kwargs)
+
+    monkeypatch.setattr(model_store.pickle, "load", counting_load)
+    return seen
+
+
+def test_store_loads_nothing_until_first_access(models_dir, loads):
+    store = ModelStore(models_dir)
+    assert loads == []
+    assert not any(store.is_loaded(name) for name in ARTIFACT_FILES)
+
+    store.scaler
+    store.scaler
+    assert loads == [ARTIFACT_FILES["scaler"]]
+    assert set(store.load_times) == {"scaler"}
+
+
+def test_preload_loads_each_artifact_once(models_dir, loads):
+    store = ModelStore(models_dir)
+    thread = store.preload(["rf_model", "lr_model"], background=True)
+    # Callers racing the loader wait for it instead of unpickling again
+    readers = [threading.Thread(target=lambda: store.rf_model) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for reader in readers + [thread]:
+        reader.join()
+
+    store.rf_model, store.lr_model
+    store.preload(list(ARTIFACT_FILES), background=False)
+    store.metadata, store.feature_names, store.scaler
+    assert sorted(loads) == sorted(ARTIFACT_FILES.values())
@@ -0,0 +1,38 @@
+"""
+Checks for policy_tuning.py - vectorized sweep and policy selection
+"""
+
+import numpy as np
+
+from policy_tuning import select_policy, sweep_policies
+
+
+def _sweep(seed=0, n=2000):
+    rng = np.random.default_rng(seed)
+    y = (rng.random(n) < 0.05).astype(np.int8)
+    lr = np.clip(0.3 * y + rng.random(n) * 0.7, 0, 1)
+    rf = np.clip(0.4 * y + rng.random(n) * 0.6, 0, 1)
+    weights = np.linspace(0, 1, 5)
+    thresholds = np.linspace(0, 1, 101)
+    return lr, rf, y, weights, thresholds, sweep_policies(lr, rf, y, weights, thresholds)
+
+
+def test_sweep_matches_direct_counts():
+    lr, rf, y, weights, thresholds, sweep = _sweep()
+    for i, w in enumerate(weights):
+        for j in (0, 37, 60, 100):
+            flagged = w * lr + (1 - w) * rf > thresholds[j]
+            assert sweep["flagged"][i, j] == flagged.sum()
+            assert sweep["tp"][i, j] == (flagged & (y == 1)).sum()
+
+
+def test_recall_at_precision_respects_floor():
+    _, _, _, weights, thresholds, sweep = _sweep()
+    best = select_policy(sweep, weights, thresholds, "recall_at_precision", 0.5)
+    assert best is not None and best.precision >= 0.5
+
+
+def test_unreachable_precision_selects_nothing():
+    _, _, _, weights, thresholds, sweep = _sweep()
+    floor = sweep["precision"].max() + 0.01
+    assert select_policy(sweep, weights, thresholds, "recall_at_precision", floor) is None
@@ -0,0 +1,89 @@
+"""
+Checks for shm_service.py - per-row rejects in shared-memory tickets
+"""
+
+import multiprocessing as mp
+import threading
+import uuid
+
+import numpy as np
+import pytest
+
+from conftest import make_transactions
+from input_schema import MISSING, OUT_OF_RANGE
+from shm_service import ScoringClient, ScoringService, _pickle_server, _pipe_reply
+
+
+@pytest.fixture
+def client(api):
+    service = ScoringService(api, rings=1, slots=2, max_rows=64,
+                             prefix=f"fdtest-{uuid.uuid4().hex[:8]}").start()
+    client = ScoringClient(service.ring_names[0])
+    yield client
+    client.close()
+    service.stop()
+
+
+def test_invalid_rows_are_flagged_and_the_rest_scored(api, client):
+    X = make_transactions(20, seed=3)[api.feature_names].to_numpy()
+    X[4, api.feature_names.index("Amount")] = -5.0
+    X[9, 3] = np.nan
+
+    results, flags = client.score(X)
+
+    assert flags[4] == OUT_OF_RANGE and flags[9] == MISSING
+    assert np.flatnonzero(flags).tolist() == [4, 9]
+    assert np.isnan(results[[4, 9]]).all()
+    valid = flags == 0
+    np.testing.assert_allclose(results[valid], api.score_arrays(X[valid]))
+
+
+def test_failed_ticket_reports_its_reason(api, client, monkeypatch):
+    def broken(*args, **kwargs):
+        raise MemoryError("scaler unavailable")
+
+    monkeypatch.setattr(api, "score_arrays", broken)
+    X = make_transactions(2, seed=4)[api.feature_names].to_numpy()
+
+    with pytest.raises(RuntimeError, match="ticket 0: MemoryError: scaler unavailable"):
+        client.score(X)
+
+
+def test_pickle_server_sends_errors_back(models_dir):
+    parent, child = mp.Pipe()
+    server = threading.Thread(target=_pickle_server, args=(child, models_dir))
+    server.start()
+    assert _pipe_reply(parent) == "ready"
+
+    parent.send(np.full((2, 30), -1.0))
+    with pytest.raises(RuntimeError, match="Pickle server failed: ValueError"):
+        _pipe_reply(parent)
+    parent.send(None)
+    server.join(timeout=10)
+    assert not server.is_alive()
+
+
+def test_submit_needs_a_matching_reservation(api, client):
+    with pytest.raises(RuntimeError, match="needs a reserve"):
+        client.submit(1)
+
+    client.reserve(4)[:] = make_transactions(4, seed=5)[api.feature_names].to_numpy()
+    with pytest.raises(ValueError, match="reserved 4"):
+        client.submit(5)
+    ticket = client.submit(3)
+    assert len(client.result(ticket)) == 3
+    client.release(ticket)
+    with pytest.raises(RuntimeError, match="needs a reserve"):
+        client.submit(3)
+
+
+def test_service_rejects_out_of_range_row_counts(client):
+    # A client writing the control word directly, bypassing reserve()/submit()
+    ring = client.ring
+    ticket = client.submitted
+    ring.control[ticket % ring.slots][0] = ring.max_rows + 1
+    client.submitted += 1
+    ring.header[5] = client.submitted
+
+    with pytest.raises(RuntimeError, match="Slot holds 65 rows; expected 1 to 64"):
+        client.result(ticket)
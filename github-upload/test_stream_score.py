@@ -0,0 +1,84 @@
+"""
+Checks for stream_score.py - output order and per-line errors
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from conftest import make_transactions
+from input_schema import SchemaError
+from stream_score import StreamScorer
+
+
+def _run(api, text, **kwargs):
+    out = io.StringIO()
+    StreamScorer(api, batch_size=32, max_wait_ms=5, **kwargs).run(io.StringIO(text), out=out)
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_ndjson_order_and_errors(api):
+    df = make_transactions(200, seed=6)
+    X = df[api.feature_names].to_numpy()
+    lines = [json.dumps({"transaction_id": f"T{i}", **dict(zip(api.feature_names, row))})
+             for i, row in enumerate(X.tolist())]
+    lines[17] = "{not json"
+    lines[90] = lines[90].replace('"Amount": ', '"Amount": -')
+    lines[150] = json.dumps({"transaction_id": "T150", "Time": 1.0})
+
+    results = _run(api, "\n".join(lines) + "\n", fmt="ndjson")
+
+    assert len(results) == len(lines)
+    errors = [i for i, r in enumerate(results) if "error" in r]
+    assert errors == [17, 90, 150]
+    assert [r["line"] for r in map(results.__getitem__, errors)] == [18, 91, 151]
+    assert "out of range" in results[90]["error"]
+
+    valid = [i for i in range(len(lines)) if i not in errors]
+    assert [results[i]["transaction_id"] for i in valid] == [f"T{i}" for i in valid]
+    np.testing.assert_allclose([results[i]["consensus_score"] for i in valid],
+                               api.score_arrays(X[valid])[:, 2], rtol=1e-5)
+
+
+def test_csv_malformed_line_answered_in_place(api):
+    df = make_transactions(100, seed=7)
+    text = df.to_csv(index=False).splitlines()
+    text[41] = "1.0,abc"
+    results = _run(api, "\n".join(text) + "\n", fmt="csv")
+
+    assert len(results) == 100
+    assert [i for i, r in enumerate(results) if "error" in r] == [40]
+    scores = api.score_arrays(df[api.feature_names].to_numpy()[np.arange(100) != 40])[:, 2]
+    np.testing.assert_allclose([r["consensus_score"] for r in results if "error" not in r],
+                               scores, rtol=1e-5)
+
+
+def test_csv_missing_columns_fails_before_scoring(api, tmp_path, models_dir):
+    text = "Time,V1\n" + "".join(f"{i}.0,0.5\n" for i in range(50))
+    with pytest.raises(SchemaError, match="Missing 28 of 30 feature columns"):
+        _run(api, text, fmt="auto")
+
+    path = tmp_path / "narrow.csv"
+    path.write_text(text)
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stream_score.py")
+    done = subprocess.run([sys.executable, script, "--input", str(path),
+                           "--models-dir", models_dir], capture_output=True, text=True,
+                          timeout=120)
+    assert done.returncode == 1
+    assert done.stdout == ""
+    assert "Missing 28 of 30" in done.stderr
+
+
+def test_scorer_failure_is_raised_by_run(api, monkeypatch):
+    def broken(*args, **kwargs):
+        raise MemoryError("out of memory")
+
+    monkeypatch.setattr(api, "score_arrays", broken)
+    text = make_transactions(300, seed=10).to_csv(index=False)
+    with pytest.raises(MemoryError, match="out of memory"):
+        _run(api, text, fmt="csv")
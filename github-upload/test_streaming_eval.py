@@ -0,0 +1,38 @@
+"""
+Checks for streaming_eval.py - histogram metrics against scikit-learn
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import average_precision_score, roc_auc_score
+
+from model_store import ModelStore
+from streaming_eval import MetricAccumulator, evaluate_file
+
+
+def test_accumulator_auc_matches_sklearn():
+    rng = np.random.default_rng(0)
+    y = rng.random(20_000) < 0.05
+    score = np.clip(rng.normal(0.3 + 0.3 * y, 0.15), 0, 1)
+    acc = MetricAccumulator(bins=10_000, scorers=("lr",))
+    for block in np.array_split(np.arange(len(y)), 7):
+        acc.update(y[block], {"lr": score[block]}, {"lr": score[block] > 0.5})
+
+    metrics = acc.compute()["lr"]
+    assert abs(metrics["roc_auc"] - roc_auc_score(y, score)) < 1e-3
+    assert abs(metrics["pr_auc"] - average_precision_score(y, score)) < 5e-3
+    assert metrics["recall"] == np.count_nonzero(y & (score > 0.5)) / y.sum()
+
+
+def test_sharded_file_matches_whole_file(transactions_csv, models_dir):
+    single = evaluate_file(transactions_csv, models_dir, block_bytes=64 << 10)
+    sharded = evaluate_file(transactions_csv, models_dir, shards=3, block_bytes=64 << 10)
+    df = pd.read_csv(transactions_csv)
+    assert single.rows == sharded.rows == len(df)
+    for s in single.scorers:
+        np.testing.assert_array_equal(single.confusion[s], sharded.confusion[s])
+        np.testing.assert_array_equal(single.pos_hist[s], sharded.pos_hist[s])
+
+    store = ModelStore(models_dir)
+    rf = store.rf_model.predict_proba(store.scaler.transform(df[store.feature_names].to_numpy()))[:, 1]
+    assert abs(single.compute()["rf"]["roc_auc"] - roc_auc_score(df["Class"], rf)) < 1e-3
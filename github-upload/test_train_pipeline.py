@@ -0,0 +1,98 @@
+"""
+Checks for train_pipeline.py - binary dataset cache and negative downsampling
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_transactions
+from train_pipeline import (PriorCorrectedClassifier, compare_negative_rates, convert_csv,
+                            downsample_negatives, load_dataset, run_pipeline, train_models)
+
+
+def test_cache_matches_csv(transactions_csv, tmp_path):
+    ds = load_dataset(transactions_csv, str(tmp_path))
+    df = pd.read_csv(transactions_csv)
+    assert ds.feature_names == [c for c in df.columns if c != "Class"]
+    np.testing.assert_allclose(ds.X, df[ds.feature_names].to_numpy(np.float32))
+    np.testing.assert_array_equal(ds.y, df["Class"].to_numpy())
+
+    again = load_dataset(transactions_csv, str(tmp_path))
+    assert again.source_hash == ds.source_hash
+
+
+def test_convert_rejects_blank_lines(transactions_csv, tmp_path):
+    lines = open(transactions_csv).read().splitlines()[:100]
+    path = tmp_path / "blank.csv"
+    path.write_text("\n".join(lines[:50] + [""] + lines[50:]) + "\n")
+
+    with pytest.raises(ValueError, match="parsed 99 rows"):
+        convert_csv(str(path), str(tmp_path / "out"))
+    assert not list((tmp_path / "out").iterdir())
+
+
+def _arrays(n_rows, seed):
+    df = make_transactions(n_rows, seed=seed)
+    X = df.drop(columns="Class").to_numpy()
+    return (X - X.mean(axis=0)) / X.std(axis=0), df["Class"].to_numpy()
+
+
+def test_downsample_keeps_all_positives():
+    X, y = _arrays(40_000, seed=20)
+    X_kept, y_kept, weights = downsample_negatives(X, y, 0.1, random_state=0)
+
+    assert y_kept.sum() == y.sum()
+    kept_share = (y_kept == 0).sum() / (y == 0).sum()
+    assert abs(kept_share - 0.1) < 0.01
+    assert len(X_kept) == len(y_kept)
+    np.testing.assert_array_equal(weights, np.where(y_kept == 1, 1.0, 10.0))
+    with pytest.raises(ValueError):
+        downsample_negatives(X, y, 0.0)
+
+
+def test_prior_correction_restores_base_rate():
+    X, y = _arrays(30_000, seed=21)
+    X_full, y_full = _arrays(30_000, seed=22)
+    lr, rf = train_models(X, y, n_estimators=20, negative_rate=0.05, correction="prior")
+
+    assert isinstance(rf, PriorCorrectedClassifier)
+    base_rate = y_full.mean()
+    uncorrected = rf.estimator.predict_proba(X_full)[:, 1].mean()
+    assert uncorrected > 3 * base_rate
+    assert abs(lr.predict_proba(X_full)[:, 1].mean() - base_rate) < 0.1 * base_rate
+    # Fully grown trees are overconfident, so the corrected forest runs a little low
+    assert abs(rf.predict_proba(X_full)[:, 1].mean() - base_rate) < 0.4 * base_rate
+
+
+def test_prior_corrected_models_load_through_api(transactions_csv, tmp_path):
+    from fraud_detection_api import MIN_BLOCK_ROWS, FraudDetectionAPI
+
+    models = str(tmp_path / "models")
+    run_pipeline(transactions_csv, models, str(tmp_path / "cache"), n_estimators=5,
+                 negative_rate=0.2, correction="prior")
+    api = FraudDetectionAPI(models)
+    assert isinstance(api.rf_model, PriorCorrectedClassifier)
+
+    X = make_transactions(2 * MIN_BLOCK_ROWS + 100, seed=23)[api.feature_names].to_numpy()
+    serial = api.score_arrays(X, threads=1)
+    np.testing.assert_allclose(api.score_arrays(X, threads=3), serial, rtol=1e-12)
+
+    # Block workers use a shallow n_jobs=1 copy that shares the fitted trees
+    copy = api._serial_forest()
+    assert copy is not api.rf_model and copy.estimator is not api.rf_model.estimator
+    assert copy.estimator.n_jobs == 1 and api.rf_model.estimator.n_jobs == -1
+    assert copy.estimator.estimators_ is api.rf_model.estimator.estimators_
+    assert copy.negative_rate == 0.2
+
+    q = api.rf_model.estimator.predict_proba(api.scaler.transform(X))[:, 1]
+    np.testing.assert_allclose(serial[:, 1], 0.2 * q / (0.2 * q + 1 - q))
+    api.close()
+
+
+def test_compare_negative_rates_reports_each_rate(transactions_csv, tmp_path):
+    rows = compare_negative_rates(transactions_csv, str(tmp_path), rates=(1.0, 0.2),
+                                  correction="prior", n_estimators=5)
+    assert [r["negative_rate"] for r in rows] == [1.0, 0.2]
+    assert rows[1]["fit_rows"] < 0.5 * rows[0]["fit_rows"]
+    assert abs(rows[1]["lr_mean_proba"] - rows[0]["lr_mean_proba"]) < 0.01
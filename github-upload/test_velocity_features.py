@@ -0,0 +1,62 @@
+"""
+Checks for velocity_features.py - streaming and batch parity
+"""
+
+import numpy as np
+
+from velocity_features import VelocityTracker, compute_batch
+
+WINDOWS = (60, 600, 3600)
+
+
+def _stream(n=20_000, entities=300, late_fraction=0.0, lateness=500.0, seed=0):
+    rng = np.random.default_rng(seed)
+    times = np.sort(rng.uniform(0, 172_800, n))
+    late = rng.random(n) < late_fraction
+    times[late] -= lateness
+    amounts = np.round(rng.exponential(80, n), 2)
+    ids = rng.integers(0, entities, n)
+    return times, amounts, ids
+
+
+def _streamed(times, amounts, ids, **kwargs):
+    tracker = VelocityTracker(WINDOWS, **kwargs)
+    return np.array([list(tracker.update(t, a, e).values())
+                     for t, a, e in zip(times.tolist(), amounts.tolist(), ids.tolist())])
+
+
+def test_streaming_matches_batch_in_order():
+    times, amounts, ids = _stream()
+    np.testing.assert_allclose(_streamed(times, amounts, ids),
+                               compute_batch(times, amounts, ids, WINDOWS), atol=1e-6)
+
+
+def test_streaming_matches_batch_with_late_events():
+    times, amounts, ids = _stream(late_fraction=0.05, lateness=500.0)
+    streamed = _streamed(times, amounts, ids, allowed_lateness=600)
+    batch = compute_batch(times, amounts, ids, WINDOWS)
+    np.testing.assert_array_equal(streamed[:, 0::2], batch[:, 0::2])
+    np.testing.assert_allclose(streamed[:, 1::2], batch[:, 1::2], atol=1e-6)
+
+
+def test_idle_entities_are_evicted():
+    tracker = VelocityTracker(WINDOWS, allowed_lateness=0)
+    for entity in range(100):
+        tracker.update(entity, 1.0, entity)
+    tracker.update(10_000, 1.0, "late riser")
+    assert len(tracker) == 1 and tracker.evicted == 100
+
+
+def test_predict_batch_keys_velocity_by_entity(models_dir, transactions_csv):
+    import pandas as pd
+    from fraud_detection_api import FraudDetectionAPI
+
+    df = pd.read_csv(transactions_csv, nrows=500)
+    X = df.drop(columns="Class").to_numpy()
+    ids = np.arange(len(df)) % 7
+    api = FraudDetectionAPI(models_dir, velocity_windows=WINDOWS)
+    results = api.predict_batch(X, entity_ids=ids)
+    api.close()
+
+    expected = compute_batch(df["Time"].to_numpy(), df["Amount"].to_numpy(), ids, WINDOWS)
+    np.testing.assert_allclose([list(r.velocity.values()) for r in results], expected, atol=1e-6)
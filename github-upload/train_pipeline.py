@@ -0,0 +1,498 @@
+"""
+Training Pipeline - Scriptable version of the notebook's training cells
+Caches creditcard.csv as float32 .npy arrays so repeat runs skip CSV parsing
+
+Usage:
+    python train_pipeline.py --csv creditcard.csv --models-dir fraud_detection_models
+"""
+
+import argparse
+import json
+import os
+import pickle
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from drift_monitor import build_reference
+from model_store import ARTIFACT_FILES, file_digest, write_manifest
+
+TARGET_COLUMN = "Class"
+DEFAULT_CSV = "creditcard.csv"
+DEFAULT_MODELS_DIR = "fraud_detection_models"
+DEFAULT_CACHE_DIR = ".dataset_cache"
+CSV_CHUNK_ROWS = 50_000
+HASH_INDEX_FILE = "hash_index.json"
+CORRECTIONS = ("weights", "prior")
+
+
+@dataclass
+class Dataset:
+    """Feature matrix and labels loaded from the binary cache"""
+    X: np.ndarray
+    y: np.ndarray
+    feature_names: List[str]
+    source_hash: str
+
+
+def _source_hash(csv_path: str, cache_dir: str) -> str:
+    """
+    Return the SHA-256 of the CSV, reusing a cached digest while the file's
+    size and mtime are unchanged
+    """
+    stat = os.stat(csv_path)
+    key = f"{os.path.abspath(csv_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    index_path = os.path.join(cache_dir, HASH_INDEX_FILE)
+
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+    if key in index:
+        return index[key]
+
+    digest = file_digest(csv_path)
+    index[key] = digest
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(index_path, "w") as f:
+        json.dump(index, f, indent=2)
+    return digest
+
+
+def _count_rows(csv_path: str) -> int:
+    """Count data rows (excluding the header) without parsing the CSV"""
+    newlines = 0
+    last = b"\n"
+    with open(csv_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            newlines += chunk.count(b"\n")
+            last = chunk[-1:]
+    if last != b"\n":
+        newlines += 1
+    return newlines - 1
+
+
+def convert_csv(csv_path: str, out_dir: str,
+                chunk_rows: int = CSV_CHUNK_ROWS) -> List[str]:
+    """
+    Convert a labeled CSV into X.npy (float32) and y.npy (int8)
+
+    Rows are parsed in chunks and written straight into memory-mapped
+    output arrays, so peak memory is bounded by chunk_rows.
+
+    Args:
+        csv_path: Source CSV with a Class column
+        out_dir: Directory receiving X.npy, y.npy and columns.json
+        chunk_rows: Rows parsed per chunk
+
+    Returns:
+        Ordered feature column names
+
+    Raises:
+        ValueError: If the parsed row count differs from the line count
+    """
+    import pandas as pd
+
+    n_rows = _count_rows(csv_path)
+    header = pd.read_csv(csv_path, nrows=0).columns.tolist()
+    feature_names = [c for c in header if c != TARGET_COLUMN]
+
+    os.makedirs(out_dir, exist_ok=True)
+    X = np.lib.format.open_memmap(os.path.join(out_dir, "X.npy.tmp"), mode="w+",
+                                  dtype=np.float32, shape=(n_rows, len(feature_names)))
+    y = np.lib.format.open_memmap(os.path.join(out_dir, "y.npy.tmp"), mode="w+",
+                                  dtype=np.int8, shape=(n_rows,))
+
+    dtypes = {c: np.float32 for c in feature_names}
+    dtypes[TARGET_COLUMN] = np.int8
+    offset = 0
+    try:
+        for chunk in pd.read_csv(csv_path, dtype=dtypes, chunksize=chunk_rows):
+            end = offset + len(chunk)
+            if end > n_rows:
+                break
+            X[offset:end] = chunk[feature_names].to_numpy()
+            y[offset:end] = chunk[TARGET_COLUMN].to_numpy()
+            offset = end
+        else:
+            end = offset
+    finally:
+        X.flush()
+        y.flush()
+        del X, y
+
+    # The arrays were sized from a raw newline count; blank lines or quoted
+    # fields spanning lines would leave zero rows labelled 0 or overflow it
+    if end != n_rows:
+        for name in ("X.npy.tmp", "y.npy.tmp"):
+            os.remove(os.path.join(out_dir, name))
+        parsed = f"more than {n_rows:,}" if end > n_rows else f"{end:,}"
+        raise ValueError(f"{csv_path}: parsed {parsed} rows from {n_rows:,} data lines; "
+                         f"remove blank lines and multi-line fields before converting")
+
+    # Rename last so an interrupted conversion never looks like a valid cache
+    with open(os.path.join(out_dir, "columns.json"), "w") as f:
+        json.dump(feature_names, f)
+    os.replace(os.path.join(out_dir, "X.npy.tmp"), os.path.join(out_dir, "X.npy"))
+    os.replace(os.path.join(out_dir, "y.npy.tmp"), os.path.join(out_dir, "y.npy"))
+    return feature_names
+
+
+class PriorCorrectedClassifier:
+    """
+    Wraps a classifier trained on negative-downsampled data and maps its
+    probabilities back to the original class prior
+
+    With negatives kept at rate r, a model's fraud probability q relates to
+    the full-data probability p by p = r*q / (r*q + 1 - q).
+    """
+
+    def __init__(self, estimator, negative_rate: float):
+        self.estimator = estimator
+        self.negative_rate = negative_rate
+        self.classes_ = estimator.classes_
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        q = self.estimator.predict_proba(X)[:, 1]
+        p = self.negative_rate * q / (self.negative_rate * q + 1.0 - q)
+        p = np.clip(p, 0.0, 1.0)  # rounding can push q = 1 just above 1
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(int)
+
+    def __getattr__(self, name):
+        # Expose estimators_, n_estimators, feature_importances_, ... of the
+        # wrapped model; dunder lookups (e.g. during unpickling) must fail fast
+        if name.startswith("__") or name == "estimator":
+            raise AttributeError(name)
+        return getattr(self.estimator, name)
+
+
+def downsample_negatives(X: np.ndarray, y: np.ndarray, negative_rate: float,
+                         random_state: int = 42) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Keep every fraud row and a random negative_rate share of legitimate rows
+
+    Args:
+        X: Feature matrix
+        y: Labels (1 = fraud)
+        negative_rate: Fraction of legitimate rows to keep, in (0, 1]
+        random_state: Sampling seed
+
+    Returns:
+        (X_sampled, y_sampled, importance_weights) where kept negatives
+        carry weight 1/negative_rate and positives weight 1
+    """
+    if not 0.0 < negative_rate <= 1.0:
+        raise ValueError(f"negative_rate must be in (0, 1], got {negative_rate}")
+
+    rng = np.random.default_rng(random_state)
+    keep = (y == 1) | (rng.random(len(y)) < negative_rate)
+    y_kept = y[keep]
+    weights = np.where(y_kept == 1, 1.0, 1.0 / negative_rate)
+    return X[keep], y_kept, weights
+
+
+def load_dataset(csv_path: str = DEFAULT_CSV, cache_dir: str = DEFAULT_CACHE_DIR,
+                 mmap: bool = True) -> Dataset:
+    """
+    Load the dataset from the binary cache, converting the CSV on first use
+
+    The cache entry is keyed by the CSV's content hash, so editing or
+    replacing the CSV produces a fresh conversion.
+
+    Args:
+        csv_path: Source CSV with a Class column
+        cache_dir: Directory holding converted datasets
+        mmap: Memory-map the arrays instead of reading them into RAM
+
+    Returns:
+        Dataset with float32 features and int8 labels
+    """
+    digest = _source_hash(csv_path, cache_dir)
+    entry_dir = os.path.join(cache_dir, digest[:16])
+
+    if not os.path.exists(os.path.join(entry_dir, "y.npy")):
+        start = time.perf_counter()
+        convert_csv(csv_path, entry_dir)
+        print(f"📦 Cached {csv_path} as .npy in {time.perf_counter() - start:.1f}s")
+
+    with open(os.path.join(entry_dir, "columns.json")) as f:
+        feature_names = json.load(f)
+
+    mode = "r" if mmap else None
+    X = np.load(os.path.join(entry_dir, "X.npy"), mmap_mode=mode)
+    y = np.load(os.path.join(entry_dir, "y.npy"), mmap_mode=mode)
+    return Dataset(X=X, y=y, feature_names=feature_names, source_hash=digest)
+
+
+def load_dataframe(csv_path: str = DEFAULT_CSV, cache_dir: str = DEFAULT_CACHE_DIR):
+    """
+    Load the cached dataset as a DataFrame with the original CSV columns
+
+    Returns:
+        pd.DataFrame with feature columns followed by Class
+    """
+    import pandas as pd
+
+    ds = load_dataset(csv_path, cache_dir, mmap=False)
+    df = pd.DataFrame(ds.X, columns=ds.feature_names)
+    df[TARGET_COLUMN] = ds.y
+    return df
+
+
+def preprocess(X: np.ndarray, y: np.ndarray, test_size: float = 0.2,
+               random_state: int = 42) -> Tuple:
+    """
+    Standardize features and make a stratified train/test split
+
+    Matches the notebook: the scaler is fit on all rows before splitting.
+
+    Returns:
+        (scaler, X_train, X_test, y_train, y_test)
+    """
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_scaled, y, test_size=test_size, random_state=random_state, stratify=y
+    )
+    return scaler, X_train, X_test, y_train, y_test
+
+
+def train_models(X_train: np.ndarray, y_train: np.ndarray, n_estimators: int = 100,
+                 max_iter: int = 1000, random_state: int = 42, negative_rate: float = 1.0,
+                 correction: str = "weights") -> Tuple:
+    """
+    Fit the Logistic Regression and Random Forest models
+
+    With negative_rate < 1 the models are fit on all fraud rows and a sample
+    of legitimate rows. correction="weights" passes 1/negative_rate importance
+    weights to fit; correction="prior" fits unweighted and then shifts the
+    LR intercept by log(negative_rate) and wraps the forest in
+    PriorCorrectedClassifier, so both return full-data probabilities.
+
+    Returns:
+        (lr_model, rf_model)
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+
+    if correction not in CORRECTIONS:
+        raise ValueError(f"correction must be one of {CORRECTIONS}, got {correction!r}")
+
+    sample_weight = None
+    if negative_rate < 1.0:
+        X_train, y_train, weights = downsample_negatives(X_train, y_train, negative_rate,
+                                                         random_state)
+        if correction == "weights":
+            sample_weight = weights
+
+    lr_model = LogisticRegression(random_state=random_state, max_iter=max_iter)
+    lr_model.fit(X_train, y_train, sample_weight=sample_weight)
+
+    rf_model = RandomForestClassifier(n_estimators=n_estimators,
+                                      random_state=random_state, n_jobs=-1)
+    rf_model.fit(X_train, y_train, sample_weight=sample_weight)
+
+    if negative_rate < 1.0 and correction == "prior":
+        lr_model.intercept_ += np.log(negative_rate)
+        rf_model = PriorCorrectedClassifier(rf_model, negative_rate)
+
+    return lr_model, rf_model
+
+
+def evaluate_models(lr_model, rf_model, X_train: np.ndarray, X_test: np.ndarray,
+                    y_train: np.ndarray, y_test: np.ndarray) -> Dict:
+    """
+    Build the metadata dictionary the API and the app read
+
+    Returns:
+        Dict with AUC/F1/accuracy/precision/recall per model and dataset stats
+    """
+    import pandas as pd
+    from sklearn.metrics import (
+        accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+    )
+
+    metadata = {}
+    for prefix, model in (("lr", lr_model), ("rf", rf_model)):
+        y_pred = model.predict(X_test)
+        y_proba = model.predict_proba(X_test)[:, 1]
+        metadata[f"{prefix}_auc"] = roc_auc_score(y_test, y_proba)
+        metadata[f"{prefix}_f1"] = f1_score(y_test, y_pred)
+        metadata[f"{prefix}_accuracy"] = accuracy_score(y_test, y_pred)
+        metadata[f"{prefix}_precision"] = precision_score(y_test, y_pred, zero_division=0)
+        metadata[f"{prefix}_recall"] = recall_score(y_test, y_pred)
+
+    metadata.update({
+        "test_fraud_rate": (y_test.sum() / len(y_test)) * 100,
+        "train_fraud_rate": (y_train.sum() / len(y_train)) * 100,
+        "n_features": X_train.shape[1],
+        "num_features": X_train.shape[1],
+        "train_samples": len(X_train),
+        "test_samples": len(X_test),
+        "total_samples": len(X_train) + len(X_test),
+        "model_date": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+    })
+    return metadata
+
+
+def save_artifacts(models_dir: str, lr_model, rf_model, scaler,
+                   feature_names: List[str], metadata: Dict) -> Dict:
+    """
+    Pickle all artifacts in the layout FraudDetectionAPI loads and write
+    the checksummed manifest
+
+    Returns:
+        The manifest dictionary
+    """
+    os.makedirs(models_dir, exist_ok=True)
+
+    artifacts = {
+        "lr_model": lr_model,
+        "rf_model": rf_model,
+        "scaler": scaler,
+        "metadata": metadata,
+        "feature_names": list(feature_names),
+    }
+    for name, obj in artifacts.items():
+        with open(os.path.join(models_dir, ARTIFACT_FILES[name]), "wb") as f:
+            pickle.dump(obj, f)
+
+    return write_manifest(models_dir, feature_names,
+                          metadata["model_date"].replace(" ", "T"))
+
+
+def run_pipeline(csv_path: str = DEFAULT_CSV, models_dir: str = DEFAULT_MODELS_DIR,
+                 cache_dir: str = DEFAULT_CACHE_DIR, n_estimators: int = 100,
+                 max_iter: int = 1000, test_size: float = 0.2,
+                 random_state: int = 42, negative_rate: float = 1.0,
+                 correction: str = "weights") -> Dict:
+    """
+    Load, preprocess, train, evaluate and persist in one call
+
+    Returns:
+        The metadata dictionary that was saved
+    """
+    start = time.perf_counter()
+    ds = load_dataset(csv_path, cache_dir)
+    print(f"✅ Loaded {len(ds.y):,} rows in {time.perf_counter() - start:.3f}s")
+
+    scaler, X_train, X_test, y_train, y_test = preprocess(
+        ds.X, ds.y, test_size=test_size, random_state=random_state
+    )
+
+    start = time.perf_counter()
+    lr_model, rf_model = train_models(X_train, y_train, n_estimators=n_estimators,
+                                      max_iter=max_iter, random_state=random_state,
+                                      negative_rate=negative_rate, correction=correction)
+    print(f"✅ Trained models in {time.perf_counter() - start:.1f}s")
+
+    metadata = evaluate_models(lr_model, rf_model, X_train, X_test, y_train, y_test)
+    metadata.update({
+        "dataset_hash": ds.source_hash,
+        "n_estimators": n_estimators,
+        "max_iter": max_iter,
+        "negative_rate": negative_rate,
+        "correction": correction if negative_rate < 1.0 else None,
+    })
+    save_artifacts(models_dir, lr_model, rf_model, scaler, ds.feature_names, metadata)
+    build_reference(models_dir, X_train, lr_model.predict_proba(X_test)[:, 1],
+                    rf_model.predict_proba(X_test)[:, 1])
+
+    print(f"✅ Artifacts saved to {os.path.abspath(models_dir)}/")
+    print(f"  - Logistic Regression AUC: {metadata['lr_auc']:.4f}")
+    print(f"  - Random Forest AUC: {metadata['rf_auc']:.4f}")
+    return metadata
+
+
+def compare_negative_rates(csv_path: str = DEFAULT_CSV, cache_dir: str = DEFAULT_CACHE_DIR,
+                           rates: Tuple[float, ...] = (1.0, 0.1, 0.02),
+                           correction: str = "weights", n_estimators: int = 100,
+                           max_iter: int = 1000, random_state: int = 42) -> List[Dict]:
+    """
+    Train at several negative sampling rates and report them side by side
+
+    Every run is scored on the same untouched test split. Calibration is
+    summarized by the Brier score and the mean predicted fraud probability,
+    which should stay close to the full-data baseline (rate 1.0).
+
+    Returns:
+        One result dictionary per rate
+    """
+    from sklearn.metrics import brier_score_loss, roc_auc_score
+
+    ds = load_dataset(csv_path, cache_dir)
+    _, X_train, X_test, y_train, y_test = preprocess(ds.X, ds.y, random_state=random_state)
+
+    rows = []
+    for rate in rates:
+        start = time.perf_counter()
+        lr_model, rf_model = train_models(X_train, y_train, n_estimators, max_iter,
+                                          random_state, rate, correction)
+        fit_seconds = time.perf_counter() - start
+
+        row = {
+            "negative_rate": rate,
+            "fit_rows": len(downsample_negatives(X_train, y_train, rate, random_state)[1]),
+            "fit_seconds": fit_seconds,
+            "artifact_bytes": len(pickle.dumps(lr_model)) + len(pickle.dumps(rf_model)),
+        }
+        for prefix, model in (("lr", lr_model), ("rf", rf_model)):
+            proba = model.predict_proba(X_test)[:, 1]
+            row[f"{prefix}_auc"] = roc_auc_score(y_test, proba)
+            row[f"{prefix}_brier"] = brier_score_loss(y_test, proba)
+            row[f"{prefix}_mean_proba"] = float(proba.mean())
+        rows.append(row)
+
+    print(f"\nCorrection: {correction}   Test fraud rate: {y_test.mean():.5f}")
+    print(f"{'rate':>6} {'rows':>9} {'fit s':>7} {'size MB':>8} {'LR AUC':>7} {'RF AUC':>7} "
+          f"{'LR Brier':>9} {'RF Brier':>9} {'LR mean p':>10} {'RF mean p':>10}")
+    for r in rows:
+        print(f"{r['negative_rate']:6.3f} {r['fit_rows']:9,} {r['fit_seconds']:7.1f} "
+              f"{r['artifact_bytes'] / 1e6:8.2f} {r['lr_auc']:7.4f} {r['rf_auc']:7.4f} "
+              f"{r['lr_brier']:9.5f} {r['rf_brier']:9.5f} "
+              f"{r['lr_mean_proba']:10.5f} {r['rf_mean_proba']:10.5f}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and save fraud detection models")
+    parser.add_argument("--csv", default=DEFAULT_CSV, help="Labeled transactions CSV")
+    parser.add_argument("--models-dir", default=DEFAULT_MODELS_DIR)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--max-iter", type=int, default=1000)
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--random-state", type=int, default=42)
+    parser.add_argument("--negative-rate", type=float, default=1.0,
+                        help="Fraction of legitimate rows used for fitting")
+    parser.add_argument("--correction", choices=CORRECTIONS, default="weights",
+                        help="How downsampled models are mapped back to the true prior")
+    parser.add_argument("--compare-rates", type=float, nargs="+", default=None,
+                        help="Only report training time/size/AUC for these rates")
+    args = parser.parse_args()
+
+    if args.compare_rates:
+        compare_negative_rates(args.csv, args.cache_dir, tuple(args.compare_rates),
+                               args.correction, args.n_estimators, args.max_iter,
+                               args.random_state)
+        return
+
+    run_pipeline(args.csv, args.models_dir, args.cache_dir, args.n_estimators,
+                 args.max_iter, args.test_size, args.random_state,
+                 args.negative_rate, args.correction)
+
+
+if __name__ == "__main__":
+    # Run through the importable module so pickled wrappers reference
+    # train_pipeline.PriorCorrectedClassifier instead of __main__
+    import train_pipeline
+    train_pipeline.main()